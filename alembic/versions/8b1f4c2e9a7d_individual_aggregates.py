@@ -0,0 +1,39 @@
+"""individual aggregates
+
+Revision ID: 8b1f4c2e9a7d
+Revises: 3d0d7256cf9c
+Create Date: 20261019_1000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1f4c2e9a7d'
+down_revision = '3d0d7256cf9c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('individual_aggregates',
+    sa.Column('individual_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('ancestor_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('generation_depth', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('living_descendant_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('stale', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['individual_id'], ['individuals.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('individual_id')
+    )
+    # Existing people start stale; POST /api/admin/aggregates/recompute fills them in
+    op.execute(
+        "INSERT INTO individual_aggregates (individual_id, stale) "
+        "SELECT id, true FROM individuals"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('individual_aggregates')
@@ -0,0 +1,121 @@
+"""family trees
+
+Revision ID: a9d3e5f7b2c4
+Revises: f2b8c6d4a1e3
+Create Date: 20261019_1400
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e5f7b2c4'
+down_revision = 'f2b8c6d4a1e3'
+branch_labels = None
+depends_on = None
+
+_RELATIONSHIP_COLUMNS = "id, individual_id, related_individual_id, relationship_type, created_at"
+
+
+def upgrade() -> None:
+    op.create_table('family_trees',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_family_trees_id'), 'family_trees', ['id'], unique=False)
+    # Tree 1 (DEFAULT_TREE_ID) owns everything that exists so far
+    op.execute("INSERT INTO family_trees (name) VALUES ('Default')")
+
+    with op.batch_alter_table('individuals') as batch_op:
+        batch_op.add_column(sa.Column('tree_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.create_foreign_key('fk_individuals_tree_id', 'family_trees', ['tree_id'], ['id'])
+    op.create_index('ix_individuals_tree', 'individuals', ['tree_id', 'id'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        _partition_relationships()
+    else:
+        with op.batch_alter_table('relationships') as batch_op:
+            batch_op.add_column(sa.Column('tree_id', sa.Integer(), server_default='1', nullable=False))
+            batch_op.create_foreign_key('fk_relationships_tree_id', 'family_trees', ['tree_id'], ['id'])
+    op.create_index('ix_relationships_tree_individual', 'relationships',
+                    ['tree_id', 'individual_id', 'relationship_type'], unique=False)
+    op.create_index('ix_relationships_tree_related', 'relationships',
+                    ['tree_id', 'related_individual_id', 'relationship_type'], unique=False)
+
+
+def _partition_relationships() -> None:
+    """
+    Rebuild relationships as a LIST-partitioned table on tree_id. Every tree
+    starts in the default partition; FamilyTreeService.create_partition
+    moves a tree to its own. The primary key must contain the partition
+    key, hence (tree_id, id); ids still come from the same sequence.
+    """
+    op.execute("ALTER TABLE relationships RENAME TO relationships_unpartitioned")
+    op.execute("ALTER INDEX relationships_pkey RENAME TO relationships_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_relationships_id RENAME TO ix_relationships_unpartitioned_id")
+    op.execute(
+        "CREATE TABLE relationships ("
+        " id INTEGER NOT NULL DEFAULT nextval('relationships_id_seq'),"
+        " tree_id INTEGER NOT NULL DEFAULT 1 REFERENCES family_trees (id),"
+        " individual_id INTEGER REFERENCES individuals (id) ON DELETE CASCADE,"
+        " related_individual_id INTEGER REFERENCES individuals (id) ON DELETE CASCADE,"
+        " relationship_type VARCHAR(50) NOT NULL,"
+        " created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),"
+        " PRIMARY KEY (tree_id, id)"
+        ") PARTITION BY LIST (tree_id)"
+    )
+    op.execute("CREATE TABLE relationships_default PARTITION OF relationships DEFAULT")
+    op.execute(
+        f"INSERT INTO relationships ({_RELATIONSHIP_COLUMNS}) "
+        f"SELECT {_RELATIONSHIP_COLUMNS} FROM relationships_unpartitioned"
+    )
+    op.execute("ALTER SEQUENCE relationships_id_seq OWNED BY relationships.id")
+    op.execute("DROP TABLE relationships_unpartitioned")
+    op.create_index(op.f('ix_relationships_id'), 'relationships', ['id'], unique=False)
+
+
+def _unpartition_relationships() -> None:
+    """Back to a plain table; per-tree partitions are folded in."""
+    op.execute("ALTER TABLE relationships RENAME TO relationships_partitioned")
+    op.execute("ALTER INDEX relationships_pkey RENAME TO relationships_partitioned_pkey")
+    op.execute("ALTER INDEX ix_relationships_id RENAME TO ix_relationships_partitioned_id")
+    op.execute(
+        "CREATE TABLE relationships ("
+        " id INTEGER NOT NULL DEFAULT nextval('relationships_id_seq'),"
+        " individual_id INTEGER REFERENCES individuals (id) ON DELETE CASCADE,"
+        " related_individual_id INTEGER REFERENCES individuals (id) ON DELETE CASCADE,"
+        " relationship_type VARCHAR(50) NOT NULL,"
+        " created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),"
+        " PRIMARY KEY (id)"
+        ")"
+    )
+    op.execute(
+        f"INSERT INTO relationships ({_RELATIONSHIP_COLUMNS}) "
+        f"SELECT {_RELATIONSHIP_COLUMNS} FROM relationships_partitioned"
+    )
+    op.execute("ALTER SEQUENCE relationships_id_seq OWNED BY relationships.id")
+    # Drops its partitions with it
+    op.execute("DROP TABLE relationships_partitioned")
+    op.create_index(op.f('ix_relationships_id'), 'relationships', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _unpartition_relationships()
+    else:
+        op.drop_index('ix_relationships_tree_related', table_name='relationships')
+        op.drop_index('ix_relationships_tree_individual', table_name='relationships')
+        with op.batch_alter_table('relationships') as batch_op:
+            batch_op.drop_constraint('fk_relationships_tree_id', type_='foreignkey')
+            batch_op.drop_column('tree_id')
+
+    op.drop_index('ix_individuals_tree', table_name='individuals')
+    with op.batch_alter_table('individuals') as batch_op:
+        batch_op.drop_constraint('fk_individuals_tree_id', type_='foreignkey')
+        batch_op.drop_column('tree_id')
+
+    op.drop_index(op.f('ix_family_trees_id'), table_name='family_trees')
+    op.drop_table('family_trees')
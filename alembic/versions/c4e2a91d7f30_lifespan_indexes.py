@@ -0,0 +1,35 @@
+"""lifespan indexes
+
+Revision ID: c4e2a91d7f30
+Revises: 8b1f4c2e9a7d
+Create Date: 20261019_1100
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e2a91d7f30'
+down_revision = '8b1f4c2e9a7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_individuals_birth_death', 'individuals', ['birth_date', 'death_date'], unique=False)
+    op.create_index('ix_individuals_last_name_birth', 'individuals', ['last_name', 'birth_date'], unique=False)
+    if op.get_bind().dialect.name == 'postgresql':
+        # Must stay identical to app.models.individual.lifespan_range
+        op.execute(
+            "CREATE INDEX ix_individuals_lifespan ON individuals USING gist "
+            "(daterange(birth_date, CASE WHEN (birth_date IS NULL OR death_date >= birth_date) "
+            "THEN death_date END, '[]'))"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_individuals_lifespan', table_name='individuals')
+    op.drop_index('ix_individuals_last_name_birth', table_name='individuals')
+    op.drop_index('ix_individuals_birth_death', table_name='individuals')
@@ -0,0 +1,24 @@
+"""family tree data version
+
+Revision ID: d5c8f2a6e914
+Revises: a9d3e5f7b2c4
+Create Date: 20261019_1500
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5c8f2a6e914'
+down_revision = 'a9d3e5f7b2c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('family_trees', sa.Column('data_version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('family_trees', 'data_version')
@@ -0,0 +1,44 @@
+"""duplicate suggestions
+
+Revision ID: f2b8c6d4a1e3
+Revises: e7a3d5b1c902
+Create Date: 20261019_1300
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8c6d4a1e3'
+down_revision = 'e7a3d5b1c902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('duplicate_suggestions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('individual_id', sa.Integer(), nullable=False),
+    sa.Column('duplicate_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('reasons', sa.JSON(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['individual_id'], ['individuals.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['duplicate_id'], ['individuals.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('individual_id', 'duplicate_id', name='uq_duplicate_suggestions_pair')
+    )
+    op.create_index(op.f('ix_duplicate_suggestions_id'), 'duplicate_suggestions', ['id'], unique=False)
+    op.create_index('ix_duplicate_suggestions_status_score', 'duplicate_suggestions', ['status', 'score'], unique=False)
+    op.create_index('ix_duplicate_suggestions_duplicate', 'duplicate_suggestions', ['duplicate_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_duplicate_suggestions_duplicate', table_name='duplicate_suggestions')
+    op.drop_index('ix_duplicate_suggestions_status_score', table_name='duplicate_suggestions')
+    op.drop_index(op.f('ix_duplicate_suggestions_id'), table_name='duplicate_suggestions')
+    op.drop_table('duplicate_suggestions')
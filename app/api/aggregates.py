@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.graph_admin import submit_job
+from app.core.security import require_admin
+from app.db.database import get_admin_db, get_db
+from app.schemas.job_schema import JobSubmitted
+from app.services.aggregate_service import AggregateService
+
+router = APIRouter(prefix="/api/admin/aggregates", tags=["Aggregates"], dependencies=[Depends(require_admin)])
+
+@router.post("/recompute", response_model=JobSubmitted, status_code=202)
+def recompute_aggregates(db: Session = Depends(get_db)):
+    """
+    Rebuild every individual's counters from scratch (after bulk imports),
+    as an "aggregate_recompute" background job.
+    """
+    return submit_job(db, "aggregate_recompute")
+
+@router.post("/refresh")
+def refresh_stale_aggregates(
+        limit: int = Query(1000, ge=1, le=100_000),
+        db: Session = Depends(get_admin_db),
+):
+    """
+    Recompute up to `limit` rows marked stale by incremental maintenance.
+    """
+    refreshed = AggregateService.refresh_stale(db, limit)
+    return {"status": "ok", "refreshed": refreshed}
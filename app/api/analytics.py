@@ -0,0 +1,94 @@
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.rate_limit import admit_tree_request, get_client_key, reject_oversized_tree, settle_tree_request
+from app.db.database import get_read_db
+from app.services.analytics_service import AnalyticsService
+from app.services.tree_cost_service import TreeCostService
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+
+class PopulationScope:
+    """
+    The whole family tree by default. With `root_id`, only that person's
+    multi-level tree (priced and charged like /api/tree/{id}/multi), and
+    generations are relative to the root (ancestors negative). Trees over
+    TREE_MAX_NODES_PER_REQUEST people are rejected with 413.
+    """
+
+    def __init__(
+        self,
+        response: Response,
+        root_id: int | None = Query(None, description="Only people in this individual's tree"),
+        direction: str = Query("both", pattern="^(ancestors|descendants|both)$"),
+        max_depth: int = Query(3, ge=1, le=10),
+        client_key: str = Depends(get_client_key),
+    ):
+        self.response = response
+        self.root_id = root_id
+        self.direction = direction
+        self.max_depth = max_depth
+        self.client_key = client_key
+
+    def resolve(self, db: Session) -> tuple[Optional[Dict[int, int]], tuple]:
+        """(tree generations or None for everyone, cache key for the scope)."""
+        if self.root_id is None:
+            return None, ("all",)
+        estimate = TreeCostService.estimate(db, self.root_id, self.direction, self.max_depth)
+        reject_oversized_tree(estimate, "analytics")
+        charged = admit_tree_request(self.client_key, estimate, "analytics", self.response)
+        cap = settings.TREE_MAX_NODES_PER_REQUEST
+        try:
+            tree = AnalyticsService.tree_generations(db, self.root_id, self.direction, self.max_depth, cap)
+        except ValueError as e:
+            # The estimate was low; the walk stopped at the cap
+            settle_tree_request(self.client_key, charged, cap, self.response)
+            raise HTTPException(status_code=413, detail=str(e))
+        settle_tree_request(self.client_key, charged, len(tree or ()), self.response)
+        if tree is None:
+            raise HTTPException(status_code=404, detail="Individual not found")
+        return tree, ("tree", self.root_id, self.direction, self.max_depth)
+
+
+def _compute(db: Session, scope: PopulationScope, metric, **params) -> dict:
+    tree, scope_key = scope.resolve(db)
+    return AnalyticsService.compute(db, metric, tree, scope_key, **params)
+
+
+@router.get("/generations")
+def generation_sizes(scope: PopulationScope = Depends(), db: Session = Depends(get_read_db)):
+    """
+    People per generation, split by gender. Tree-wide, generation 0 are
+    founders (no recorded parents) and everyone else sits one below their
+    deepest parent.
+    """
+    return _compute(db, scope, AnalyticsService.generation_sizes)
+
+
+@router.get("/children-per-couple")
+def children_per_couple(scope: PopulationScope = Depends(), db: Session = Depends(get_read_db)):
+    """
+    Average children per couple by birth decade of the older partner.
+    Spouses without children count as couples with zero children.
+    """
+    return _compute(db, scope, AnalyticsService.children_per_couple)
+
+
+@router.get("/lifespans")
+def lifespan_distribution(scope: PopulationScope = Depends(), db: Session = Depends(get_read_db)):
+    """Age-at-death histogram, percentiles and mean by birth decade."""
+    return _compute(db, scope, AnalyticsService.lifespan_distribution)
+
+
+@router.get("/surnames")
+def surname_frequency(
+    top: int = Query(10, ge=1, le=100),
+    scope: PopulationScope = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    """The most common surnames in each generation."""
+    return _compute(db, scope, AnalyticsService.surname_frequency, top=top)
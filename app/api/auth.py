@@ -4,12 +4,14 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    get_password_hash_async,
+    verify_password_and_update_async,
     create_access_token,
+    principal_claims,
     get_current_user,
 )
 from app.db.database import get_db
@@ -19,6 +21,7 @@ from app.schemas.user_schema import (
     UserLogin,
     UserRead,
     Token,
+    Principal,
 )
 
 
@@ -26,16 +29,30 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 logger = logging.getLogger("family_tree.auth")
 
 
+# Auth routes are async so bcrypt runs on the hashing executor instead of
+# holding a request thread; the (short) DB calls go through the threadpool.
+def _get_user_by_email(db: Session, email: str) -> User | None:
+    result = db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
+
+def _save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     payload: UserCreate,
     db: Session = Depends(get_db),
 ):
-    logger.info(f"User registration attempt: {payload.email}")
+    logger.info("User registration attempt: %s", payload.email)
     # Check if email is already used
-    existing = db.execute(select(User).where(User.email == payload.email))
-    if existing.scalar_one_or_none():
-        logger.warning(f"Duplicate registration attempt: {payload.email}")
+    existing = await run_in_threadpool(_get_user_by_email, db, payload.email)
+    if existing:
+        logger.warning("Duplicate registration attempt: %s", payload.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
@@ -44,47 +61,60 @@ def register_user(
     user = User(
         email=payload.email,
         name=payload.name,
-        password_hash=get_password_hash(payload.password),
+        password_hash=await get_password_hash_async(payload.password),
         role="member",
         is_approved=True,  # or False if you want an approval flow
     )
 
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    user = await run_in_threadpool(_save_user, db, user)
 
-    logger.info(f"User login success: {user.email} (ID={user.id})")
+    logger.info("User login success: %s (ID=%s)", user.email, user.id)
     return user
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     payload: UserLogin,
     db: Session = Depends(get_db),
 ):
-    logger.info(f"Login attempt for: {payload.email}")
-    stmt = select(User).where(User.email == payload.email)
-    result = db.execute(stmt)
-    user = result.scalar_one_or_none()
+    logger.info("Login attempt for: %s", payload.email)
+    user = await run_in_threadpool(_get_user_by_email, db, payload.email)
+
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_password_and_update_async(payload.password, user.password_hash)
 
-    if not user or not verify_password(payload.password, user.password_hash):
-        logger.warning(f"Failed login attempt: {payload.email}")
+    if not valid:
+        logger.warning("Failed login attempt: %s", payload.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
 
+    # Hash was made with outdated settings (e.g. BCRYPT_ROUNDS changed)
+    if new_hash:
+        user.password_hash = new_hash
+        await run_in_threadpool(_save_user, db, user)
+        logger.info("Password hash upgraded for: %s", payload.email)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data=principal_claims(user),
         expires_delta=access_token_expires,
     )
 
-    logger.info(f"Login success for: {payload.email}")
+    logger.info("Login success for: %s", payload.email)
     return Token(access_token=access_token)
 
 
 @router.get("/me", response_model=UserRead)
-def get_me(current_user: User = Depends(get_current_user)):
-    logger.info(f"Fetching profile for user: {current_user.email}")
-    return current_user
+def get_me(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    logger.info("Fetching profile for user: %s", current_user.email)
+    # The principal may come from the token/cache; the profile is always fresh
+    user = db.execute(select(User).where(User.id == current_user.id)).scalar_one_or_none()
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
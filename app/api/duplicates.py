@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.graph_admin import submit_job
+from app.core.security import require_admin
+from app.db.database import get_db
+from app.schemas.duplicate_schema import DuplicateSuggestionResponse
+from app.schemas.individual_schema import IndividualResponse
+from app.schemas.job_schema import JobSubmitted
+from app.services.duplicate_service import DuplicateService
+
+router = APIRouter(prefix="/api/admin/duplicates", tags=["Duplicates"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/detect", response_model=JobSubmitted, status_code=202)
+def detect_duplicates(
+        workers: int | None = Query(None, ge=0, le=32, description="Defaults to DUPLICATE_WORKERS"),
+        db: Session = Depends(get_db),
+):
+    """
+    Rebuild the open merge suggestions as a "duplicate_detection" background
+    job. Dismissed pairs are not suggested again.
+    """
+    return submit_job(db, "duplicate_detection", {"workers": workers} if workers is not None else None)
+
+
+@router.get("/", response_model=list[DuplicateSuggestionResponse])
+def list_duplicates(
+        status: str = Query("open", pattern="^(open|dismissed)$"),
+        min_score: float = Query(0.0, ge=0.0, le=1.0),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=500),
+        db: Session = Depends(get_db),
+):
+    """Suggestions, best score first."""
+    return DuplicateService.list(db, status, min_score, skip, limit)
+
+
+def _get_open_suggestion(db: Session, suggestion_id: int):
+    suggestion = DuplicateService.get(db, suggestion_id)
+    if suggestion is None:
+        raise HTTPException(status_code=404, detail="Suggestion not found")
+    if suggestion.status != "open":
+        raise HTTPException(status_code=409, detail=f"Suggestion is already {suggestion.status}")
+    return suggestion
+
+
+@router.post("/{suggestion_id}/merge", response_model=IndividualResponse)
+def merge_duplicate(
+        suggestion_id: int,
+        keep: str = Query(
+            "individual", pattern="^(individual|duplicate)$",
+            description="Which of the pair survives; the other is folded into it and deleted",
+        ),
+        db: Session = Depends(get_db),
+):
+    suggestion = _get_open_suggestion(db, suggestion_id)
+    keep_id, remove_id = suggestion.individual_id, suggestion.duplicate_id
+    if keep == "duplicate":
+        keep_id, remove_id = remove_id, keep_id
+    merged = DuplicateService.merge(db, keep_id, remove_id)
+    if merged is None:
+        raise HTTPException(status_code=404, detail="Individual not found")
+    return merged
+
+
+@router.post("/{suggestion_id}/dismiss", response_model=DuplicateSuggestionResponse)
+def dismiss_duplicate(suggestion_id: int, db: Session = Depends(get_db)):
+    return DuplicateService.dismiss(db, _get_open_suggestion(db, suggestion_id))
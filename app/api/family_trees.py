@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.graph_admin import submit_job
+from app.core.security import require_admin
+from app.db.database import get_admin_db
+from app.schemas.family_tree_schema import FamilyTreeCreate, FamilyTreeResponse
+from app.schemas.job_schema import JobSubmitted
+from app.services.family_tree_service import FamilyTreeService
+
+router = APIRouter(prefix="/api/admin/trees", tags=["Family Trees"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/", response_model=FamilyTreeResponse, status_code=201)
+def create_tree(payload: FamilyTreeCreate, db: Session = Depends(get_admin_db)):
+    """A new, empty family tree; clients select it with the X-Tree-Id header (TREE_HEADER)."""
+    return FamilyTreeService.create(db, payload.name)
+
+
+@router.get("/", response_model=list[FamilyTreeResponse])
+def list_trees(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=1000),
+        db: Session = Depends(get_admin_db),
+):
+    return FamilyTreeService.list(db, skip, limit)
+
+
+@router.post("/{tree_id}/partition", response_model=JobSubmitted, status_code=202)
+def create_tree_partition(tree_id: int, db: Session = Depends(get_admin_db)):
+    """
+    Move the tree's relationships into a partition of their own (Postgres),
+    as a "tree_partition" background job.
+    """
+    if FamilyTreeService.get(db, tree_id) is None:
+        raise HTTPException(status_code=404, detail="Family tree not found")
+    if db.get_bind().dialect.name != "postgresql":
+        raise HTTPException(status_code=400, detail="Per-tree partitions need PostgreSQL")
+    return submit_job(db, "tree_partition", {"tree_id": tree_id})
@@ -1,20 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from neo4j import Session as Neo4jSession
 
+from app.core.security import require_admin
 from app.db.database import get_db
-from app.graph.deps import get_neo4j_session
-from app.services.graph_sync_service import GraphSyncService
+from app.db.tenancy import tree_exists
+from app.schemas.job_schema import JobResponse, JobSubmitted
+from app.services.graph_snapshot_service import GraphSnapshotService  # registers graph_snapshot
+from app.services.graph_sync_service import GraphSyncService  # registers the graph_sync job
+from app.services.job_service import JobAlreadyRunning, JobService
+
+router = APIRouter(prefix="/api/graph-admin", tags=["Graph Admin"], dependencies=[Depends(require_admin)])
+
+
+def submit_job(db: Session, job_type: str, params: Optional[dict] = None) -> JobSubmitted:
+    """Queue a background job; 409 (with the running job's id) if one of this type is active."""
+    try:
+        job = JobService.submit(db, job_type, params)
+    except JobAlreadyRunning as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": str(e), "job_id": e.job.id if e.job else None},
+        )
+    return JobSubmitted(job_id=job.id, status=job.status, url=f"{router.prefix}/jobs/{job.id}")
 
-router = APIRouter(prefix="/api/graph-admin", tags=["Graph Admin"])
 
-@router.post("/sync")
+@router.post("/sync", response_model=JobSubmitted, status_code=202)
 def sync_graph(
-        db:Session = Depends(get_db),
-        neo4j: Neo4jSession = Depends(get_neo4j_session),
+        mode: str = Query(
+            "parallel", pattern="^(parallel|serial)$",
+            description="parallel: partitioned build under a shadow label, swapped in at the end; "
+                        "serial: wipe and rebuild row by row",
+        ),
+        workers: int | None = Query(None, ge=1, le=32, description="Defaults to GRAPH_SYNC_WORKERS"),
+        batch_size: int | None = Query(None, ge=1, le=50_000, description="Defaults to GRAPH_SYNC_BATCH_SIZE"),
+        tree_id: int | None = Query(None, ge=1, description="Rebuild only this family tree; default: all trees"),
+        db: Session = Depends(get_db),
 ):
-    try:
-        result = GraphSyncService.sync_all(db,neo4j)
-        return {"status": "ok", **result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """
+    Rebuild the Neo4j graph from the database in the background;
+    follow progress at the returned job URL.
+    """
+    if tree_id is not None and not tree_exists(db, tree_id):
+        raise HTTPException(status_code=404, detail="Family tree not found")
+    params = {"mode": mode}
+    if tree_id is not None:
+        params["tree_id"] = tree_id
+    if workers is not None:
+        params["workers"] = workers
+    if batch_size is not None:
+        params["batch_size"] = batch_size
+    return submit_job(db, "graph_sync", params)
+
+
+@router.post("/snapshot", response_model=JobSubmitted, status_code=202)
+def export_graph_snapshot(db: Session = Depends(get_db)):
+    """
+    Write a new memory-mapped CSR snapshot of the graph (served by
+    /api/snapshot-tree/*); workers switch to it once it is published.
+    """
+    return submit_job(db, "graph_snapshot")
+
+
+@router.get("/jobs", response_model=list[JobResponse])
+def list_jobs(
+        job_type: str | None = Query(None),
+        limit: int = Query(50, ge=1, le=500),
+        db: Session = Depends(get_db),
+):
+    return JobService.list(db, job_type, limit)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = JobService.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+def cancel_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Queued jobs are cancelled immediately, running ones at their next
+    progress report; finished jobs are returned unchanged.
+    """
+    job = JobService.cancel(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,40 +1,159 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from neo4j import Session as Neo4jSession
+from typing import Any, List, Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import TREE_REQUESTS_TRUNCATED
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.rate_limit import admit_tree_request, get_client_key, settle_tree_request
+from app.db.database import get_read_db
+from app.db.tenancy import session_tree_id
 from app.graph.deps import get_neo4j_session
 from app.services.graph_tree_service import GraphTreeService
+from app.services.tree_cost_service import TreeCostService
 
 router = APIRouter(prefix="/api/graph-tree", tags=["Graph Tree"])
 
+# Endpoints take the Neo4j session as `Any`: annotating it with neo4j.Session
+# would import the driver whenever the app is imported, even without NEO4J_URI
+
+
+def _decode_offsets(cursor: Optional[str], max_depth: int, *keys: str) -> List[int]:
+    """Offsets stored in a cursor issued by these endpoints (0s without one)."""
+    if cursor is None:
+        return [0] * len(keys)
+    try:
+        data = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    offsets = [data.get(key) for key in keys]
+    if data.get("m") != max_depth or not all(isinstance(o, int) and o >= 0 for o in offsets):
+        raise HTTPException(status_code=400, detail="Cursor does not match this request")
+    return offsets
+
+
+def _decode_listings(cursor: Optional[str], *keys: str) -> List[Optional[str]]:
+    """
+    Listing keys stored in a cursor (see GraphTreeService._listing); None
+    when absent, which just makes the next page list the people again.
+    """
+    if cursor is None:
+        return [None] * len(keys)
+    data = decode_cursor(cursor)
+    return [data[key] if isinstance(data.get(key), str) else None for key in keys]
+
+
+def _split_page(rows: List[Any], limit: int) -> tuple[List[Any], bool]:
+    """Rows were fetched with limit + 1; the extra one only signals 'more'."""
+    return rows[:limit], len(rows) > limit
+
+
 @router.get("/{person_id}/ancestors")
 def get_ancestors(
     person_id: int,
+    response: Response,
     max_depth: int = Query(4, ge=1, le=10),
-    neo4j: Neo4jSession = Depends(get_neo4j_session),
+    cursor: str | None = Query(None, description="next_cursor of a truncated response"),
+    client_key: str = Depends(get_client_key),
+    db: Session = Depends(get_read_db),
+    neo4j: Any = Depends(get_neo4j_session),
 ):
-    data = GraphTreeService.get_ancestors(neo4j, person_id, max_depth)
-    if not data:
+    (skip,) = _decode_offsets(cursor, max_depth, "s")
+    (listing,) = _decode_listings(cursor, "l")
+    limit = settings.TREE_MAX_NODES_PER_REQUEST
+    estimate = TreeCostService.estimate(db, person_id, "ancestors", max_depth)
+    charged = admit_tree_request(client_key, estimate, "graph_ancestors", response)
+
+    rows, listing = GraphTreeService.get_ancestors(
+        neo4j, person_id, session_tree_id(db), max_depth, skip, limit + 1, listing
+    )
+    data, truncated = _split_page(rows, limit)
+    settle_tree_request(client_key, charged, len(data), response)
+    if not data and not skip:
         raise HTTPException(status_code=404, detail="Person not found or no ancestors")
-    return {"person_id": person_id, "ancestors": data}
+
+    if truncated:
+        TREE_REQUESTS_TRUNCATED.labels("graph_ancestors").inc()
+    return {
+        "person_id": person_id,
+        "ancestors": data,
+        "truncated": truncated,
+        "next_cursor": encode_cursor({"s": skip + len(data), "m": max_depth, "l": listing}) if truncated else None,
+    }
 
 
 @router.get("/{person_id}/descendants")
 def get_descendants(
     person_id: int,
+    response: Response,
     max_depth: int = Query(4, ge=1, le=10),
-    neo4j: Neo4jSession = Depends(get_neo4j_session),
+    cursor: str | None = Query(None, description="next_cursor of a truncated response"),
+    client_key: str = Depends(get_client_key),
+    db: Session = Depends(get_read_db),
+    neo4j: Any = Depends(get_neo4j_session),
 ):
-    data = GraphTreeService.get_descendants(neo4j, person_id, max_depth)
-    return {"person_id": person_id, "descendants": data}
+    (skip,) = _decode_offsets(cursor, max_depth, "s")
+    (listing,) = _decode_listings(cursor, "l")
+    limit = settings.TREE_MAX_NODES_PER_REQUEST
+    estimate = TreeCostService.estimate(db, person_id, "descendants", max_depth)
+    charged = admit_tree_request(client_key, estimate, "graph_descendants", response)
+
+    rows, listing = GraphTreeService.get_descendants(
+        neo4j, person_id, session_tree_id(db), max_depth, skip, limit + 1, listing
+    )
+    data, truncated = _split_page(rows, limit)
+    settle_tree_request(client_key, charged, len(data), response)
+
+    if truncated:
+        TREE_REQUESTS_TRUNCATED.labels("graph_descendants").inc()
+    return {
+        "person_id": person_id,
+        "descendants": data,
+        "truncated": truncated,
+        "next_cursor": encode_cursor({"s": skip + len(data), "m": max_depth, "l": listing}) if truncated else None,
+    }
 
 
 @router.get("/{person_id}/full")
 def get_full_tree(
     person_id: int,
+    response: Response,
     max_depth: int = Query(4, ge=1, le=10),
-    neo4j: Neo4jSession = Depends(get_neo4j_session),
+    cursor: str | None = Query(None, description="next_cursor of a truncated response"),
+    client_key: str = Depends(get_client_key),
+    db: Session = Depends(get_read_db),
+    neo4j: Any = Depends(get_neo4j_session),
 ):
-    data = GraphTreeService.get_full_tree(neo4j, person_id, max_depth)
+    ancestors_skip, descendants_skip = _decode_offsets(cursor, max_depth, "a", "c")
+    listings = _decode_listings(cursor, "la", "lc")
+    limit = settings.TREE_MAX_NODES_PER_REQUEST
+    estimate = TreeCostService.estimate(db, person_id, "both", max_depth)
+    # Each side returns up to `limit`, so the charge may be twice the usual cap
+    charged = admit_tree_request(client_key, estimate, "graph_full", response)
+
+    data = GraphTreeService.get_full_tree(
+        neo4j, person_id, session_tree_id(db), max_depth, ancestors_skip, descendants_skip, limit + 1,
+        tuple(listings),
+    )
     if not data:
+        settle_tree_request(client_key, charged, 0, response)
         raise HTTPException(status_code=404, detail="Person not found")
-    return data
\ No newline at end of file
+
+    ancestors_listing, descendants_listing = data.pop("listings")
+    data["ancestors"], more_ancestors = _split_page(data["ancestors"], limit)
+    data["descendants"], more_descendants = _split_page(data["descendants"], limit)
+    settle_tree_request(client_key, charged, len(data["ancestors"]) + len(data["descendants"]), response)
+
+    truncated = more_ancestors or more_descendants
+    if truncated:
+        TREE_REQUESTS_TRUNCATED.labels("graph_full").inc()
+    data["truncated"] = truncated
+    data["next_cursor"] = encode_cursor({
+        "a": ancestors_skip + len(data["ancestors"]),
+        "c": descendants_skip + len(data["descendants"]),
+        "m": max_depth,
+        "la": ancestors_listing,
+        "lc": descendants_listing,
+    }) if truncated else None
+    return data
@@ -1,17 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from app.db.database import get_db
-from app.schemas.individual_schema import IndividualCreate, IndividualUpdate, IndividualResponse
+from app.core.config import settings
+from app.db.database import get_db, get_read_db
+from app.schemas.individual_schema import (
+    IndividualBatch, IndividualBatchRequest, IndividualCreate, IndividualUpdate, IndividualResponse,
+)
 from app.services.individual_service import IndividualService
 
 router = APIRouter(prefix="/api/individuals", tags=["Individuals"])
 
 @router.get("/", response_model=list[IndividualResponse])
-def list_individuals(skip:int = 0, limit:int = 100,db:Session = Depends(get_db)):
+def list_individuals(skip:int = 0, limit:int = 100,db:Session = Depends(get_read_db)):
     return IndividualService.list(db,skip, limit)
 
+def _batch(db: Session, ids: list[int], fields: list[str] | None) -> IndividualBatch:
+    try:
+        return IndividualService.get_many(db, ids, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _split_ints(value: str) -> list[int]:
+    try:
+        return [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+
+@router.post("/batch", response_model=IndividualBatch)
+def get_individuals_batch(payload: IndividualBatchRequest, db: Session = Depends(get_read_db)):
+    """
+    Up to INDIVIDUAL_BATCH_MAX_IDS individuals in one request, in the order
+    asked for; ids that do not exist are listed in `missing`.
+    """
+    return _batch(db, payload.ids, payload.fields)
+
+@router.get("/batch", response_model=IndividualBatch)
+def get_individuals_batch_by_query(
+    ids: str = Query(..., description="Comma-separated ids, e.g. 1,2,3"),
+    fields: str | None = Query(None, description="Comma-separated fields to return, e.g. first_name,birth_date"),
+    db: Session = Depends(get_read_db),
+):
+    """Small sets only (INDIVIDUAL_BATCH_GET_MAX_IDS); use POST for more."""
+    id_list = _split_ints(ids)
+    if len(id_list) > settings.INDIVIDUAL_BATCH_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.INDIVIDUAL_BATCH_GET_MAX_IDS} ids via GET; use POST /batch",
+        )
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields is not None else None
+    return _batch(db, id_list, field_list)
+
 @router.get("/{individual_id}", response_model=IndividualResponse)
-def get_individual(individual_id: int, db: Session=Depends(get_db)):
+def get_individual(individual_id: int, db: Session=Depends(get_read_db)):
     individual = IndividualService.get(db,individual_id)
     if not individual:
         raise HTTPException(status_code=404, detail="Individual not found")
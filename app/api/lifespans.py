@@ -0,0 +1,131 @@
+from datetime import date
+from typing import Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.rate_limit import admit_tree_request, get_client_key, reject_oversized_tree, settle_tree_request
+from app.db.database import get_read_db
+from app.schemas.individual_schema import IndividualPage, IndividualResponse
+from app.services.lifespan_service import LifespanService
+from app.services.tree_cost_service import TreeCostService
+
+router = APIRouter(prefix="/api/lifespans", tags=["Lifespans"])
+
+
+class TemporalScope:
+    """
+    Paging/streaming and optional tree restriction shared by every query:
+    `tree_of` limits matches to that person's multi-level tree (priced and
+    charged like /api/tree/{id}/multi). Trees over TREE_MAX_NODES_PER_REQUEST
+    people are rejected with 413 instead of truncated.
+    """
+
+    def __init__(
+        self,
+        response: Response,
+        tree_of: int | None = Query(None, description="Only people in this individual's tree"),
+        direction: str = Query("both", pattern="^(ancestors|descendants|both)$"),
+        max_depth: int = Query(3, ge=1, le=10),
+        cursor: str | None = Query(None, description="next_cursor of the previous page"),
+        limit: int = Query(100, ge=1, le=1000),
+        format: str = Query(
+            "json", pattern="^(json|ndjson)$",
+            description="json: one page; ndjson: every match from `cursor` on, streamed",
+        ),
+        client_key: str = Depends(get_client_key),
+    ):
+        self.response = response
+        self.tree_of = tree_of
+        self.direction = direction
+        self.max_depth = max_depth
+        self.cursor = cursor
+        self.limit = limit
+        self.format = format
+        self.client_key = client_key
+
+
+def _respond(db: Session, condition, scope: TemporalScope):
+    try:
+        after_id = LifespanService.decode_page_cursor(scope.cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    within_ids = None
+    if scope.tree_of is not None:
+        estimate = TreeCostService.estimate(db, scope.tree_of, scope.direction, scope.max_depth)
+        reject_oversized_tree(estimate, "lifespans")
+        charged = admit_tree_request(scope.client_key, estimate, "lifespans", scope.response)
+        cap = settings.TREE_MAX_NODES_PER_REQUEST
+        try:
+            within_ids = LifespanService.tree_ids(db, scope.tree_of, scope.direction, scope.max_depth, cap)
+        except ValueError as e:
+            # The estimate was low; the walk stopped at the cap
+            settle_tree_request(scope.client_key, charged, cap, scope.response)
+            raise HTTPException(status_code=413, detail=str(e))
+        settle_tree_request(scope.client_key, charged, len(within_ids or ()), scope.response)
+        if within_ids is None:
+            raise HTTPException(status_code=404, detail="Individual not found")
+
+    if scope.format == "ndjson":
+        matches = LifespanService.iter_matches(db, condition, scope.limit, after_id, within_ids)
+        return StreamingResponse(
+            _ndjson_lines(matches),
+            media_type="application/x-ndjson",
+            # Returned responses bypass the injected one; keep the budget headers
+            headers={k: v for k, v in scope.response.headers.items() if k.startswith("x-tree-")},
+        )
+    return LifespanService.page(db, condition, scope.limit, after_id, within_ids)
+
+
+def _ndjson_lines(matches: Iterator[IndividualResponse]) -> Iterator[str]:
+    for individual in matches:
+        yield individual.model_dump_json() + "\n"
+
+
+@router.get("/alive-at", response_model=IndividualPage)
+def alive_at(
+    on: date = Query(..., description="People alive on this date"),
+    scope: TemporalScope = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Unknown death dates count as still alive, so people with only a birth
+    date show up for every later date.
+    """
+    return _respond(db, LifespanService.alive_at(db, on), scope)
+
+
+@router.get("/born-between", response_model=IndividualPage)
+def born_between(
+    start: date = Query(...),
+    end: date = Query(...),
+    surname: str | None = Query(None, description="Exact last name"),
+    scope: TemporalScope = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    try:
+        condition = LifespanService.born_between(start, end, surname)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _respond(db, condition, scope)
+
+
+@router.get("/overlapping/{individual_id}", response_model=IndividualPage)
+def overlapping(
+    individual_id: int,
+    scope: TemporalScope = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    """
+    People whose lifespan shares at least one day with this individual's.
+    """
+    try:
+        condition = LifespanService.overlapping(db, individual_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if condition is None:
+        raise HTTPException(status_code=404, detail="Individual not found")
+    return _respond(db, condition, scope)
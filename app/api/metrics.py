@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_latest
+
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus exposition endpoint.
+    """
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
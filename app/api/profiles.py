@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from app.core.profiling import get_profile_path
+from app.core.security import require_admin
+
+router = APIRouter(prefix="/api/admin/profiles", tags=["Profiling"])
+
+@router.get("/{file_name}", dependencies=[Depends(require_admin)])
+def download_profile(file_name: str):
+    """
+    Download a stored request profile (speedscope JSON, open at speedscope.app).
+    """
+    path = get_profile_path(file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=file_name)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
 from app.services.relationship_service import RelationshipService
 from app.schemas.relationship_schema import RelationshipCreate, RelationshipResponse
 
@@ -20,5 +20,5 @@ def add_relationship(payload: RelationshipCreate, db: Session = Depends(get_db))
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{individual_id}", response_model=list[RelationshipResponse])
-def get_relationships(individual_id: int, db: Session = Depends(get_db)):
+def get_relationships(individual_id: int, db: Session = Depends(get_read_db)):
     return RelationshipService.get_relationships(db, individual_id)
\ No newline at end of file
@@ -0,0 +1,53 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from app.core.config import settings
+from app.db.tenancy import get_tree_id
+from app.services.graph_snapshot_service import GraphSnapshotService
+
+router = APIRouter(prefix="/api/snapshot-tree", tags=["Snapshot Tree"])
+
+
+def _result(person_id: int, key: str, data: Optional[dict], response: Response) -> dict:
+    """
+    Shape a traversal from the shared CSR snapshot. Answers come from the
+    last exported snapshot (named in X-Graph-Snapshot), not the live tables.
+    """
+    if data is None:
+        if not GraphSnapshotService.is_available():
+            raise HTTPException(
+                status_code=503,
+                detail="No graph snapshot available; export one with POST /api/graph-admin/snapshot",
+            )
+        raise HTTPException(status_code=404, detail="Person not found in the graph snapshot")
+
+    response.headers["X-Graph-Snapshot"] = data["snapshot"]
+    people = data["people"]
+    limit = settings.TREE_MAX_NODES_PER_REQUEST
+    return {"person_id": person_id, key: people[:limit], "truncated": len(people) > limit}
+
+
+@router.get("/{person_id}/ancestors")
+def get_ancestors(
+        person_id: int,
+        response: Response,
+        max_depth: int = Query(4, ge=1, le=10),
+        tree_id: int = Depends(get_tree_id),
+):
+    return _result(person_id, "ancestors", GraphSnapshotService.ancestors(person_id, tree_id, max_depth), response)
+
+
+@router.get("/{person_id}/descendants")
+def get_descendants(
+        person_id: int,
+        response: Response,
+        max_depth: int = Query(4, ge=1, le=10),
+        tree_id: int = Depends(get_tree_id),
+):
+    return _result(person_id, "descendants", GraphSnapshotService.descendants(person_id, tree_id, max_depth), response)
+
+
+@router.get("/{person_id}/siblings")
+def get_siblings(person_id: int, response: Response, tree_id: int = Depends(get_tree_id)):
+    return _result(person_id, "siblings", GraphSnapshotService.siblings(person_id, tree_id), response)
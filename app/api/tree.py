@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import math
+from typing import Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
-from app.schemas.tree_schema import ImmediateFamily, MultiLevelTree
+from app.core.config import settings
+from app.core.metrics import TREE_NODES_RETURNED, TREE_REQUESTS_TRUNCATED
+from app.core.rate_limit import admit_tree_request, get_client_key, settle_tree_request
+from app.db.database import get_read_db
+from app.schemas.tree_schema import ImmediateFamily, MultiLevelTree, GenerationBand
 from app.services.tree_service import TreeService
+from app.services.tree_cost_service import TreeCostService
 from app.services.tree_visual_service import TreeVisualService
-from app.schemas.tree_schema import TreeVisualization
+from app.services.tree_viewport_service import TreeViewportService
+from app.schemas.tree_schema import TreeVisualization, TreeViewport
 
 router = APIRouter(prefix="/api/tree", tags=["Tree Visualisation"])
 
 @router.get("/{individual_id}/immediate", response_model=ImmediateFamily)
-def get_immediate_tree(individual_id: int, db: Session = Depends(get_db)):
+def get_immediate_tree(individual_id: int, db: Session = Depends(get_read_db)):
     """
     Smart, human-friendly immediate family view for the given individual.
     """
@@ -22,28 +31,226 @@ def get_immediate_tree(individual_id: int, db: Session = Depends(get_db)):
 @router.get("/{individual_id}/multi", response_model=MultiLevelTree)
 def get_multi_level_tree(
     individual_id: int,
+    response: Response,
     direction: str = Query(
         "both", pattern="^(ancestors|descendants|both)$",
         description="Tree direction: ancestors, descendants, or both",
     ),
     max_depth: int = Query(3, ge=1, le=10),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None, description="next_cursor of a truncated response"),
+    client_key: str = Depends(get_client_key),
+    db: Session = Depends(get_read_db),
 ):
+    """
+    The traversal is priced before it runs (see TreeCostService) and charged
+    to the client's budget; responses over TREE_MAX_NODES_PER_REQUEST
+    individuals are truncated and continue via `cursor`.
+    """
+    start = (0, 0, None)
+    if cursor is not None:
+        try:
+            start = TreeService.decode_tree_cursor(cursor, direction, max_depth)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    estimate = TreeCostService.estimate(db, individual_id, direction, max_depth)
+    charged = admit_tree_request(client_key, estimate, "multi", response)
+
     tree = TreeService.build_multi_level_tree(
         db=db,
         individual_id=individual_id,
         direction=direction,
         max_depth=max_depth,
+        node_budget=settings.TREE_MAX_NODES_PER_REQUEST,
+        start=start,
     )
+    returned = sum(len(band.individuals) for band in tree.generations) if tree else 0
+    settle_tree_request(client_key, charged, returned, response)
     if not tree:
         raise HTTPException(status_code=404, detail="Individual not found")
+
+    TREE_NODES_RETURNED.labels("multi").observe(returned)
+    if tree.truncated:
+        TREE_REQUESTS_TRUNCATED.labels("multi").inc()
     return tree
 
+@router.get("/{individual_id}/multi/stream")
+def stream_multi_level_tree(
+    individual_id: int,
+    response: Response,
+    direction: str = Query(
+        "both", pattern="^(ancestors|descendants|both)$",
+        description="Tree direction: ancestors, descendants, or both",
+    ),
+    max_depth: int = Query(3, ge=1, le=10),
+    format: str = Query(
+        "ndjson", pattern="^(ndjson|sse)$",
+        description="ndjson: one GenerationBand per line; sse: Server-Sent Events",
+    ),
+    client_key: str = Depends(get_client_key),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Same data as /multi, but each GenerationBand is sent as soon as its BFS
+    step completes (root first, then ancestors, then descendants).
+    The traversal is driven by the response, so a disconnecting client stops
+    the remaining queries. Priced like /multi; after
+    TREE_MAX_NODES_PER_REQUEST individuals the stream ends with a
+    `{"truncated": true}` line (SSE: a `truncated` event), and the rest is
+    available from /multi with a cursor.
+    """
+    estimate = TreeCostService.estimate(db, individual_id, direction, max_depth)
+    charged = admit_tree_request(client_key, estimate, "multi_stream", response)
+
+    bands = TreeService.stream_multi_level_tree(
+        db=db,
+        individual_id=individual_id,
+        direction=direction,
+        max_depth=max_depth,
+    )
+    if bands is None:
+        settle_tree_request(client_key, charged, 0, response)
+        raise HTTPException(status_code=404, detail="Individual not found")
+
+    # The stream settles the charge itself, once it knows what it sent
+    bands = _capped(bands, client_key, charged)
+    if format == "sse":
+        return StreamingResponse(
+            _sse_events(bands),
+            media_type="text/event-stream",
+            headers={**response.headers, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return StreamingResponse(_ndjson_lines(bands), media_type="application/x-ndjson", headers=response.headers)
+
+
+def _capped(bands: Iterator[GenerationBand], client_key: str, charged: int) -> Iterator[GenerationBand | None]:
+    """
+    Bands up to TREE_MAX_NODES_PER_REQUEST individuals, then None if the
+    tree was cut. Settles the charge with the real count, also when the
+    client goes away mid-stream.
+    """
+    total = 0
+    try:
+        for band in bands:
+            room = settings.TREE_MAX_NODES_PER_REQUEST - total
+            if len(band.individuals) > room:
+                if room > 0:
+                    total += room
+                    yield band.model_copy(update={"individuals": band.individuals[:room]})
+                TREE_REQUESTS_TRUNCATED.labels("multi_stream").inc()
+                yield None
+                return
+            total += len(band.individuals)
+            yield band
+    finally:
+        TREE_NODES_RETURNED.labels("multi_stream").observe(total)
+        settle_tree_request(client_key, charged, total, None)
+
+
+def _ndjson_lines(bands: Iterator[GenerationBand | None]) -> Iterator[str]:
+    for band in bands:
+        yield '{"truncated":true}\n' if band is None else band.model_dump_json() + "\n"
+
+
+def _sse_events(bands: Iterator[GenerationBand | None]) -> Iterator[str]:
+    for band in bands:
+        if band is None:
+            yield "event: truncated\ndata: {}\n\n"
+        else:
+            yield f"event: generation\ndata: {band.model_dump_json()}\n\n"
+    yield "event: end\ndata: {}\n\n"
+
 @router.get("/{individual_id}/visual", response_model=TreeVisualization)
-def get_visual_tree(individual_id: int, db: Session = Depends(get_db)):
-    result = TreeVisualService.build_tree_visual(db, individual_id)
+def get_visual_tree(
+    individual_id: int,
+    response: Response,
+    direction: str = Query(
+        "both", pattern="^(ancestors|descendants|both)$",
+        description="Tree direction (only used together with max_depth)",
+    ),
+    max_depth: int | None = Query(
+        None, ge=1, le=10,
+        description="Lay out a multi-level tree; omit for the immediate family view",
+    ),
+    client_key: str = Depends(get_client_key),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Priced like /multi (the immediate family view as one generation each
+    way). Multi-level layouts stop at TREE_MAX_NODES_PER_REQUEST individuals
+    and are then marked truncated.
+    """
+    estimate = TreeCostService.estimate(db, individual_id, direction if max_depth else "both", max_depth or 1)
+    charged = admit_tree_request(client_key, estimate, "visual", response)
+
+    if max_depth is None:
+        result = TreeVisualService.build_tree_visual(db, individual_id)
+    else:
+        result = TreeVisualService.build_multi_level_visual(
+            db=db,
+            individual_id=individual_id,
+            direction=direction,
+            max_depth=max_depth,
+            node_budget=settings.TREE_MAX_NODES_PER_REQUEST,
+        )
+
+    returned = len(result.nodes) if result else 0
+    settle_tree_request(client_key, charged, returned, response)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Individual not found")
 
+    TREE_NODES_RETURNED.labels("visual").observe(returned)
+    if result.truncated:
+        TREE_REQUESTS_TRUNCATED.labels("visual").inc()
+    return result
+
+@router.get("/{individual_id}/viewport", response_model=TreeViewport)
+def get_tree_viewport(
+    individual_id: int,
+    response: Response,
+    min_x: float = Query(..., description="Left edge of the viewport in layout coordinates"),
+    min_y: float = Query(..., description="Top edge of the viewport in layout coordinates"),
+    max_x: float = Query(..., description="Right edge of the viewport in layout coordinates"),
+    max_y: float = Query(..., description="Bottom edge of the viewport in layout coordinates"),
+    zoom: float = Query(1.0, gt=0, le=10, description="Zoom level; lower values collapse distant generations"),
+    direction: str = Query(
+        "both", pattern="^(ancestors|descendants|both)$",
+        description="Tree direction: ancestors, descendants, or both",
+    ),
+    max_depth: int = Query(3, ge=1, le=10),
+    client_key: str = Depends(get_client_key),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Nodes and edges of the laid-out tree (see /visual?max_depth=) that fall
+    inside the given bounding box. Priced like /multi, settled with the
+    nodes and clusters returned; the layout is capped (and marked truncated)
+    like /visual.
+    """
+    if not all(math.isfinite(v) for v in (min_x, min_y, max_x, max_y)) or min_x > max_x or min_y > max_y:
+        raise HTTPException(status_code=400, detail="Invalid viewport bounds")
+
+    estimate = TreeCostService.estimate(db, individual_id, direction, max_depth)
+    charged = admit_tree_request(client_key, estimate, "viewport", response)
+
+    result = TreeViewportService.get_viewport(
+        db=db,
+        individual_id=individual_id,
+        min_x=min_x,
+        min_y=min_y,
+        max_x=max_x,
+        max_y=max_y,
+        zoom=zoom,
+        direction=direction,
+        max_depth=max_depth,
+        node_budget=settings.TREE_MAX_NODES_PER_REQUEST,
+    )
+    returned = len(result.nodes) + len(result.clusters) if result else 0
+    settle_tree_request(client_key, charged, returned, response)
     if result is None:
         raise HTTPException(status_code=404, detail="Individual not found")
 
-    return result
\ No newline at end of file
+    TREE_NODES_RETURNED.labels("viewport").observe(returned)
+    if result.truncated:
+        TREE_REQUESTS_TRUNCATED.labels("viewport").inc()
+    return result
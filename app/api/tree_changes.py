@@ -0,0 +1,87 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.db.tenancy import get_tree_id
+from app.services.tree_change_service import ChangeStreamsUnavailable, TreeChangeService
+
+router = APIRouter(prefix="/api/tree", tags=["Tree Changes"])
+
+# EventSource and browser WebSockets cannot send custom headers, so these
+# routes also take the tree as a query parameter
+_TREE_QUERY = Query(None, ge=1, description=f"Family tree (instead of the {settings.TREE_HEADER} header)")
+
+
+def _stream_tree_id(connection: HTTPConnection, tree_id: Optional[int]) -> int:
+    return tree_id if tree_id is not None else get_tree_id(connection)
+
+
+def _ready(subscription) -> dict:
+    return {"type": "ready", "tree_id": subscription.tree_id, "individual_id": subscription.individual_id}
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+@router.get("/{individual_id}/changes")
+async def stream_changes(individual_id: int, request: Request, tree_id: Optional[int] = _TREE_QUERY):
+    """
+    Server-sent events for the individual's immediate-family view
+    (replaces polling /immediate). Fetch the view after the `ready` event;
+    then refetch the people named by each event, and everything after a
+    `resync` or `tree.changed`. The stream ends after a resync when the
+    client fell behind, and when the individual is deleted.
+    """
+    tree_id = _stream_tree_id(request, tree_id)
+    try:
+        subscription = await TreeChangeService.open(tree_id, individual_id)
+    except ChangeStreamsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Individual not found")
+
+    async def body():
+        yield _sse(_ready(subscription))
+        async for event in TreeChangeService.events(subscription):
+            yield ": keep-alive\n\n" if event is None else _sse(event)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also runs when the client disconnects mid-stream
+        background=BackgroundTask(TreeChangeService.close, subscription),
+    )
+
+
+@router.websocket("/{individual_id}/changes/ws")
+async def stream_changes_ws(websocket: WebSocket, individual_id: int, tree_id: Optional[int] = _TREE_QUERY):
+    """The same events as JSON messages over a WebSocket (heartbeats included)."""
+    try:
+        subscription = await TreeChangeService.open(_stream_tree_id(websocket, tree_id), individual_id)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+    except ChangeStreamsUnavailable as e:
+        await websocket.close(code=1013, reason=str(e))
+        return
+    if subscription is None:
+        await websocket.close(code=1008, reason="Individual not found")
+        return
+
+    try:
+        await websocket.accept()
+        await websocket.send_json(_ready(subscription))
+        async for event in TreeChangeService.events(subscription):
+            await websocket.send_json(event if event is not None else {"type": "heartbeat"})
+        await websocket.close()
+    except (WebSocketDisconnect, OSError):
+        pass
+    finally:
+        TreeChangeService.close(subscription)
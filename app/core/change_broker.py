@@ -0,0 +1,166 @@
+"""
+In-process publish/subscribe for live tree views.
+
+Subscribers watch one person's neighbourhood (the people shown in their
+immediate-family view) within a tree. Events are small dicts produced by
+app.db.change_events:
+
+    {"type": "individual.updated", "tree_id": 1, "individual_id": 7, "fields": ["last_name"]}
+    {"type": "individual.deleted", "tree_id": 1, "individual_id": 7}
+    {"type": "relationship.added" | "relationship.removed", "tree_id": 1,
+     "relationship_id": 3, "individual_id": 7, "related_individual_id": 9,
+     "relationship_type": "parent"}
+    {"type": "tree.changed", "tree_id": 1}   (too many changes to list)
+    {"type": "resync"}                       (events may have been missed)
+
+An event reaches a subscription when it names a watched person of the same
+tree; tree.changed reaches the whole tree and resync everyone. Clients
+refetch what changed instead of polling. Subscriptions live on the event
+loop; publish() may be called from any thread.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CHANGE_STREAM_SUBSCRIBERS, CHANGE_STREAMS_DROPPED
+
+logger = logging.getLogger("family_tree.changes")
+
+RESYNC = {"type": "resync"}
+# Events after which the watched neighbourhood may have a different shape
+STRUCTURAL_EVENTS = {"individual.deleted", "relationship.added", "relationship.removed", "tree.changed"}
+
+
+def event_people(event: dict) -> Tuple[int, ...]:
+    """Ids of the people an event is about."""
+    return tuple(
+        event[key] for key in ("individual_id", "related_individual_id") if event.get(key) is not None
+    )
+
+
+class Subscription:
+    """
+    One client's stream: a bounded queue of matching events. `closed` is
+    set when the broker gave up on it (the queue then ends with a resync).
+    """
+
+    def __init__(self, tree_id: int, individual_id: int):
+        self.tree_id = tree_id
+        self.individual_id = individual_id
+        self.watched: Set[int] = set()
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=settings.CHANGE_STREAM_QUEUE_SIZE)
+        self.closed = False
+
+
+class ChangeBroker:
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._by_person: Dict[Tuple[int, int], Set[Subscription]] = defaultdict(set)
+        self._by_tree: Dict[int, Set[Subscription]] = defaultdict(set)
+
+    # ----------------------- lifecycle (event loop) -------------------------- #
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def stop(self) -> None:
+        """Ends every stream with a resync; later publish() calls are ignored."""
+        for subscriptions in list(self._by_tree.values()):
+            for subscription in list(subscriptions):
+                self._close(subscription)
+        self._loop = None
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._by_tree.values())
+
+    # ----------------------- subscriptions (event loop) ---------------------- #
+
+    def subscribe(self, tree_id: int, individual_id: int, watched: Iterable[int]) -> Subscription:
+        subscription = Subscription(tree_id, individual_id)
+        self._by_tree[tree_id].add(subscription)
+        self.watch(subscription, watched)
+        CHANGE_STREAM_SUBSCRIBERS.inc()
+        return subscription
+
+    def watch(self, subscription: Subscription, watched: Iterable[int]) -> None:
+        """Replace the set of people the subscription follows."""
+        if subscription.closed:
+            return
+        watched = set(watched) | {subscription.individual_id}
+        for person_id in subscription.watched - watched:
+            self._discard(self._by_person, (subscription.tree_id, person_id), subscription)
+        for person_id in watched - subscription.watched:
+            self._by_person[(subscription.tree_id, person_id)].add(subscription)
+        subscription.watched = watched
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription not in self._by_tree.get(subscription.tree_id, ()):
+            return
+        for person_id in subscription.watched:
+            self._discard(self._by_person, (subscription.tree_id, person_id), subscription)
+        self._discard(self._by_tree, subscription.tree_id, subscription)
+        subscription.watched = set()
+        CHANGE_STREAM_SUBSCRIBERS.dec()
+
+    @staticmethod
+    def _discard(index: dict, key, subscription: Subscription) -> None:
+        subscriptions = index.get(key)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del index[key]
+
+    # ----------------------- publishing -------------------------------------- #
+
+    def publish(self, events: List[dict]) -> None:
+        """Thread-safe; a no-op when the broker is not running (scripts, jobs)."""
+        loop = self._loop
+        if loop is None or not events:
+            return
+        try:
+            loop.call_soon_threadsafe(self._dispatch, events)
+        except RuntimeError:
+            # Loop already closed during shutdown
+            pass
+
+    def _dispatch(self, events: List[dict]) -> None:
+        for event in events:
+            if event.get("type") == "resync":
+                targets = {s for subscriptions in self._by_tree.values() for s in subscriptions}
+            elif event.get("type") == "tree.changed":
+                targets = set(self._by_tree.get(event.get("tree_id"), ()))
+            else:
+                targets = set()
+                for person_id in event_people(event):
+                    targets |= self._by_person.get((event.get("tree_id"), person_id), set())
+            for subscription in targets:
+                self._offer(subscription, event)
+
+    def _offer(self, subscription: Subscription, event: dict) -> None:
+        if subscription.closed:
+            return
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            CHANGE_STREAMS_DROPPED.inc()
+            logger.info("Change stream for individual %s fell behind, asking it to resync",
+                        subscription.individual_id)
+            self._close(subscription)
+
+    def _close(self, subscription: Subscription) -> None:
+        # Whatever is queued is superseded by the resync
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(RESYNC)
+        subscription.closed = True
+        self.unsubscribe(subscription)
+
+
+change_broker = ChangeBroker()
@@ -12,10 +12,125 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     ALGORITHM: str = "HS256"
 
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread | process
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 4
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 5.0
+
+    # Authenticated principal resolution
+    AUTH_PRINCIPAL_CACHE_TTL: float = 30.0
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10_000
+    # Trust role/approval claims signed into the token (no DB lookup at all).
+    # Role/approval changes then only apply once the user logs in again.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
     # Neo4j Settings
     NEO4J_URI: str | None = None
     NEO4J_USER: str | None = None
     NEO4J_PASSWORD: str | None = None
+    # Parallel full sync: worker threads (each with its own DB cursor and
+    # Neo4j session) and rows per UNWIND batch
+    GRAPH_SYNC_WORKERS: int = 4
+    GRAPH_SYNC_BATCH_SIZE: int = 1000
+
+    # Memory-mapped CSR snapshot of the graph, shared by all workers
+    GRAPH_SNAPSHOT_DIR: str = "data/graph_snapshot"
+    GRAPH_SNAPSHOT_KEEP: int = 2  # versions kept on disk (older ones may still be mapped)
+    GRAPH_SNAPSHOT_CHECK_SECONDS: float = 5.0  # how often workers look for a newer version
+
+    # Tree traversal admission control (costs are in nodes returned)
+    TREE_MAX_NODES_PER_REQUEST: int = 2000  # larger results are truncated with a cursor
+    TREE_COST_BUCKET_CAPACITY: float = 10_000
+    TREE_COST_REFILL_PER_SECOND: float = 1_000
+    TREE_COST_PROBE_TTL: float = 300.0
+    TREE_CURSOR_TTL: float = 600.0  # how long a worker keeps the traversal state behind a next_cursor
+
+    # Background jobs (graph sync, recomputations, bulk imports/exports)
+    JOB_WORKERS: int = 2
+    JOB_PROGRESS_INTERVAL_SECONDS: float = 1.0  # min gap between progress writes
+    JOB_STALE_AFTER_SECONDS: float = 600.0  # no progress for this long = worker died
+
+    # Per-individual aggregate counters: stale rows refreshed right after a write
+    AGGREGATE_INLINE_REFRESH_LIMIT: int = 20
+
+    # Batch fetch of individuals by id (GET takes them in the URL, so fewer)
+    INDIVIDUAL_BATCH_MAX_IDS: int = 5000
+    INDIVIDUAL_BATCH_GET_MAX_IDS: int = 200
+
+    # Duplicate detection: scoring processes (0 = score in the job thread),
+    # blocks larger than this are skipped as too unspecific, and pairs
+    # scoring below DUPLICATE_MIN_SCORE are not suggested
+    DUPLICATE_WORKERS: int = 4
+    DUPLICATE_MAX_BLOCK_SIZE: int = 200
+    DUPLICATE_CHUNK_COMPARISONS: int = 200_000
+    DUPLICATE_MIN_SCORE: float = 0.75
+
+    # Family tree (tenant) of a request; requests without the header use the
+    # default tree. Known tree ids are cached for TREE_LOOKUP_TTL seconds.
+    TREE_HEADER: str = "X-Tree-Id"
+    TREE_LOOKUP_TTL: float = 300.0
+
+    # Live change notifications for tree views. On Postgres, events are
+    # fanned out between workers with LISTEN/NOTIFY on this channel; a
+    # flush with more events than the limit sends one "tree.changed"
+    # instead. Subscribers that fall CHANGE_STREAM_QUEUE_SIZE events
+    # behind are told to resync and disconnected.
+    CHANGE_EVENTS_ENABLED: bool = True
+    CHANGE_EVENTS_CHANNEL: str = "family_tree_changes"
+    CHANGE_EVENTS_MAX_PER_FLUSH: int = 500
+    CHANGE_STREAM_MAX_SUBSCRIBERS: int = 1000  # per worker
+    CHANGE_STREAM_QUEUE_SIZE: int = 100
+    CHANGE_STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # Open connections, build the bcrypt context, map the graph snapshot and
+    # connect to Neo4j at startup instead of on the first request
+    STARTUP_WARMUP: bool = False
+
+    # Connection pool (ignored for in-memory SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 5.0  # seconds to wait for a connection before 503
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_RETRY_AFTER_SECONDS: int = 2
+
+    # Read replica for tree views and listings (unset = everything on the primary)
+    DATABASE_REPLICA_URL: str | None = None
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 2.0
+    # After a successful write the client reads from the primary for this long
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # Postgres statement_timeout per kind of route (ms, 0 = no limit)
+    DB_STATEMENT_TIMEOUT_MS: int = 10_000
+    DB_READ_STATEMENT_TIMEOUT_MS: int = 3_000
+    DB_ADMIN_STATEMENT_TIMEOUT_MS: int = 900_000
+
+    # Database diagnostics
+    DB_ECHO: bool = False
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_EXPLAIN_SLOW_QUERIES: bool = False
+    DB_N_PLUS_ONE_THRESHOLD: int = 20
+
+    # Metrics: set to a shared, writable directory when running several
+    # workers so /metrics aggregates all of them
+    PROMETHEUS_MULTIPROC_DIR: str | None = None
+
+    # Opt-in request profiling (admins only, X-Profile: 1 or ?_profile=1)
+    PROFILE_DIR: str = "logs/profiles"
+    PROFILE_RETENTION: int = 50
+    PROFILE_SAMPLE_INTERVAL_MS: float = 2.0
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: str | None = "logs/app.log"
+    LOG_JSON: bool = True
+    # Path prefix -> fraction of requests logged, e.g. {"/api/tree": 0.1}.
+    # Errors and slow requests are always logged.
+    LOG_SAMPLE_RATES: dict[str, float] = {}
+    LOG_SLOW_REQUEST_SECONDS: float = 1.0
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -1,10 +1,114 @@
+import json
 import logging
-import logging.config
 import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 
-def setup_logging():
-    log_config_path = os.path.join(os.path.dirname(__file__),"../../logging.ini")
-    if os.path.exists(log_config_path):
-        logging.config.fileConfig(log_config_path, disable_existing_loggers=False)
+from app.core.config import settings
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line. Fields passed with `extra={...}` are emitted as
+    top-level keys, so request logs can be filtered without regex parsing.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that hands the record over untouched.
+    The stock prepare() formats the message in the calling thread; here all
+    formatting happens in the listener thread instead. Records never leave
+    the process, so they do not need to be made picklable.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def should_log_request(path: str) -> bool:
+    """
+    Per-route sampling for request logs (LOG_SAMPLE_RATES, longest prefix wins).
+    Routes without a configured rate are always logged.
+    """
+    rate = None
+    matched = -1
+    for prefix, prefix_rate in settings.LOG_SAMPLE_RATES.items():
+        if path.startswith(prefix) and len(prefix) > matched:
+            rate, matched = prefix_rate, len(prefix)
+    if rate is None or rate >= 1.0:
+        return True
+    return random.random() < rate
+
+
+def setup_logging() -> None:
+    """
+    Route the `family_tree` loggers through an in-memory queue; a background
+    listener thread does the formatting and file/console I/O.
+    Called from the app lifespan, not at import time.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter: logging.Formatter
+    if settings.LOG_JSON:
+        formatter = JsonFormatter()
     else:
-        logging.basicConfig(level=logging.INFO)
\ No newline at end of file
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+    handlers: list[logging.Handler] = []
+
+    if settings.LOG_FILE:
+        log_dir = os.path.dirname(settings.LOG_FILE)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        file_handler = RotatingFileHandler(settings.LOG_FILE, maxBytes=2_000_000, backupCount=5)
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(formatter)
+    handlers.append(console_handler)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    logger = logging.getLogger("family_tree")
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.handlers.clear()
+    logger.addHandler(_LazyQueueHandler(log_queue))
+    logger.propagate = False
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
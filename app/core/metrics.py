@@ -0,0 +1,203 @@
+import os
+from time import perf_counter
+
+from app.core.config import settings
+
+# prometheus_client picks multiprocess mode from the environment when metrics
+# are created, so this has to happen before it is imported.
+if settings.PROMETHEUS_MULTIPROC_DIR and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = settings.PROMETHEUS_MULTIPROC_DIR
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+
+def _multiprocess_enabled() -> bool:
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+# ----------------------- HTTP ------------------------------------------------ #
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+    multiprocess_mode="livesum",
+)
+
+# ----------------------- SQLAlchemy pool ------------------------------------- #
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the SQLAlchemy pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total",
+    "Connections checked out of the SQLAlchemy pool",
+)
+DB_POOL_CONNECTIONS_CREATED = Counter(
+    "db_pool_connections_created_total",
+    "New DBAPI connections opened by the SQLAlchemy pool",
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Requests rejected with 503 because no pooled connection was free in time",
+)
+DB_STATEMENT_TIMEOUTS = Counter(
+    "db_statement_timeouts_total",
+    "Statements cancelled by statement_timeout",
+)
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Read-only request sessions by the database that served them",
+    ["target"],
+)
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds",
+    "Last measured replication lag of the read replica",
+    multiprocess_mode="max",
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent getting a connection from the pool (waits for a free one, "
+    "opens and pings it); checkouts that time out are included",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_held_seconds",
+    "How long a connection stayed checked out",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+# ----------------------- Neo4j ----------------------------------------------- #
+
+NEO4J_SESSIONS_IN_USE = Gauge(
+    "neo4j_sessions_in_use",
+    "Neo4j driver sessions currently open",
+    multiprocess_mode="livesum",
+)
+NEO4J_SESSION_SECONDS = Histogram(
+    "neo4j_session_duration_seconds",
+    "How long a Neo4j session (and its pooled connection) was held",
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, 120),
+)
+
+# ----------------------- Domain ---------------------------------------------- #
+
+TREE_NODES_RETURNED = Histogram(
+    "tree_nodes_returned",
+    "Individuals returned by multi-level tree requests",
+    ["endpoint"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+TREE_COST_ESTIMATE = Histogram(
+    "tree_cost_estimate_nodes",
+    "Predicted node count of tree requests before traversal",
+    ["endpoint"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 100000),
+)
+TREE_REQUESTS_REJECTED = Counter(
+    "tree_requests_rejected_total",
+    "Tree requests rejected with 429 because the client's cost budget was spent, "
+    "or with 413 because the tree is over the node cap",
+    ["endpoint"],
+)
+TREE_REQUESTS_TRUNCATED = Counter(
+    "tree_requests_truncated_total",
+    "Tree responses cut at TREE_MAX_NODES_PER_REQUEST (continued by cursor)",
+    ["endpoint"],
+)
+GRAPH_SYNC_SECONDS = Histogram(
+    "graph_sync_duration_seconds",
+    "Duration of GraphSyncService jobs",
+    ["job"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+GRAPH_SYNC_ROWS = Counter(
+    "graph_sync_rows_total",
+    "Rows written to Neo4j by GraphSyncService",
+    ["kind"],
+)
+
+CHANGE_STREAM_SUBSCRIBERS = Gauge(
+    "change_stream_subscribers",
+    "Open live change streams (SSE and WebSocket)",
+    multiprocess_mode="livesum",
+)
+CHANGE_STREAMS_DROPPED = Counter(
+    "change_streams_dropped_total",
+    "Change streams closed with a resync because the client fell behind",
+)
+
+JOBS_FINISHED = Counter(
+    "jobs_finished_total",
+    "Background jobs by final status",
+    ["job_type", "status"],
+)
+JOB_DURATION_SECONDS = Histogram(
+    "job_duration_seconds",
+    "Run time of background jobs (queue wait excluded)",
+    ["job_type"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+
+
+def observe_request(method: str, route: str, status: int, duration: float) -> None:
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(duration)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Pool checkout/checkin accounting via SQLAlchemy pool events."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTIONS_CREATED.inc()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = perf_counter()
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            DB_POOL_CHECKED_OUT.dec()
+            DB_POOL_CHECKOUT_SECONDS.observe(perf_counter() - started)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """
+    Exposition text for /metrics. In multiprocess mode the values of every
+    worker (live or dead) are merged from PROMETHEUS_MULTIPROC_DIR.
+    """
+    if _multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead() -> None:
+    """Drop this worker's live gauges when it shuts down."""
+    if _multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
+
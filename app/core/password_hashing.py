@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+logger = logging.getLogger("family_tree.password_hashing")
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context() -> "CryptContext":
+    """
+    Password hashing configuration, built on first use so importing the app
+    does not load passlib/bcrypt.
+    Changing BCRYPT_ROUNDS makes existing hashes "need update"; they are
+    transparently re-hashed on the next successful login.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__truncate_error=False,
+        bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    )
+
+
+_executor: Optional[Executor] = None
+_semaphores: dict[int, asyncio.Semaphore] = {}
+
+
+# ---------------------------- sync primitives ---------------------------- #
+# Module-level functions so they can be pickled into a process pool.
+
+def hash_password(password: str) -> str:
+    return get_pwd_context().hash(password[:72])
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def check_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Verify and, if the stored hash uses outdated settings (e.g. fewer rounds),
+    return a fresh hash in the same call. See CryptContext.verify_and_update.
+    """
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+# ---------------------------- executor ----------------------------------- #
+
+def get_executor() -> Executor:
+    """
+    Dedicated pool for bcrypt, kept separate from the request threadpool so a
+    login burst cannot occupy the threads that serve tree requests.
+    """
+    global _executor
+    if _executor is None:
+        workers = settings.PASSWORD_HASH_WORKERS
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwd-hash")
+        logger.info("Password hashing executor started (%s, %s workers)", settings.PASSWORD_HASH_EXECUTOR, workers)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # asyncio primitives are bound to a loop; keep one per running loop
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(id(loop))
+    if sem is None:
+        sem = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_CONCURRENCY)
+        _semaphores[id(loop)] = sem
+    return sem
+
+
+async def _run_limited(func, *args):
+    """
+    Run `func` on the hashing executor, allowing at most
+    PASSWORD_HASH_MAX_CONCURRENCY hashes in flight per worker process.
+    Requests that cannot get a slot within PASSWORD_HASH_QUEUE_TIMEOUT get 503.
+    """
+    sem = _get_semaphore()
+    try:
+        await asyncio.wait_for(sem.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Password hashing queue full, rejecting request")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), func, *args)
+    finally:
+        sem.release()
+
+
+# ---------------------------- async API ---------------------------------- #
+
+async def hash_password_async(password: str) -> str:
+    return await _run_limited(hash_password, password)
+
+
+async def check_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_limited(check_password, plain_password, hashed_password)
+
+
+async def check_and_update_password_async(
+        plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    return await _run_limited(check_and_update_password, plain_password, hashed_password)
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import resolve_principal_from_token
+
+logger = logging.getLogger("family_tree.profiling")
+
+# Only stacks that pass through our own code are kept; this drops idle
+# threadpool workers and unrelated background threads.
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_.-]+\.speedscope\.json$")
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+
+def wants_profile(request: Request) -> bool:
+    """Cheap check done on every request; everything else only runs on opt-in."""
+    return request.headers.get("x-profile") == "1" or request.query_params.get("_profile") == "1"
+
+
+async def is_profiling_authorized(request: Request) -> bool:
+    """Profiling is restricted to admins (bearer token in the Authorization header)."""
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        principal = await run_in_threadpool(resolve_principal_from_token, token)
+    except Exception:
+        return False
+    return principal is not None and principal.role == "admin"
+
+
+class RequestProfiler:
+    """
+    Statistical sampler for a single request.
+    A background thread snapshots the stacks of all threads every
+    PROFILE_SAMPLE_INTERVAL_MS, so both the event loop and the threadpool
+    worker running a sync endpoint are covered. Concurrent requests that run
+    through the same code can show up in the samples as well.
+    """
+
+    def __init__(self):
+        self.interval = settings.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        self.samples: Dict[int, List[Tuple[Frame, ...]]] = {}
+        self.thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._started = 0.0
+        self.duration = 0.0
+
+    def start(self) -> None:
+        self._started = perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.duration = perf_counter() - self._started
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[Frame] = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    in_app = in_app or code.co_filename.startswith(_APP_DIR)
+                    frame = frame.f_back
+                if in_app:
+                    stack.reverse()
+                    self.samples.setdefault(thread_id, []).append(tuple(stack))
+
+        self.thread_names = {t.ident: t.name for t in threading.enumerate() if t.ident in self.samples}
+
+    def to_speedscope(self, name: str) -> dict:
+        frame_index: Dict[Frame, int] = {}
+        frames: List[dict] = []
+        profiles = []
+
+        for thread_id, stacks in self.samples.items():
+            encoded = []
+            for stack in stacks:
+                row = []
+                for frame in stack:
+                    idx = frame_index.get(frame)
+                    if idx is None:
+                        idx = frame_index[frame] = len(frames)
+                        frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                    row.append(idx)
+                encoded.append(row)
+
+            profiles.append({
+                "type": "sampled",
+                "name": self.thread_names.get(thread_id, str(thread_id)),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": len(encoded) * self.interval,
+                "samples": encoded,
+                "weights": [self.interval] * len(encoded),
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "family-tree-api",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def save(self, method: str, path: str) -> str:
+        """Write the profile under PROFILE_DIR and return its file name."""
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+        file_name = f"{stamp}-{method}-{slug}-{uuid.uuid4().hex[:8]}.speedscope.json"
+
+        with open(os.path.join(settings.PROFILE_DIR, file_name), "w") as fh:
+            json.dump(self.to_speedscope(f"{method} {path} ({self.duration * 1000:.1f} ms)"), fh)
+
+        _enforce_retention()
+        logger.info("Saved request profile %s", file_name)
+        return file_name
+
+
+def _enforce_retention() -> None:
+    """Keep only the newest PROFILE_RETENTION profiles."""
+    entries = [
+        os.path.join(settings.PROFILE_DIR, name)
+        for name in os.listdir(settings.PROFILE_DIR)
+        if _SAFE_NAME.match(name)
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for stale in entries[settings.PROFILE_RETENTION:]:
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+
+
+def get_profile_path(file_name: str) -> Optional[str]:
+    """Resolve a stored profile by name; None for unknown or unsafe names."""
+    if not _SAFE_NAME.match(file_name):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, file_name)
+    return path if os.path.isfile(path) else None
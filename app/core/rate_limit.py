@@ -0,0 +1,153 @@
+import math
+from threading import Lock
+from time import monotonic
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.metrics import TREE_COST_ESTIMATE, TREE_REQUESTS_REJECTED
+from app.core.security import token_subject
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens, refilled at
+    `refill_per_second`. Not thread-safe on its own; see CostLimiter.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def consume(self, cost: float) -> float:
+        """Take `cost` tokens; returns 0 on success, else seconds until they are available."""
+        self._refill()
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.refill_per_second
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) after the fact; may go into debt."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class CostLimiter:
+    """
+    Per-client token buckets where a request costs its (estimated) amount of
+    work instead of 1. Buckets live in process memory, so with several
+    workers each one enforces the budget separately.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, max_clients: int = 10_000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._buckets = LRUCache(maxsize=max_clients)
+        self._lock = Lock()
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.capacity, self.refill_per_second)
+            self._buckets.set(key, bucket)
+        return bucket
+
+    def acquire(self, key: str, cost: float) -> Optional[float]:
+        """
+        Charge `cost` (capped at the bucket size, so any single request can
+        eventually run). Returns None when admitted, else a Retry-After in seconds.
+        """
+        cost = min(cost, self.capacity)
+        with self._lock:
+            wait = self._bucket(key).consume(cost)
+        return None if wait == 0 else wait
+
+    def settle(self, key: str, delta: float) -> None:
+        """Correct an earlier charge once the real cost is known."""
+        with self._lock:
+            self._bucket(key).adjust(delta)
+
+    def remaining(self, key: str) -> float:
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket._refill()
+            return bucket.tokens
+
+
+# Budget for tree traversals, in "nodes returned"
+tree_cost_limiter = CostLimiter(
+    capacity=settings.TREE_COST_BUCKET_CAPACITY,
+    refill_per_second=settings.TREE_COST_REFILL_PER_SECOND,
+)
+
+
+def get_client_key(request: Request) -> str:
+    """
+    Who pays for a request: the authenticated user when a valid bearer token
+    is present (no DB lookup), else the client address.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        user_id = token_subject(token)
+        if user_id is not None:
+            return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def retry_after_header(seconds: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+def admit_tree_request(client_key: str, estimate: int, endpoint: str, response: Response) -> int:
+    """
+    Charge a tree traversal against the client's budget before running it.
+    The charge is the estimate capped at TREE_MAX_NODES_PER_REQUEST (the most
+    a truncated response can cost); settle it with the real node count later.
+    Raises 429 with Retry-After when the budget is spent.
+    """
+    TREE_COST_ESTIMATE.labels(endpoint).observe(estimate)
+    cost = min(estimate, settings.TREE_MAX_NODES_PER_REQUEST)
+
+    wait = tree_cost_limiter.acquire(client_key, cost)
+    if wait is not None:
+        TREE_REQUESTS_REJECTED.labels(endpoint).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Tree query budget exhausted, please retry later or request fewer generations",
+            headers=retry_after_header(wait),
+        )
+
+    response.headers["X-Tree-Cost-Estimate"] = str(estimate)
+    return cost
+
+
+def reject_oversized_tree(estimate: int, endpoint: str) -> None:
+    """
+    For queries that need a person's whole tree (filters, statistics),
+    where a truncated tree would give wrong answers: 413 when the estimate
+    is over TREE_MAX_NODES_PER_REQUEST. Call before admit_tree_request.
+    """
+    if estimate > settings.TREE_MAX_NODES_PER_REQUEST:
+        TREE_REQUESTS_REJECTED.labels(endpoint).inc()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"This tree has more than {settings.TREE_MAX_NODES_PER_REQUEST} people, "
+                   "request fewer generations",
+        )
+
+
+def settle_tree_request(client_key: str, charged: int, actual: int, response: Optional[Response]) -> None:
+    """`response` is None for streams, whose headers are already sent."""
+    tree_cost_limiter.settle(client_key, actual - charged)
+    if response is not None:
+        response.headers["X-Tree-Budget-Remaining"] = str(int(tree_cost_limiter.remaining(client_key)))
@@ -4,29 +4,50 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+from starlette.concurrency import run_in_threadpool
 
+from app.core.cache import LRUCache
 from app.core.config import settings
-from app.db.database import get_db
+from app.core.password_hashing import (
+    hash_password,
+    check_password,
+    hash_password_async,
+    check_and_update_password_async,
+)
+from app.db.database import get_db, SessionLocal
 from app.models.user import User
-from app.schemas.user_schema import TokenData
+from app.schemas.user_schema import TokenData, Principal
 
 # Where the frontend will send credentials to obtain a token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-# Password hashing configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",bcrypt__truncate_error=False, bcrypt__rounds=12)
-
 
 # 1. Password hashing helpers
+# The sync versions block the calling thread for the full bcrypt cost;
+# request handlers should use the async versions, which run on the
+# dedicated hashing executor (see app.core.password_hashing).
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return check_password(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    password = password[:72]
-    return pwd_context.hash(password)
+    return hash_password(password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hash_password_async(password)
+
+
+async def verify_password_and_update_async(
+        plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Returns (is_valid, new_hash). new_hash is set when the stored hash was
+    made with outdated settings and should be saved in its place.
+    """
+    return await check_and_update_password_async(plain_password, hashed_password)
 
 
 # 2. JWT creation
@@ -48,17 +69,105 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-# 3. Dependency to get the current authenticated user
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    credentials_exception = HTTPException(
+def principal_claims(user: User) -> dict:
+    """
+    Claims embedded in access tokens. `sub` is always used; the rest is only
+    trusted when AUTH_TRUST_TOKEN_CLAIMS is enabled.
+    """
+    return {
+        "sub": str(user.id),
+        "email": user.email,
+        "name": user.name,
+        "role": user.role,
+        "approved": bool(user.is_approved),
+    }
+
+
+# 3. Principal cache
+# user id -> Principal, kept for AUTH_PRINCIPAL_CACHE_TTL seconds per worker
+_principal_cache = LRUCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL,
+)
+
+
+def invalidate_principal(user_id: Optional[int] = None) -> None:
+    """
+    Drop a cached principal (or all of them). Role/approval changes made
+    through the ORM do this automatically; other workers catch up within
+    AUTH_PRINCIPAL_CACHE_TTL.
+    """
+    _principal_cache.invalidate(user_id)
+
+
+# Invalidated once the change is committed: dropping the entry at flush time
+# would let a concurrent request re-cache the old row before the commit
+_STALE_PRINCIPALS_KEY = "stale_principals"
+
+
+def _mark_stale(target: User) -> None:
+    session = object_session(target)
+    if session is None:
+        invalidate_principal(target.id)
+    else:
+        session.info.setdefault(_STALE_PRINCIPALS_KEY, set()).add(target.id)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_user_change(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("role", "is_approved", "email", "name")):
+        _mark_stale(target)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_user_delete(mapper, connection, target: User) -> None:
+    _mark_stale(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session: Session) -> None:
+    for user_id in session.info.pop(_STALE_PRINCIPALS_KEY, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_principals(session: Session) -> None:
+    session.info.pop(_STALE_PRINCIPALS_KEY, None)
+
+
+def _load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    principal = _principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    user = db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
+    if user is None:
+        return None
+
+    principal = Principal.model_validate(user)
+    _principal_cache.set(user_id, principal)
+    return principal
+
+
+def _load_principal_own_session(user_id: int) -> Optional[Principal]:
+    db = SessionLocal()
+    try:
+        return _load_principal(db, user_id)
+    finally:
+        db.close()
+
+
+# 4. Dependency to get the current authenticated user
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_token(token: str) -> tuple[int, dict]:
     try:
         payload = jwt.decode(
             token,
@@ -67,14 +176,85 @@ def get_current_user(
         )
         user_id: Optional[str] = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
 
         token_data = TokenData(sub=user_id)
-    except JWTError:
-        raise credentials_exception
+        return int(token_data.sub), payload
+    except (JWTError, ValueError):
+        raise _credentials_exception()
 
-    user = db.query(User).filter(User.id == int(token_data.sub)).first()
-    if user is None:
-        raise credentials_exception
 
-    return user
+def token_subject(token: str) -> Optional[int]:
+    """User id of a valid token, None otherwise. No DB access."""
+    try:
+        user_id, _ = _decode_token(token)
+    except HTTPException:
+        return None
+    return user_id
+
+
+def _principal_from_claims(user_id: int, payload: dict) -> Optional[Principal]:
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return None
+    if not all(key in payload for key in ("email", "role", "approved")):
+        # Token issued before claims were embedded
+        return None
+
+    return Principal(
+        id=user_id,
+        email=payload["email"],
+        name=payload.get("name"),
+        role=payload["role"],
+        is_approved=payload["approved"],
+    )
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """
+    Resolve the bearer token to a Principal: from signed claims when trusted,
+    else from the principal cache, else from the database.
+    """
+    user_id, payload = _decode_token(token)
+
+    principal = _principal_from_claims(user_id, payload) or _load_principal(db, user_id)
+    if principal is None:
+        raise _credentials_exception()
+
+    return principal
+
+
+def resolve_principal_from_token(token: str) -> Optional[Principal]:
+    """
+    get_current_user outside of dependency injection (e.g. in middleware).
+    Opens its own session on a cache miss, so call it from the threadpool.
+    """
+    user_id, payload = _decode_token(token)
+    return _principal_from_claims(user_id, payload) or _load_principal_own_session(user_id)
+
+
+def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Async variant of get_current_user for async routes. Cache hits never leave
+    the event loop; only a miss opens a session (in the threadpool).
+    """
+    user_id, payload = _decode_token(token)
+
+    principal = _principal_from_claims(user_id, payload) or _principal_cache.get(user_id)
+    if principal is None:
+        principal = await run_in_threadpool(_load_principal_own_session, user_id)
+    if principal is None:
+        raise _credentials_exception()
+
+    return principal
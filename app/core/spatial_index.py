@@ -0,0 +1,66 @@
+from math import floor
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class SpatialGridIndex:
+    """
+    Uniform grid over 2D layout coordinates.
+    Items are registered by bounding box; a query only touches the cells
+    covering the requested box, so its cost depends on what is visible
+    rather than on the total number of items.
+    """
+
+    def __init__(self, cell_size: float = 600.0):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        # Extent of the occupied cells: (min cx, min cy, max cx, max cy)
+        self._extent: Optional[Tuple[int, int, int, int]] = None
+
+    def _cell_range(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        size = self.cell_size
+        return (
+            range(floor(min_x / size), floor(max_x / size) + 1),
+            range(floor(min_y / size), floor(max_y / size) + 1),
+        )
+
+    def insert(self, item_id: int, min_x: float, min_y: float, max_x: float, max_y: float) -> None:
+        xs, ys = self._cell_range(min_x, min_y, max_x, max_y)
+        for cx in xs:
+            for cy in ys:
+                self._cells.setdefault((cx, cy), []).append(item_id)
+
+        if self._extent is None:
+            self._extent = (xs.start, ys.start, xs.stop - 1, ys.stop - 1)
+        else:
+            lo_x, lo_y, hi_x, hi_y = self._extent
+            self._extent = (min(lo_x, xs.start), min(lo_y, ys.start), max(hi_x, xs.stop - 1), max(hi_y, ys.stop - 1))
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Set[int]:
+        """
+        Candidate item ids whose cells overlap the box.
+        Callers do the exact intersection test on the (few) candidates.
+        Bounds must be finite; boxes larger than the occupied area are
+        clamped to it.
+        """
+        found: Set[int] = set()
+        if self._extent is None:
+            return found
+
+        size = self.cell_size
+        lo_x, lo_y, hi_x, hi_y = self._extent
+        xs = range(max(floor(min_x / size), lo_x), min(floor(max_x / size), hi_x) + 1)
+        ys = range(max(floor(min_y / size), lo_y), min(floor(max_y / size), hi_y) + 1)
+
+        # Zoomed far out: scanning occupied cells is cheaper than the range
+        if len(xs) * len(ys) > len(self._cells):
+            for (cx, cy), bucket in self._cells.items():
+                if cx in xs and cy in ys:
+                    found.update(bucket)
+            return found
+
+        for cx in xs:
+            for cy in ys:
+                bucket = self._cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
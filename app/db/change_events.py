@@ -0,0 +1,239 @@
+"""
+Change events for live tree views (delivered by app.core.change_broker).
+
+Every flush that updates or deletes individuals, or adds or removes
+relationships, is turned into compact events, whichever write path made
+it (repositories, merges, jobs). On Postgres they are sent with pg_notify
+inside the same transaction, so they go out on commit, never on rollback,
+to every worker LISTENing on CHANGE_EVENTS_CHANNEL, including changes made
+by other processes. Elsewhere they wait on the session and go to this
+worker's broker after the commit.
+
+The same hook records every tree the flush writes; their data versions
+(see app.repositories.data_version_repository) are bumped once, just
+before the transaction commits, whether or not events are enabled.
+"""
+import json
+import logging
+import select
+import threading
+from typing import Callable, List, Optional, Set
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.change_broker import RESYNC, change_broker
+from app.core.config import settings
+from app.db.tenancy import session_tree_id
+from app.models.individual import Individual
+from app.models.relationship import Relationship
+from app.repositories.data_version_repository import bump_data_versions
+
+logger = logging.getLogger("family_tree.changes")
+
+_PENDING_KEY = "change_events"
+_CHANGED_TREES_KEY = "changed_trees"
+# Bookkeeping columns; changing only these is not worth an event
+_IGNORED_FIELDS = {"id", "tree_id", "created_at", "updated_at", "aggregates"}
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+
+def _changed_fields(individual: Individual) -> List[str]:
+    state = inspect(individual)
+    return sorted(
+        attr.key for attr in state.attrs
+        if attr.key not in _IGNORED_FIELDS and attr.history.has_changes()
+    )
+
+
+def _relationship_event(kind: str, rel: Relationship) -> dict:
+    return {
+        "type": kind,
+        "tree_id": rel.tree_id,
+        "relationship_id": rel.id,
+        "individual_id": rel.individual_id,
+        "related_individual_id": rel.related_individual_id,
+        "relationship_type": rel.relationship_type,
+    }
+
+
+def collect_events(session: Session) -> List[dict]:
+    """Events for what the current flush writes (call from after_flush)."""
+    events = []
+    for obj in session.new:
+        if isinstance(obj, Relationship):
+            events.append(_relationship_event("relationship.added", obj))
+        # A new individual has no neighbourhood yet; its first relationship is the event
+    for obj in session.dirty:
+        if isinstance(obj, Individual):
+            fields = _changed_fields(obj)
+            if fields:
+                events.append({
+                    "type": "individual.updated", "tree_id": obj.tree_id,
+                    "individual_id": obj.id, "fields": fields,
+                })
+        elif isinstance(obj, Relationship) and session.is_modified(obj):
+            # Rare (merges delete and re-add); report it as replaced
+            events.append(_relationship_event("relationship.removed", obj))
+            events.append(_relationship_event("relationship.added", obj))
+    for obj in session.deleted:
+        if isinstance(obj, Individual):
+            # Its relationships go with it (ON DELETE CASCADE)
+            events.append({"type": "individual.deleted", "tree_id": obj.tree_id, "individual_id": obj.id})
+        elif isinstance(obj, Relationship):
+            events.append(_relationship_event("relationship.removed", obj))
+    return events
+
+
+def changed_trees(session: Session) -> Set[int]:
+    """Trees whose individuals or relationships the current flush writes (call from after_flush)."""
+    scoped_tree = session_tree_id(session)
+    trees = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, (Individual, Relationship)):
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        trees.add(scoped_tree if scoped_tree is not None else obj.tree_id)
+    return trees
+
+
+def _compact(events: List[dict]) -> List[dict]:
+    """Bulk changes collapse into one tree.changed per tree."""
+    if len(events) <= settings.CHANGE_EVENTS_MAX_PER_FLUSH:
+        return events
+    trees = sorted({e["tree_id"] for e in events if e.get("tree_id") is not None})
+    return [{"type": "tree.changed", "tree_id": tree_id} for tree_id in trees]
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_changes(session: Session, flush_context) -> None:
+    trees = changed_trees(session)
+    if trees:
+        session.info.setdefault(_CHANGED_TREES_KEY, set()).update(trees)
+
+    if not settings.CHANGE_EVENTS_ENABLED:
+        return
+    events = collect_events(session)
+    if not events:
+        return
+    events = _compact(events)
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        connection.execute(_NOTIFY_SQL, [
+            {"channel": settings.CHANGE_EVENTS_CHANNEL, "payload": json.dumps(e, separators=(",", ":"))}
+            for e in events
+        ])
+    else:
+        session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_data_versions(session: Session) -> None:
+    # commit() flushes after this hook; flush first so its writes are counted
+    session.flush()
+    trees = session.info.pop(_CHANGED_TREES_KEY, None)
+    if trees:
+        bump_data_versions(session.connection(), trees)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        change_broker.publish(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_CHANGED_TREES_KEY, None)
+
+
+class PostgresChangeListener:
+    """
+    Background thread that LISTENs on CHANGE_EVENTS_CHANNEL over its own
+    connection (outside the pool) and hands notifications to `deliver`.
+    After a lost connection it reconnects with backoff and delivers a
+    resync, since notifications sent meanwhile are gone.
+    """
+
+    _POLL_SECONDS = 1.0
+    _MAX_BACKOFF_SECONDS = 30.0
+
+    def __init__(self, engine: Engine, deliver: Callable[[List[dict]], None]):
+        self.engine = engine
+        self.deliver = deliver
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._POLL_SECONDS * 2)
+
+    def _connect(self):
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        conn = self.engine.dialect.dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{settings.CHANGE_EVENTS_CHANNEL}"')
+        return conn
+
+    def _run(self) -> None:
+        backoff, reconnecting = 1.0, False
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                if reconnecting:
+                    logger.info("Change listener reconnected")
+                    self.deliver([RESYNC])
+                backoff = 1.0
+                self._listen(conn)
+            except Exception as e:
+                logger.warning("Change listener connection failed: %s (retrying in %.0fs)", e, backoff)
+                reconnecting = True
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self._MAX_BACKOFF_SECONDS)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _listen(self, conn) -> None:
+        while not self._stop.is_set():
+            if not select.select([conn], [], [], self._POLL_SECONDS)[0]:
+                continue
+            conn.poll()
+            events = []
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    events.append(json.loads(notify.payload))
+                except ValueError:
+                    logger.warning("Ignoring malformed change notification: %.200s", notify.payload)
+            self.deliver(events)
+
+
+def start_change_listener(engine: Engine, deliver: Callable[[List[dict]], None]) -> Optional[PostgresChangeListener]:
+    """
+    Cross-worker fan-out, when the database can do it (Postgres through
+    psycopg2); otherwise events only reach the worker that wrote them.
+    """
+    if not settings.CHANGE_EVENTS_ENABLED or engine.dialect.name != "postgresql":
+        return None
+    if engine.dialect.driver != "psycopg2":
+        logger.warning("Change listener needs psycopg2, not %s; live updates stay per worker",
+                       engine.dialect.driver)
+        return None
+    listener = PostgresChangeListener(engine, deliver)
+    listener.start()
+    return listener
@@ -1,39 +1,218 @@
 import logging
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+from time import perf_counter
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
+from app.core.metrics import DB_POOL_WAIT_SECONDS, DB_READ_SESSIONS, instrument_engine
+from app.db import change_events, query_stats  # noqa: F401 (change_events registers session listeners)
+from app.db.replica import ReplicaLagMonitor, prefers_primary
+from app.db.tenancy import get_tree_id, scope_session, tree_exists
 
 
 logger = logging.getLogger("family_tree.database")
 
-if not settings.DATABASE_URL:
-    logger.error("DATABASE_URL is missing in .env file!")
-    raise ValueError("DATABASE_URL is missing!")
 
-logger.info(f"Connecting to database: {settings.DATABASE_URL}")
+class _TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout took, waiting included
+    (the pool's own events only fire once a connection was handed out).
+    Kept across engine.dispose(), which recreates the pool from its class.
+    """
+
+    def connect(self):
+        started = perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(perf_counter() - started)
+
+
+def _engine_options(database_url: str) -> dict:
+    """
+    Pool and timeout options from Settings.
+    In-memory SQLite uses a single shared connection, so there is no pool to size.
+    """
+    url = make_url(database_url)
+    options = {"echo": settings.DB_ECHO, "future": True, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=_TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if url.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        # Baseline for every connection (also sessions opened outside a request);
+        # request sessions override it per transaction, see _apply_statement_timeout
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def _create_engine(database_url: str) -> Engine:
+    engine = create_engine(database_url, **_engine_options(database_url))
+    query_stats.install(engine)
+    instrument_engine(engine)
+    logger.info("Database engine ready: %s", make_url(database_url).render_as_string(hide_password=True))
+    return engine
+
 
+class _LazySessionmaker(sessionmaker):
+    """A sessionmaker that creates the engines on first use instead of at import."""
 
-if not settings.DATABASE_URL:
-    raise ValueError("DATABASE_URL is missing! Check your .env file.")
+    def __call__(self, **local_kw) -> Session:
+        if "bind" not in self.kw:
+            init_engines()
+        return super().__call__(**local_kw)
 
-engine = create_engine(settings.DATABASE_URL,echo=True, future = True)
 
-SessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False
+SessionLocal = _LazySessionmaker(autoflush=False, autocommit=False)
+# Optional read replica (same pool/timeout options as the primary)
+ReplicaSessionLocal: Optional[sessionmaker] = (
+    _LazySessionmaker(autoflush=False, autocommit=False) if settings.DATABASE_REPLICA_URL else None
 )
 
-def get_db():
+_engine: Optional[Engine] = None
+_replica_engine: Optional[Engine] = None
+_replica_monitor: Optional[ReplicaLagMonitor] = None
+_init_lock = threading.Lock()
+
+
+def init_engines() -> Engine:
     """
-    FastAPI dependency that provides a SQLAlchemy Session
-    and makes sure it is closed after the request.
+    Create the primary (and replica) engines once and bind the session
+    factories; called by the app lifespan, and by the first session
+    otherwise (scripts, jobs). Returns the primary engine.
     """
-    db = SessionLocal()
-    logger.debug("DB session opened")
+    global _engine, _replica_engine, _replica_monitor
+    if _engine is not None:
+        return _engine
+    with _init_lock:
+        if _engine is None:
+            engine = _create_engine(settings.DATABASE_URL)
+            SessionLocal.configure(bind=engine)
+            if settings.DATABASE_REPLICA_URL:
+                _replica_engine = _create_engine(settings.DATABASE_REPLICA_URL)
+                ReplicaSessionLocal.configure(bind=_replica_engine)
+                _replica_monitor = ReplicaLagMonitor(_replica_engine)
+            _engine = engine
+    return _engine
+
+
+def dispose_engines() -> None:
+    """Close pooled connections at shutdown; later sessions simply reconnect."""
+    for engine in (_engine, _replica_engine):
+        if engine is not None:
+            engine.dispose()
+
+
+def get_replica_monitor() -> Optional[ReplicaLagMonitor]:
+    init_engines()
+    return _replica_monitor
+
+
+def __getattr__(name: str):
+    # `database.engine` / `database.replica_engine` keep working, created on first access
+    if name == "engine":
+        return init_engines()
+    if name == "replica_engine":
+        init_engines()
+        return _replica_engine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    """
+    SET LOCAL only lasts for the current transaction, so this runs at the
+    start of each one; a commit does not drop the route's timeout.
+    """
+    timeout_ms: Optional[int] = session.info.get("statement_timeout_ms")
+    if timeout_ms is not None and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def _session_scope(statement_timeout_ms: int, factory: sessionmaker = SessionLocal, tree_id: Optional[int] = None):
+    db = factory()
+    db.info["statement_timeout_ms"] = statement_timeout_ms
     try:
+        if tree_id is not None:
+            scope_session(db, tree_id)
+            if not tree_exists(db, tree_id):
+                raise HTTPException(status_code=404, detail="Family tree not found")
         yield db
     finally:
-        logger.debug("DB session closed")
         db.close()
+
+
+def get_db(request: Request):
+    """
+    FastAPI dependency that provides a SQLAlchemy Session, scoped to the
+    request's family tree (see app.db.tenancy), and makes sure it is
+    closed after the request.
+    """
+    yield from _session_scope(settings.DB_STATEMENT_TIMEOUT_MS, tree_id=get_tree_id(request))
+
+
+def get_read_db(request: Request):
+    """
+    Session for read-only endpoints (tree views, listings), with a tight
+    statement timeout so one pathological query cannot pin a connection.
+    Served by the replica when one is configured, keeping up, and the
+    client has not just written (read-your-writes, see app.db.replica).
+    """
+    replica_monitor = get_replica_monitor()
+    use_replica = (
+        replica_monitor is not None
+        and not prefers_primary(request)
+        and replica_monitor.is_healthy()
+    )
+    DB_READ_SESSIONS.labels("replica" if use_replica else "primary").inc()
+    yield from _session_scope(
+        settings.DB_READ_STATEMENT_TIMEOUT_MS,
+        ReplicaSessionLocal if use_replica else SessionLocal,
+        tree_id=get_tree_id(request),
+    )
+
+
+def get_admin_db():
+    """
+    Session for long-running admin jobs (graph sync). Not scoped to a
+    tree: admin routes work across all of them.
+    """
+    yield from _session_scope(settings.DB_ADMIN_STATEMENT_TIMEOUT_MS)
+
+
+def open_admin_session(tree_id: Optional[int] = None) -> Session:
+    """
+    Admin-timeout session for work outside a request (background jobs),
+    optionally scoped to one tree; the caller closes it.
+    """
+    db = SessionLocal()
+    db.info["statement_timeout_ms"] = settings.DB_ADMIN_STATEMENT_TIMEOUT_MS
+    return scope_session(db, tree_id)
+
+
+def open_read_session(tree_id: Optional[int] = None) -> Session:
+    """
+    Primary session with the read timeout for short reads outside a request
+    (live change streams), optionally scoped to one tree; the caller closes it.
+    """
+    db = SessionLocal()
+    db.info["statement_timeout_ms"] = settings.DB_READ_STATEMENT_TIMEOUT_MS
+    return scope_session(db, tree_id)
+
+
+def is_statement_timeout(exc: Exception) -> bool:
+    """True for Postgres query_canceled (SQLSTATE 57014), e.g. statement_timeout."""
+    return getattr(getattr(exc, "orig", None), "pgcode", None) == "57014"
@@ -0,0 +1,144 @@
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("family_tree.sql")
+
+
+class QueryStats:
+    """
+    Queries executed while handling one request.
+    `statements` counts executions per SQL text (parameters are not part of
+    the text), which is what the N+1 detector looks at.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+
+    def most_repeated(self) -> tuple[Optional[str], int]:
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# (route, statement) pairs already reported, so each N+1 is logged once per worker
+_reported_n_plus_one: set[tuple[str, str]] = set()
+
+
+def start_request_stats() -> QueryStats:
+    """
+    Begin accounting for the current request. Sync endpoints run in the
+    threadpool with a copy of this context, so they update the same object.
+    """
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def get_request_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def check_n_plus_one(route: str, stats: QueryStats) -> None:
+    """
+    Warn when a single statement ran DB_N_PLUS_ONE_THRESHOLD+ times in one
+    request: the query count of that route grows with the result size.
+    """
+    statement, repeats = stats.most_repeated()
+    if statement is None or repeats < settings.DB_N_PLUS_ONE_THRESHOLD:
+        return
+
+    key = (route, statement)
+    if key in _reported_n_plus_one:
+        return
+    _reported_n_plus_one.add(key)
+
+    logger.warning(
+        "Possible N+1 on %s: statement executed %s times (%s queries total): %s",
+        route, repeats, stats.count, " ".join(statement.split()),
+        extra={"route": route, "repeats": repeats, "db_queries": stats.count},
+    )
+
+
+_EXPLAIN_SAVEPOINT = "query_stats_explain"
+
+
+def _explain(cursor, dialect_name: str, statement: str, parameters) -> Optional[str]:
+    """
+    Plan of a statement that just ran, on the same connection. On Postgres
+    a failed EXPLAIN would abort the request's transaction, so it runs
+    inside a savepoint that is always rolled back.
+    """
+    prefix = "EXPLAIN QUERY PLAN " if dialect_name == "sqlite" else "EXPLAIN "
+    connection = cursor.connection
+    savepoint = dialect_name == "postgresql" and not getattr(connection, "autocommit", False)
+    explain_cursor = None
+    try:
+        explain_cursor = connection.cursor()
+        if savepoint:
+            explain_cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            return "\n".join(" ".join(str(col) for col in row) for row in explain_cursor.fetchall())
+        finally:
+            if savepoint:
+                explain_cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+                explain_cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        if explain_cursor is not None:
+            explain_cursor.close()
+
+
+def install(engine: Engine) -> None:
+    """
+    Attach timing hooks to `engine`: per-request accounting plus a log of
+    statements slower than DB_SLOW_QUERY_MS (with parameters, and the plan
+    when DB_EXPLAIN_SLOW_QUERIES is enabled).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # On the statement's own context: failing statements never reach
+        # after_cursor_execute, so nothing may be left behind on the connection
+        context._query_start_time = perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = perf_counter() - context._query_start_time
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+
+        duration_ms = duration * 1000
+        if duration_ms < settings.DB_SLOW_QUERY_MS:
+            return
+
+        plan = None
+        if settings.DB_EXPLAIN_SLOW_QUERIES and statement.lstrip().upper().startswith("SELECT"):
+            plan = _explain(cursor, conn.dialect.name, statement, parameters)
+
+        logger.warning(
+            "Slow query (%.1f ms): %s | params=%r%s",
+            duration_ms, " ".join(statement.split()), parameters,
+            f"\n{plan}" if plan else "",
+            extra={"duration_ms": round(duration_ms, 2)},
+        )
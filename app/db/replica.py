@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import DB_REPLICA_LAG_SECONDS
+
+logger = logging.getLogger("family_tree.database")
+
+# Set after a successful write; reads carrying it go to the primary until it expires
+PRIMARY_UNTIL_COOKIE = "ft_primary_until"
+# Clients can also ask for primary reads explicitly
+CONSISTENCY_HEADER = "x-read-consistency"
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# POST only because the body is large; these do not pin the client to the primary
+READ_ONLY_POST_PATHS = {"/api/individuals/batch"}
+
+# 0 when the replica has replayed everything it received (an idle primary
+# would otherwise look like growing lag), else seconds since the last replay.
+_POSTGRES_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaLagMonitor:
+    """
+    Decides whether the replica may serve reads. Lag is measured at most once
+    per DB_REPLICA_LAG_CHECK_INTERVAL; a replica that lags more than
+    DB_REPLICA_MAX_LAG_SECONDS, or cannot be queried, is skipped until the
+    next check says otherwise.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._healthy = False
+        self.lag: Optional[float] = None
+
+    def _measure_lag(self) -> float:
+        if self.engine.dialect.name != "postgresql":
+            return 0.0
+        with self.engine.connect() as conn:
+            return float(conn.execute(_POSTGRES_LAG_SQL).scalar() or 0.0)
+
+    def is_healthy(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at < settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+            return self._healthy
+
+        # One request refreshes; the others keep using the last answer
+        if not self._lock.acquire(blocking=False):
+            return self._healthy
+        try:
+            try:
+                self.lag = self._measure_lag()
+                healthy = self.lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+                DB_REPLICA_LAG_SECONDS.set(self.lag)
+            except Exception as e:
+                self.lag = None
+                healthy = False
+                logger.warning("Replica lag check failed: %s", e)
+
+            if healthy != self._healthy:
+                if healthy:
+                    logger.info("Replica back in rotation (lag %.2fs)", self.lag)
+                elif self.lag is not None:
+                    logger.warning("Replica lag %.2fs over %.2fs, reading from primary",
+                                   self.lag, settings.DB_REPLICA_MAX_LAG_SECONDS)
+            self._healthy = healthy
+            self._checked_at = time.monotonic()
+            return healthy
+        finally:
+            self._lock.release()
+
+
+def prefers_primary(request: Request) -> bool:
+    """Read-your-writes: recent writers and explicit strong reads stay on the primary."""
+    if request.headers.get(CONSISTENCY_HEADER, "").lower() == "strong":
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def mark_recent_write(response: Response) -> None:
+    """Pin the client's next reads to the primary (see DB_READ_YOUR_WRITES_SECONDS)."""
+    window = settings.DB_READ_YOUR_WRITES_SECONDS
+    response.set_cookie(
+        PRIMARY_UNTIL_COOKIE,
+        f"{time.time() + window:.3f}",
+        max_age=max(1, int(window + 0.999)),
+        httponly=True,
+        samesite="lax",
+    )
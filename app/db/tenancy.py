@@ -0,0 +1,93 @@
+"""
+Family tree (tenant) scoping for ORM sessions.
+
+A session scoped with scope_session() only sees the individuals and
+relationships of its tree: every ORM SELECT, UPDATE and DELETE gets a
+`tree_id = :tree` criterion on those entities (joins, subqueries and
+Session.get included), and new rows are stamped with the tree on flush.
+Repositories and services therefore need no tree parameter. Unscoped
+sessions (admin jobs, scripts) see every tree.
+"""
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.requests import HTTPConnection
+from sqlalchemy import event, select
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.family_tree import DEFAULT_TREE_ID, FamilyTree
+from app.models.individual import Individual
+from app.models.relationship import Relationship
+
+_TREE_KEY = "tree_id"
+
+# Trees that exist; only hits are cached, so new trees are usable at once
+_known_trees = LRUCache(maxsize=10_000, ttl=settings.TREE_LOOKUP_TTL)
+
+
+def scope_session(session: Session, tree_id: Optional[int]) -> Session:
+    """Restrict `session` to one tree (None lifts the restriction)."""
+    if tree_id is None:
+        session.info.pop(_TREE_KEY, None)
+    else:
+        session.info[_TREE_KEY] = tree_id
+    return session
+
+
+def session_tree_id(session: Session) -> Optional[int]:
+    return session.info.get(_TREE_KEY)
+
+
+def get_tree_id(request: HTTPConnection) -> int:
+    """
+    FastAPI dependency: the tree named in the TREE_HEADER header, or the
+    default tree. Does not check that it exists (see tree_exists).
+    """
+    raw = request.headers.get(settings.TREE_HEADER)
+    if raw is None:
+        return DEFAULT_TREE_ID
+    try:
+        tree_id = int(raw)
+    except ValueError:
+        tree_id = 0
+    if tree_id < 1:
+        raise HTTPException(status_code=400, detail=f"Invalid {settings.TREE_HEADER} header")
+    return tree_id
+
+
+def tree_exists(session: Session, tree_id: int) -> bool:
+    if _known_trees.get(tree_id):
+        return True
+    found = session.execute(select(FamilyTree.id).where(FamilyTree.id == tree_id)).first() is not None
+    if found:
+        _known_trees.set(tree_id, True)
+    return found
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _restrict_to_tree(state: ORMExecuteState) -> None:
+    tree_id = state.session.info.get(_TREE_KEY)
+    if tree_id is None or not (state.is_select or state.is_update or state.is_delete):
+        return
+    state.statement = state.statement.options(
+        with_loader_criteria(Individual, Individual.tree_id == tree_id, include_aliases=True),
+        with_loader_criteria(Relationship, Relationship.tree_id == tree_id, include_aliases=True),
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_tree(session: Session, flush_context, instances) -> None:
+    tree_id = session.info.get(_TREE_KEY)
+    for obj in session.new:
+        if not isinstance(obj, (Individual, Relationship)):
+            continue
+        if tree_id is not None:
+            obj.tree_id = tree_id
+        elif isinstance(obj, Relationship) and obj.tree_id is None and obj.individual_id is not None:
+            # Unscoped: a relationship belongs to its individual's tree
+            with session.no_autoflush:
+                individual = session.get(Individual, obj.individual_id)
+            if individual is not None and individual.tree_id is not None:
+                obj.tree_id = individual.tree_id
@@ -0,0 +1,305 @@
+"""
+Read-only CSR (compressed sparse row) snapshot of the family graph.
+
+Arrays are stored as .npy files and opened with np.load(mmap_mode="r"), so
+every worker process maps the same files and the OS page cache holds a
+single copy. Layout of <GRAPH_SNAPSHOT_DIR>/<version>/:
+
+    node_ids.npy                       int64, sorted; row i <-> individual id
+    <kind>_offsets.npy                 int64, n + 1 (kind: parents, children, spouses)
+    <kind>_targets.npy                 int32 row numbers
+    birth_year.npy, death_year.npy     int16, 0 = unknown
+    gender.npy                         int8, normalised, see gender_code()
+    gender_value.npy                   int32 index into meta["gender_values"], the
+                                       stored value (absent in older snapshots)
+    is_alive.npy                       int8, 1 = alive (or unknown), 0 = dead
+    tree_id.npy                        int32, family tree (absent in older snapshots)
+    meta.json
+
+<GRAPH_SNAPSHOT_DIR>/CURRENT holds the live version name. Writers build a
+new directory and then replace CURRENT atomically; readers notice within
+GRAPH_SNAPSHOT_CHECK_SECONDS and remap.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.family_tree import DEFAULT_TREE_ID
+
+logger = logging.getLogger("family_tree.graph_snapshot")
+
+EDGE_KINDS = ("parents", "children", "spouses")
+# Individual.gender is free text; common spellings are folded (case-insensitive)
+GENDER_CODES = {"male": 1, "m": 1, "female": 2, "f": 2}  # anything else: 3, missing: 0
+GENDER_NAMES = {0: None, 1: "male", 2: "female", 3: "other"}
+
+
+def gender_code(value: Optional[str]) -> int:
+    """Normalised gender for grouping: 1 male, 2 female, 3 other, 0 missing."""
+    value = (value or "").strip().lower()
+    if not value:
+        return 0
+    return GENDER_CODES.get(value, 3)
+
+_CURRENT_FILE = "CURRENT"
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def _build_csr(n: int, src: np.ndarray, dst: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Offsets/targets for edges src -> dst (row numbers); duplicate edges are dropped."""
+    order = np.lexsort((dst, src))
+    src, dst = src[order], dst[order]
+    if src.size:
+        keep = np.ones(src.size, dtype=bool)
+        keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst = src[keep], dst[keep]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+    return offsets, dst.astype(np.int32)
+
+
+def _expand(offsets: np.ndarray, targets: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Concatenated neighbour lists of `rows`, gathered with one fancy-index."""
+    if rows.size == 0:
+        return _EMPTY
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return _EMPTY
+    # Position k of the output reads targets[starts[seg] + (k - first output of seg)]
+    shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return targets[np.arange(total) + shift]
+
+
+class CSRGraph:
+    """One mapped snapshot version. All methods are read-only and thread-safe."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta: dict = json.load(f)
+        self.version: str = self.meta["version"]
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.node_ids = load("node_ids")
+        self.offsets = {kind: load(f"{kind}_offsets") for kind in EDGE_KINDS}
+        self.targets = {kind: load(f"{kind}_targets") for kind in EDGE_KINDS}
+        self.birth_year = load("birth_year")
+        self.death_year = load("death_year")
+        self.gender = load("gender")
+        # Older snapshots only have the normalised code
+        self.gender_value = (
+            load("gender_value") if os.path.exists(os.path.join(path, "gender_value.npy")) else None
+        )
+        self.gender_values: List[Optional[str]] = self.meta.get("gender_values", [])
+        self.is_alive = load("is_alive")
+        # Snapshots from before family trees hold the default tree only
+        self.tree_id = load("tree_id") if os.path.exists(os.path.join(path, "tree_id.npy")) else None
+
+    @property
+    def size(self) -> int:
+        return int(self.node_ids.shape[0])
+
+    def row_of(self, individual_id: int, tree_id: Optional[int] = None) -> Optional[int]:
+        """Row of the individual, None if absent (or, with `tree_id`, in another tree)."""
+        row = int(np.searchsorted(self.node_ids, individual_id))
+        if row >= self.size or int(self.node_ids[row]) != individual_id:
+            return None
+        if tree_id is not None and self.tree_of(row) != tree_id:
+            return None
+        return row
+
+    def tree_of(self, row: int) -> int:
+        return DEFAULT_TREE_ID if self.tree_id is None else int(self.tree_id[row])
+
+    def neighbours(self, kind: str, rows: np.ndarray) -> np.ndarray:
+        return _expand(self.offsets[kind], self.targets[kind], rows)
+
+    def bfs(self, root: int, kind: str, max_depth: int) -> List[np.ndarray]:
+        """
+        Generations 1..max_depth from row `root` along `kind` ("parents" for
+        ancestors, "children" for descendants); each person appears once, at
+        their shortest distance. One vectorised expansion per generation.
+        """
+        visited = np.zeros(self.size, dtype=bool)
+        visited[root] = True
+        frontier = np.array([root], dtype=np.int32)
+        generations: List[np.ndarray] = []
+        for _ in range(max_depth):
+            reached = np.unique(self.neighbours(kind, frontier))
+            frontier = reached[~visited[reached]]
+            if frontier.size == 0:
+                break
+            visited[frontier] = True
+            generations.append(frontier)
+        return generations
+
+    def siblings(self, root: int) -> np.ndarray:
+        """Rows sharing at least one parent with `root` (full and half siblings)."""
+        parents = self.neighbours("parents", np.array([root], dtype=np.int32))
+        siblings = np.unique(self.neighbours("children", np.unique(parents)))
+        return siblings[siblings != root]
+
+    def records(self, rows: np.ndarray, **extra) -> List[dict]:
+        """Compact node attributes for `rows`, as plain dicts for JSON."""
+        ids = self.node_ids[rows].tolist()
+        births = self.birth_year[rows].tolist()
+        deaths = self.death_year[rows].tolist()
+        if self.gender_value is not None:
+            genders = [self.gender_values[code] for code in self.gender_value[rows].tolist()]
+        else:
+            genders = [GENDER_NAMES.get(code) for code in self.gender[rows].tolist()]
+        alive = self.is_alive[rows].tolist()
+        return [
+            {
+                "id": ids[i],
+                "gender": genders[i],
+                "birth_year": births[i] or None,
+                "death_year": deaths[i] or None,
+                "is_alive": bool(alive[i]),
+                **extra,
+            }
+            for i in range(len(ids))
+        ]
+
+
+# ------------------------------ writing ------------------------------------ #
+
+def write_snapshot(
+        directory: str,
+        node_ids: np.ndarray,
+        attributes: Dict[str, np.ndarray],
+        parent_edges: tuple[np.ndarray, np.ndarray],
+        spouse_edges: tuple[np.ndarray, np.ndarray],
+        meta: Optional[dict] = None,
+) -> str:
+    """
+    Build and publish a new version. `node_ids` must be sorted and unique;
+    `attributes` are columns aligned with it; edges are individual ids
+    (parent -> child, and spouse pairs in either order). Edges to unknown
+    ids are dropped. Returns the version name.
+    """
+    n = int(node_ids.shape[0])
+
+    def rows(ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        found = np.searchsorted(node_ids, ids)
+        valid = found < n
+        valid[valid] = node_ids[found[valid]] == ids[valid]
+        return found, valid
+
+    parent_rows, parent_ok = rows(parent_edges[0])
+    child_rows, child_ok = rows(parent_edges[1])
+    ok = parent_ok & child_ok
+    parent_rows, child_rows = parent_rows[ok], child_rows[ok]
+
+    a_rows, a_ok = rows(spouse_edges[0])
+    b_rows, b_ok = rows(spouse_edges[1])
+    ok = a_ok & b_ok
+    a_rows, b_rows = a_rows[ok], b_rows[ok]
+
+    arrays = {"node_ids": node_ids.astype(np.int64)}
+    for kind, (src, dst) in {
+        "parents": (child_rows, parent_rows),
+        "children": (parent_rows, child_rows),
+        "spouses": (np.concatenate([a_rows, b_rows]), np.concatenate([b_rows, a_rows])),
+    }.items():
+        arrays[f"{kind}_offsets"], arrays[f"{kind}_targets"] = _build_csr(n, src, dst)
+    arrays.update(attributes)
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+    os.makedirs(directory, exist_ok=True)
+    staging = os.path.join(directory, f".{version}.tmp")
+    os.makedirs(staging)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({
+                **(meta or {}),
+                "version": version,
+                "nodes": n,
+                "parent_edges": int(parent_rows.size),
+                "spouse_edges": int(a_rows.size),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }, f)
+        os.rename(staging, os.path.join(directory, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Atomic publish: readers see either the old or the new name
+    pointer = os.path.join(directory, f".{_CURRENT_FILE}.{version}")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, _CURRENT_FILE))
+
+    _prune(directory, keep=settings.GRAPH_SNAPSHOT_KEEP)
+    logger.info("Published graph snapshot %s (%s nodes)", version, n)
+    return version
+
+
+def _prune(directory: str, keep: int) -> None:
+    """
+    Remove all but the newest `keep` versions. Workers still mapping a
+    removed version keep reading it (unlinked files stay valid while mapped).
+    """
+    versions = sorted(
+        name for name in os.listdir(directory)
+        if not name.startswith(".") and name != _CURRENT_FILE
+        and os.path.isdir(os.path.join(directory, name))
+    )
+    for name in versions[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+# ------------------------------ reading ------------------------------------ #
+
+_lock = threading.Lock()
+_current: Optional[CSRGraph] = None
+_checked_at = 0.0
+
+
+def _read_current_version(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, _CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def get_snapshot() -> Optional[CSRGraph]:
+    """
+    The live snapshot for this process (None until one was exported),
+    remapped when another process publishes a newer version.
+    """
+    global _current, _checked_at
+    now = monotonic()
+    if _current is not None and now - _checked_at < settings.GRAPH_SNAPSHOT_CHECK_SECONDS:
+        return _current
+
+    with _lock:
+        if _current is not None and now - _checked_at < settings.GRAPH_SNAPSHOT_CHECK_SECONDS:
+            return _current
+        directory = settings.GRAPH_SNAPSHOT_DIR
+        version = _read_current_version(directory)
+        if version is not None and (_current is None or _current.version != version):
+            try:
+                _current = CSRGraph(os.path.join(directory, version))
+                logger.info("Mapped graph snapshot %s", version)
+            except FileNotFoundError:
+                # Pruned between reading CURRENT and opening it; retry on the next call
+                logger.warning("Graph snapshot %s disappeared before it could be mapped", version)
+        _checked_at = now
+        return _current
@@ -1,10 +1,11 @@
-from typing import Generator
-from neo4j import Session
-from fastapi import Depends
+from typing import TYPE_CHECKING, Generator
 
 from app.graph.neo4j_client import neo4j_session
 
+if TYPE_CHECKING:
+    from neo4j import Session
 
-def get_neo4j_session() -> Generator[Session, None, None]:
+
+def get_neo4j_session() -> Generator["Session", None, None]:
     with neo4j_session() as session:
         yield session
@@ -1,22 +1,34 @@
 from contextlib import contextmanager
-from typing import Generator, Optional
+from time import perf_counter
+from typing import TYPE_CHECKING, Optional
 
-from neo4j import GraphDatabase, Driver
 from app.core.config import settings
+from app.core.metrics import NEO4J_SESSIONS_IN_USE, NEO4J_SESSION_SECONDS
 
-_driver: Optional[Driver] = None
+if TYPE_CHECKING:
+    from neo4j import Driver
 
-def get_driver() -> Driver:
+_driver: Optional["Driver"] = None
+
+def get_driver() -> "Driver":
     global _driver
     if _driver is None:
         if not (settings.NEO4J_URI and settings.NEO4J_USER and settings.NEO4J_PASSWORD):
             raise RuntimeError("Neo4j is not configured. Check NEO4J_* env vars.")
+        # Imported here: the driver package is only loaded once Neo4j is used
+        from neo4j import GraphDatabase
         _driver = GraphDatabase.driver(
             settings.NEO4J_URI,
             auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD)
         )
     return _driver
 
+def close_driver() -> None:
+    global _driver
+    if _driver is not None:
+        _driver.close()
+        _driver = None
+
 @contextmanager
 def neo4j_session():
     """
@@ -27,7 +39,11 @@ def neo4j_session():
     """
     driver = get_driver()
     session = driver.session()
+    started = perf_counter()
+    NEO4J_SESSIONS_IN_USE.inc()
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+        NEO4J_SESSIONS_IN_USE.dec()
+        NEO4J_SESSION_SECONDS.observe(perf_counter() - started)
\ No newline at end of file
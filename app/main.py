@@ -1,87 +1,273 @@
+import asyncio
 import logging
-from logging.handlers import RotatingFileHandler
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from time import time
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from starlette.concurrency import run_in_threadpool
+from time import perf_counter
 
-from app.api.individuals import router as individuals_router
-from app.api.auth import router as auth_router
-from app.api.relationship import router as relation_router
-from app.api.tree import router as tree_router
-from app.api.graph_admin import router as graph_admin_router
-from app.api.graph_tree import router as graph_tree_router
+from app.core.change_broker import change_broker
+from app.core.config import settings
+from app.core.logging_config import setup_logging, shutdown_logging, should_log_request
+from app.core.metrics import (
+    DB_POOL_TIMEOUTS,
+    DB_STATEMENT_TIMEOUTS,
+    REQUESTS_IN_FLIGHT,
+    mark_worker_dead,
+    observe_request,
+)
+from app.core.password_hashing import shutdown_executor
+from app.core.profiling import RequestProfiler, wants_profile, is_profiling_authorized
+from app.db.change_events import start_change_listener
+from app.db.database import dispose_engines, init_engines, is_statement_timeout
+from app.db.replica import READ_ONLY_POST_PATHS, WRITE_METHODS, mark_recent_write
+from app.db.query_stats import start_request_stats, check_n_plus_one
+from app.graph.neo4j_client import close_driver
+from app.services.job_service import shutdown_job_runner
 
 
-# ------------------------------------
-# Configure Logging
-# ------------------------------------
-LOG_FILE = "logs/app.log"
+logger = logging.getLogger("family_tree")
 
-# Create log directory if not exists
-import os
-os.makedirs("logs", exist_ok=True)
 
+# ----------------------------
+# Startup / shutdown
+# ----------------------------
+def _warm_up() -> None:
+    """
+    Pay first-request costs at boot (STARTUP_WARMUP): one pooled connection
+    per engine, the bcrypt context, the graph snapshot mapping and, when
+    configured, the Neo4j driver. Failures are logged, never fatal.
+    """
+    from app.core.password_hashing import get_pwd_context
+    from app.db import database
+    from app.graph.csr_snapshot import get_snapshot
+    from app.graph.neo4j_client import get_driver
 
-logger = logging.getLogger("family_tree")
-logger.setLevel(logging.DEBUG)
+    started = perf_counter()
+    steps = [
+        ("database", lambda: _ping(database.engine)),
+        ("password hashing", get_pwd_context),
+        ("graph snapshot", get_snapshot),
+    ]
+    if database.replica_engine is not None:
+        steps.append(("replica", lambda: _ping(database.replica_engine)))
+    if settings.NEO4J_URI:
+        steps.append(("neo4j", lambda: get_driver().verify_connectivity()))
+    for name, step in steps:
+        try:
+            step()
+        except Exception:
+            logger.warning("Warm-up step %s failed", name, exc_info=True)
+    logger.info("Warm-up finished in %.2fs", perf_counter() - started)
 
-# File handler
-file_handler = RotatingFileHandler(
-    LOG_FILE, maxBytes=2_000_000, backupCount=5
-)
-file_handler.setLevel(logging.DEBUG)
 
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
+def _ping(engine) -> None:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
 
-# Log format
-formatter = logging.Formatter(
-    "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
-)
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
 
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    engine = init_engines()
+    # Live change streams: this worker's broker, fed by every worker's writes on Postgres
+    change_broker.start(asyncio.get_running_loop())
+    change_listener = start_change_listener(engine, change_broker.publish)
+    if settings.STARTUP_WARMUP:
+        await run_in_threadpool(_warm_up)
+    yield
+    if change_listener is not None:
+        change_listener.stop()
+    change_broker.stop()
+    shutdown_executor()
+    shutdown_job_runner()
+    close_driver()
+    dispose_engines()
+    mark_worker_dead()
+    shutdown_logging()
 
 
 # ----------------------------
-# FastAPI app
+# Middleware
 # ----------------------------
-app = FastAPI(
-    title="Family Tree API",
-    version="1.0.0"
-)
+# Read-your-writes: after a successful write the client's reads go to the
+# primary for DB_READ_YOUR_WRITES_SECONDS (only matters with a replica)
+async def pin_reads_after_write(request: Request, call_next):
+    response = await call_next(request)
+    if (
+        settings.DATABASE_REPLICA_URL
+        and request.method in WRITE_METHODS
+        and response.status_code < 400
+        and request.url.path not in READ_ONLY_POST_PATHS
+    ):
+        mark_recent_write(response)
+    return response
 
-# Log every incoming request
-@app.middleware("http")
+
+# Log every completed request (sampled per route, see LOG_SAMPLE_RATES)
 async def log_requests(request: Request, call_next):
-    start_time = time()
-    logger.info(f"Incoming request: {request.method} {request.url}")
+    # Opt-in profiling: only requests carrying the flag pay for the admin check
+    profiler = None
+    if wants_profile(request):
+        if await is_profiling_authorized(request):
+            profiler = RequestProfiler()
+            profiler.start()
+        else:
+            logger.warning("Ignoring profiling flag on unauthorised request to %s", request.url.path)
+
+    start_time = perf_counter()
+    stats = start_request_stats()
+    status_code = 500
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+
+        if profiler is not None:
+            profiler.stop()
+            file_name = await run_in_threadpool(profiler.save, request.method, request.url.path)
+            response.headers["X-Profile-URL"] = f"/api/admin/profiles/{file_name}"
+
+        # Streaming responses may keep querying after this point; those
+        # queries are not included here
+        duration = perf_counter() - start_time
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats.total_time * 1000:.1f};desc="{stats.count} queries", '
+            f"app;dur={duration * 1000:.1f}"
+        )
+        return response
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        REQUESTS_IN_FLIGHT.dec()
+        duration = perf_counter() - start_time
+        path = request.url.path
+        # Route template (not the raw path) keeps metric labels bounded
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        observe_request(request.method, route_path, status_code, duration)
+        check_n_plus_one(f"{request.method} {route_path}", stats)
+
+        if (
+            status_code >= 500
+            or duration >= settings.LOG_SLOW_REQUEST_SECONDS
+            or should_log_request(path)
+        ):
+            logger.info(
+                "%s %s %s %.3fs (%s queries, %.1f ms db)",
+                request.method, path, status_code, duration, stats.count, stats.total_time * 1000,
+                extra={
+                    "method": request.method,
+                    "path": path,
+                    "query": request.url.query,
+                    "route": route_path,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "db_queries": stats.count,
+                    "db_ms": round(stats.total_time * 1000, 2),
+                },
+            )
 
-    response = await call_next(request)
 
-    duration = time() - start_time
-    logger.info(
-        f"Completed: {request.method} {request.url} "
-        f"Status: {response.status_code} "
-        f"Time: {duration:.3f}s"
+# ---------------------------
+# Database overload -> 503
+# ---------------------------
+def _database_busy(detail: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": detail},
+        headers={"Retry-After": str(settings.DB_RETRY_AFTER_SECONDS)},
     )
 
-    return response
+
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # No connection became free within DB_POOL_TIMEOUT
+    DB_POOL_TIMEOUTS.inc()
+    logger.warning("Connection pool exhausted: %s %s", request.method, request.url.path)
+    return _database_busy("Database is busy, please retry")
+
+
+async def operational_error_handler(request: Request, exc: OperationalError):
+    if not is_statement_timeout(exc):
+        raise exc
+    DB_STATEMENT_TIMEOUTS.inc()
+    logger.warning("Statement timeout: %s %s", request.method, request.url.path)
+    return _database_busy("Query took too long, please retry or narrow the request")
 
 
 # ---------------------------
 # Routers
 # ---------------------------
-app.include_router(individuals_router)
-app.include_router(auth_router)
-app.include_router(relation_router)
-app.include_router(tree_router)
-app.include_router(graph_admin_router)
-app.include_router(graph_tree_router)
-
-@app.get("/")
+def _include_routers(app: FastAPI) -> None:
+    from app.api.individuals import router as individuals_router
+    from app.api.auth import router as auth_router
+    from app.api.relationship import router as relation_router
+    from app.api.tree import router as tree_router
+    from app.api.graph_admin import router as graph_admin_router
+    from app.api.graph_tree import router as graph_tree_router
+    from app.api.metrics import router as metrics_router
+    from app.api.profiles import router as profiles_router
+    from app.api.aggregates import router as aggregates_router
+    from app.api.lifespans import router as lifespans_router
+    from app.api.snapshot_tree import router as snapshot_tree_router
+    from app.api.analytics import router as analytics_router
+    from app.api.duplicates import router as duplicates_router
+    from app.api.family_trees import router as family_trees_router
+    from app.api.tree_changes import router as tree_changes_router
+
+    app.include_router(individuals_router)
+    app.include_router(auth_router)
+    app.include_router(relation_router)
+    app.include_router(tree_router)
+    app.include_router(graph_admin_router)
+    app.include_router(graph_tree_router)
+    app.include_router(metrics_router)
+    app.include_router(profiles_router)
+    app.include_router(aggregates_router)
+    app.include_router(lifespans_router)
+    app.include_router(snapshot_tree_router)
+    app.include_router(analytics_router)
+    app.include_router(duplicates_router)
+    app.include_router(family_trees_router)
+    app.include_router(tree_changes_router)
+
+
 def root():
     logger.info("Health check endpoint requested")
     return {"message":"Family Tree API is running 🚀"}
+
+
+# ----------------------------
+# FastAPI app
+# ----------------------------
+def create_app() -> FastAPI:
+    """
+    Build the application. Engines, drivers and logging are set up by the
+    lifespan, not here, so building (or importing) the app does no I/O.
+    Serve with `uvicorn app.main:create_app --factory`, or `app.main:app`.
+    """
+    app = FastAPI(
+        title="Family Tree API",
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    # Registered innermost first: log_requests wraps pin_reads_after_write
+    app.middleware("http")(pin_reads_after_write)
+    app.middleware("http")(log_requests)
+    app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+    app.add_exception_handler(OperationalError, operational_error_handler)
+    _include_routers(app)
+    app.get("/")(root)
+    return app
+
+
+def __getattr__(name: str):
+    # `app.main:app` is built on first access, so importing this module for
+    # create_app (or anything else) does not pay for every router
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,7 @@
 from .user import User
+from .family_tree import FamilyTree
 from .individual import Individual
-from .relationship import Relationship
\ No newline at end of file
+from .relationship import Relationship
+from .individual_aggregate import IndividualAggregate
+from .job import Job
+from .duplicate_suggestion import DuplicateSuggestion
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey, TIMESTAMP, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+
+class DuplicateSuggestion(Base):
+    """
+    A pair of individuals that the duplicate-detection job thinks are the
+    same person (individual_id < duplicate_id), ranked by score. Dismissed
+    pairs are kept so later runs do not suggest them again; merging deletes
+    the duplicate and, with it, its suggestions.
+    """
+    __tablename__ = "duplicate_suggestions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    individual_id = Column(Integer, ForeignKey("individuals.id", ondelete="CASCADE"), nullable=False)
+    duplicate_id = Column(Integer, ForeignKey("individuals.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)
+    reasons = Column(JSON, nullable=True)
+    status = Column(String(20), nullable=False, default="open")  # open, dismissed
+    job_id = Column(Integer, nullable=True)
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    individual = relationship("Individual", foreign_keys=[individual_id], lazy="joined")
+    duplicate = relationship("Individual", foreign_keys=[duplicate_id], lazy="joined")
+
+    __table_args__ = (
+        UniqueConstraint("individual_id", "duplicate_id", name="uq_duplicate_suggestions_pair"),
+        Index("ix_duplicate_suggestions_status_score", "status", "score"),
+        Index("ix_duplicate_suggestions_duplicate", "duplicate_id"),
+    )
@@ -0,0 +1,32 @@
+from sqlalchemy import BigInteger, Column, Integer, String, TIMESTAMP, DDL, event
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+# Created with the table; owns the data from before trees existed and serves
+# requests that do not name a tree
+DEFAULT_TREE_ID = 1
+
+
+class FamilyTree(Base):
+    """
+    A tenant: one family's individuals and relationships. Every request
+    session is scoped to one tree (see app.db.tenancy), and relationships
+    never cross trees.
+    """
+    __tablename__ = "family_trees"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
+    # Bumped by every flush that writes the tree's individuals or
+    # relationships (see app.repositories.data_version_repository)
+    data_version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
+# First row of an empty table, so it gets DEFAULT_TREE_ID on every backend
+event.listen(
+    FamilyTree.__table__,
+    "after_create",
+    DDL("INSERT INTO family_trees (name) VALUES ('Default')"),
+)
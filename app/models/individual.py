@@ -1,11 +1,38 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text,Date, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Boolean, Text,Date, TIMESTAMP, ForeignKey, Index, case, literal_column
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import Base
+from app.models.family_tree import DEFAULT_TREE_ID
+from app.models.individual_aggregate import IndividualAggregate
+
+
+def effective_death_date(birth_date, death_date):
+    """
+    death_date, or NULL (still open) when it is before the birth date;
+    inconsistent records then behave like an unknown death.
+    """
+    return case((birth_date.is_(None) | (death_date >= birth_date), death_date), else_=None)
+
+
+def lifespan_range(birth_date, death_date):
+    """
+    Postgres daterange over the inclusive lifespan; unknown ends are
+    unbounded. Queries must use this exact expression to hit the GiST index.
+    """
+    return func.daterange(birth_date, effective_death_date(birth_date, death_date), literal_column("'[]'"))
+
 
 class Individual(Base):
     __tablename__ = "individuals"
 
     id = Column(Integer, primary_key=True, index=True)
+    tree_id = Column(
+        Integer,
+        ForeignKey("family_trees.id"),
+        nullable=False,
+        default=DEFAULT_TREE_ID,
+        server_default=str(DEFAULT_TREE_ID),
+    )
     first_name = Column(String(255), nullable=False)
     last_name = Column(String(255), nullable=False)
     gender = Column(String(20), nullable=False)
@@ -17,3 +44,25 @@ class Individual(Base):
 
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    # One-to-one; joined so serialising individuals never costs an extra query each
+    aggregates = relationship(
+        IndividualAggregate,
+        uselist=False,
+        lazy="joined",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+# Lifespan lookups: GiST over the range on Postgres; elsewhere (SQLite) the
+# (birth_date, death_date) index serves as a sorted-interval index
+Index(
+    "ix_individuals_lifespan",
+    lifespan_range(Individual.birth_date, Individual.death_date),
+    postgresql_using="gist",
+).ddl_if(dialect="postgresql")
+# Per-tree listings, counts and data versions
+Index("ix_individuals_tree", Individual.tree_id, Individual.id)
+Index("ix_individuals_birth_death", Individual.birth_date, Individual.death_date)
+Index("ix_individuals_last_name_birth", Individual.last_name, Individual.birth_date)
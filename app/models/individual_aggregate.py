@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, TIMESTAMP
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+class IndividualAggregate(Base):
+    """
+    Precomputed per-individual counters, maintained incrementally by
+    AggregateService and rebuilt by recompute_all_aggregates.
+    `stale` rows are known to be off until the next exact refresh.
+    """
+    __tablename__ = "individual_aggregates"
+
+    individual_id = Column(Integer, ForeignKey("individuals.id", ondelete="CASCADE"), primary_key=True)
+    descendant_count = Column(Integer, nullable=False, default=0, server_default="0")
+    ancestor_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Generations of known descendants below this person (0 = no children)
+    generation_depth = Column(Integer, nullable=False, default=0, server_default="0")
+    living_descendant_count = Column(Integer, nullable=False, default=0, server_default="0")
+    stale = Column(Boolean, nullable=False, default=False, server_default="false")
+
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, Boolean, Text, JSON, TIMESTAMP, Index, text
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+# Statuses that hold the per-type lock
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+class Job(Base):
+    """
+    A background job run by JobService (graph sync, recomputations, bulk
+    imports/exports). The row is the source of truth for status/progress,
+    so any worker process can answer GET /jobs/{id}.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    params = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    processed = Column(Integer, nullable=False, default=0, server_default="0")
+    total = Column(Integer, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False, server_default="false")
+    worker = Column(String(255), nullable=True)
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    started_at = Column(TIMESTAMP, nullable=True)
+    finished_at = Column(TIMESTAMP, nullable=True)
+    # Touched on every progress write; a running job that stops beating is presumed dead
+    heartbeat_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        # One queued/running job per type, enforced by the database across workers
+        Index(
+            "uq_jobs_active_type",
+            "job_type",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+        Index("ix_jobs_type_created", "job_type", "created_at"),
+    )
@@ -1,11 +1,26 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.models.base import Base
+from app.models.family_tree import DEFAULT_TREE_ID
 
 class Relationship(Base):
+    """
+    On Postgres the table is LIST-partitioned by tree_id (see the
+    family_trees migration): trees share a default partition until
+    FamilyTreeService.create_partition gives one its own, and the primary
+    key there is (tree_id, id).
+    """
     __tablename__ = "relationships"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Always the tree of both individuals (stamped by app.db.tenancy)
+    tree_id = Column(
+        Integer,
+        ForeignKey("family_trees.id"),
+        nullable=False,
+        default=DEFAULT_TREE_ID,
+        server_default=str(DEFAULT_TREE_ID),
+    )
     individual_id = Column(Integer, ForeignKey("individuals.id", ondelete="CASCADE"))
     related_individual_id = Column(Integer, ForeignKey("individuals.id", ondelete="CASCADE"))
     relationship_type = Column(String(50), nullable=False)  # parent, child, spouse
@@ -14,4 +29,10 @@ class Relationship(Base):
 
     # ORM relations (optional)
     individual = relationship("Individual", foreign_keys=[individual_id])
-    related_individual = relationship("Individual", foreign_keys=[related_individual_id])
\ No newline at end of file
+    related_individual = relationship("Individual", foreign_keys=[related_individual_id])
+
+    # Traversals look up one side within the session's tree
+    __table_args__ = (
+        Index("ix_relationships_tree_individual", "tree_id", "individual_id", "relationship_type"),
+        Index("ix_relationships_tree_related", "tree_id", "related_individual_id", "relationship_type"),
+    )
@@ -0,0 +1,198 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import func, insert, select, text, union, update
+from sqlalchemy.orm import Session
+
+from app.models.individual import Individual
+from app.models.individual_aggregate import IndividualAggregate
+from app.models.relationship import Relationship
+
+_CHUNK = 1000
+
+
+def _chunks(ids: Iterable[int]) -> Iterable[List[int]]:
+    ids = list(ids)
+    for start in range(0, len(ids), _CHUNK):
+        yield ids[start:start + _CHUNK]
+
+
+def parent_edges():
+    """
+    Every parent link as (parent_id, child_id), whichever way it was stored
+    ('parent': parent -> child, 'child': child -> parent).
+    """
+    return union(
+        select(
+            Relationship.individual_id.label("parent_id"),
+            Relationship.related_individual_id.label("child_id"),
+        ).where(Relationship.relationship_type == "parent"),
+        select(
+            Relationship.related_individual_id.label("parent_id"),
+            Relationship.individual_id.label("child_id"),
+        ).where(Relationship.relationship_type == "child"),
+    ).subquery("parent_edges")
+
+
+def get_child_pairs(db: Session, parent_ids: Iterable[int]) -> Set[Tuple[int, int]]:
+    edges = parent_edges()
+    pairs: Set[Tuple[int, int]] = set()
+    for chunk in _chunks(parent_ids):
+        stmt = select(edges.c.parent_id, edges.c.child_id).where(edges.c.parent_id.in_(chunk))
+        pairs.update((p, c) for p, c in db.execute(stmt).all())
+    return pairs
+
+
+def count_living(db: Session, ids: Iterable[int]) -> int:
+    total = 0
+    for chunk in _chunks(ids):
+        stmt = select(func.count()).select_from(Individual).where(
+            Individual.id.in_(chunk),
+            func.coalesce(Individual.is_alive, True).is_(True),
+        )
+        total += db.execute(stmt).scalar() or 0
+    return total
+
+
+def ensure_aggregate_rows(db: Session, ids: Iterable[int]) -> None:
+    """
+    Rows missing for existing individuals (data from before aggregates were
+    tracked) are created as stale, since zero would be wrong.
+    """
+    for chunk in _chunks(ids):
+        existing = set(db.execute(
+            select(IndividualAggregate.individual_id).where(IndividualAggregate.individual_id.in_(chunk))
+        ).scalars())
+        missing = [i for i in chunk if i not in existing]
+        if missing:
+            db.execute(insert(IndividualAggregate), [{"individual_id": i, "stale": True} for i in missing])
+
+
+def add_to_counters(db: Session, ids: Iterable[int], **deltas: int) -> None:
+    """counter += delta for every row in `ids`, e.g. descendant_count=3."""
+    values = {
+        name: getattr(IndividualAggregate, name) + delta
+        for name, delta in deltas.items() if delta
+    }
+    if not values:
+        return
+    for chunk in _chunks(ids):
+        db.execute(update(IndividualAggregate).where(IndividualAggregate.individual_id.in_(chunk)).values(**values))
+
+
+def get_generation_depths(db: Session, ids: Iterable[int]) -> Dict[int, int]:
+    result: Dict[int, int] = {}
+    for chunk in _chunks(ids):
+        stmt = select(IndividualAggregate.individual_id, IndividualAggregate.generation_depth).where(
+            IndividualAggregate.individual_id.in_(chunk)
+        )
+        result.update(db.execute(stmt).all())
+    return result
+
+
+def set_generation_depths(db: Session, depths: Dict[int, int]) -> None:
+    by_value: Dict[int, List[int]] = {}
+    for individual_id, depth in depths.items():
+        by_value.setdefault(depth, []).append(individual_id)
+    for depth, ids in by_value.items():
+        for chunk in _chunks(ids):
+            db.execute(
+                update(IndividualAggregate)
+                .where(IndividualAggregate.individual_id.in_(chunk))
+                .values(generation_depth=depth)
+            )
+
+
+def mark_stale(db: Session, ids: Iterable[int]) -> None:
+    for chunk in _chunks(ids):
+        db.execute(
+            update(IndividualAggregate).where(IndividualAggregate.individual_id.in_(chunk)).values(stale=True)
+        )
+
+
+def get_stale_ids(db: Session, limit: int) -> List[int]:
+    stmt = (
+        select(IndividualAggregate.individual_id)
+        .where(IndividualAggregate.stale.is_(True))
+        .order_by(IndividualAggregate.updated_at, IndividualAggregate.individual_id)
+        .limit(limit)
+    )
+    return list(db.execute(stmt).scalars())
+
+
+def write_exact(db: Session, individual_id: int, **counters: int) -> None:
+    db.execute(
+        update(IndividualAggregate)
+        .where(IndividualAggregate.individual_id == individual_id)
+        .values(stale=False, **counters)
+    )
+
+
+def recompute_all_aggregates(db: Session) -> int:
+    """
+    Full rebuild, set-based: the ancestor/descendant closure is grown one
+    generation per INSERT ... SELECT (keeping the shortest depth per pair),
+    then every counter is a GROUP BY over it. Returns the number of rows.
+    The caller commits.
+    """
+    edges = parent_edges()
+    conn = db.connection()
+
+    conn.execute(text("DROP TABLE IF EXISTS agg_edges"))
+    conn.execute(text("DROP TABLE IF EXISTS agg_closure"))
+    conn.execute(text("CREATE TEMPORARY TABLE agg_edges (parent_id INTEGER NOT NULL, child_id INTEGER NOT NULL)"))
+    conn.execute(text(
+        "CREATE TEMPORARY TABLE agg_closure ("
+        " ancestor_id INTEGER NOT NULL, descendant_id INTEGER NOT NULL, depth INTEGER NOT NULL,"
+        " PRIMARY KEY (ancestor_id, descendant_id))"
+    ))
+    conn.execute(text("CREATE INDEX agg_edges_parent ON agg_edges (parent_id)"))
+
+    pairs = conn.execute(select(edges.c.parent_id, edges.c.child_id)).all()
+    if pairs:
+        conn.execute(
+            text("INSERT INTO agg_edges (parent_id, child_id) VALUES (:p, :c)"),
+            [{"p": p, "c": c} for p, c in pairs if p is not None and c is not None and p != c],
+        )
+
+    conn.execute(text(
+        "INSERT INTO agg_closure (ancestor_id, descendant_id, depth)"
+        " SELECT DISTINCT parent_id, child_id, 1 FROM agg_edges"
+    ))
+    depth = 1
+    while True:
+        # Generation depth+1 from generation depth; pairs already known keep their shorter depth
+        inserted = conn.execute(text(
+            "INSERT INTO agg_closure (ancestor_id, descendant_id, depth)"
+            " SELECT DISTINCT c.ancestor_id, e.child_id, :next_depth"
+            " FROM agg_closure c JOIN agg_edges e ON e.parent_id = c.descendant_id"
+            " WHERE c.depth = :depth AND e.child_id <> c.ancestor_id"
+            " ON CONFLICT (ancestor_id, descendant_id) DO NOTHING"
+        ), {"depth": depth, "next_depth": depth + 1}).rowcount
+        if not inserted:
+            break
+        depth += 1
+
+    db.execute(IndividualAggregate.__table__.delete())
+    conn.execute(text(
+        """
+        INSERT INTO individual_aggregates
+            (individual_id, descendant_count, ancestor_count, generation_depth, living_descendant_count, stale)
+        SELECT i.id,
+               COALESCE(d.cnt, 0), COALESCE(a.cnt, 0), COALESCE(d.max_depth, 0), COALESCE(d.living, 0),
+               :stale
+        FROM individuals i
+        LEFT JOIN (
+            SELECT c.ancestor_id AS id, COUNT(*) AS cnt, MAX(c.depth) AS max_depth,
+                   SUM(CASE WHEN COALESCE(x.is_alive, :alive) THEN 1 ELSE 0 END) AS living
+            FROM agg_closure c JOIN individuals x ON x.id = c.descendant_id
+            GROUP BY c.ancestor_id
+        ) d ON d.id = i.id
+        LEFT JOIN (
+            SELECT descendant_id AS id, COUNT(*) AS cnt FROM agg_closure GROUP BY descendant_id
+        ) a ON a.id = i.id
+        """
+    ), {"stale": False, "alive": True})
+
+    conn.execute(text("DROP TABLE agg_closure"))
+    conn.execute(text("DROP TABLE agg_edges"))
+    return db.execute(select(func.count()).select_from(IndividualAggregate)).scalar() or 0
@@ -0,0 +1,81 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import extract, select
+from sqlalchemy.orm import Session
+
+from app.graph.csr_snapshot import gender_code
+from app.models.individual import Individual
+from app.models.relationship import Relationship
+from app.repositories.aggregate_repository import parent_edges
+
+_BATCH = 50_000
+
+
+def _stream(db: Session, stmt):
+    """Row batches from a server-side cursor (yield_per), so memory stays flat."""
+    return db.execute(stmt.execution_options(yield_per=_BATCH)).partitions(_BATCH)
+
+
+def load_individual_columns(db: Session) -> Tuple[Dict[str, np.ndarray], List[str]]:
+    """
+    Columns of every individual, ordered by id: id (int64), birth_year and
+    death_year (int16, 0 = unknown), gender (int8, see gender_code: 1 male,
+    2 female, 3 other, 0 unknown) and surname (int32 index into the
+    returned list of distinct surnames).
+    """
+    stmt = (
+        select(
+            Individual.id,
+            extract("year", Individual.birth_date),
+            extract("year", Individual.death_date),
+            Individual.gender,
+            Individual.last_name,
+        )
+        .order_by(Individual.id)
+    )
+    surname_codes: Dict[str, int] = {}
+    chunks: Dict[str, list] = {name: [] for name in ("id", "birth_year", "death_year", "gender", "surname")}
+
+    for batch in _stream(db, stmt):
+        count = len(batch)
+        ids, births, deaths, genders, surnames = zip(*batch)
+        chunks["id"].append(np.fromiter(ids, dtype=np.int64, count=count))
+        chunks["birth_year"].append(np.fromiter((int(b) if b else 0 for b in births), dtype=np.int16, count=count))
+        chunks["death_year"].append(np.fromiter((int(d) if d else 0 for d in deaths), dtype=np.int16, count=count))
+        chunks["gender"].append(np.fromiter(
+            (gender_code(g) for g in genders), dtype=np.int8, count=count
+        ))
+        chunks["surname"].append(np.fromiter(
+            (surname_codes.setdefault(s or "", len(surname_codes)) for s in surnames), dtype=np.int32, count=count
+        ))
+
+    dtypes = {"id": np.int64, "birth_year": np.int16, "death_year": np.int16, "gender": np.int8, "surname": np.int32}
+    columns = {
+        name: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[name])
+        for name, parts in chunks.items()
+    }
+    return columns, list(surname_codes)
+
+
+def _pairs(db: Session, stmt) -> Tuple[np.ndarray, np.ndarray]:
+    left, right = [], []
+    for batch in _stream(db, stmt):
+        batch = [row for row in batch if row[0] is not None and row[1] is not None]
+        left.append(np.fromiter((row[0] for row in batch), dtype=np.int64, count=len(batch)))
+        right.append(np.fromiter((row[1] for row in batch), dtype=np.int64, count=len(batch)))
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(left), np.concatenate(right)
+
+
+def load_parent_pairs(db: Session) -> Tuple[np.ndarray, np.ndarray]:
+    """(parent ids, child ids) over both stored representations."""
+    edges = parent_edges()
+    return _pairs(db, select(edges.c.parent_id, edges.c.child_id))
+
+
+def load_spouse_pairs(db: Session) -> Tuple[np.ndarray, np.ndarray]:
+    return _pairs(db, select(Relationship.individual_id, Relationship.related_individual_id).where(
+        Relationship.relationship_type == "spouse"
+    ))
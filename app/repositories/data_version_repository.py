@@ -0,0 +1,47 @@
+from typing import Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.tenancy import session_tree_id
+from app.models.family_tree import FamilyTree
+
+
+def get_data_version(db: Session) -> str:
+    """
+    Cheap fingerprint of the family graph, used as a cache key component.
+    Any insert, update or delete on individuals/relationships changes it,
+    and it is shared by every worker because it comes from the database.
+    In a tree-scoped session it covers that tree only (and names it), so
+    writes to one family leave the other families' caches warm.
+
+    It is the tree's data_version counter, so reading it is a primary key
+    lookup. Unscoped sessions get the sum over all trees, which changes
+    whenever any counter does since they only grow.
+    """
+    tree_id = session_tree_id(db)
+    if tree_id is None:
+        total = db.execute(select(func.coalesce(func.sum(FamilyTree.data_version), 0))).scalar()
+        return f"all:{total}"
+
+    version = db.execute(select(FamilyTree.data_version).where(FamilyTree.id == tree_id)).scalar()
+    return f"t{tree_id}:{version}"
+
+
+def bump_data_versions(connection: Connection, tree_ids: Iterable[int]) -> None:
+    """
+    Advance the data version of `tree_ids` inside the caller's transaction,
+    so it changes exactly when the writes commit. Sessions do this once per
+    transaction, right before commit (see app.db.change_events), so a tree's
+    row is only locked for the commit itself; writers that bypass the ORM
+    call it themselves, as late as they can. Call it once per transaction:
+    trees are locked in id order, which keeps concurrent multi-tree writers
+    from deadlocking on them.
+    """
+    for tree_id in sorted(set(tree_ids)):
+        connection.execute(
+            update(FamilyTree)
+            .where(FamilyTree.id == tree_id)
+            .values(data_version=FamilyTree.data_version + 1)
+        )
@@ -0,0 +1,109 @@
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.duplicate_suggestion import DuplicateSuggestion
+from app.models.individual import Individual
+from app.models.relationship import Relationship
+
+_BATCH = 10_000
+
+
+def iter_candidate_rows(db: Session) -> Iterator[tuple]:
+    """(id, tree_id, first_name, last_name, gender, birth_date, death_date) of everyone, streamed."""
+    stmt = select(
+        Individual.id,
+        Individual.tree_id,
+        Individual.first_name,
+        Individual.last_name,
+        Individual.gender,
+        Individual.birth_date,
+        Individual.death_date,
+    ).execution_options(yield_per=_BATCH)
+    for partition in db.execute(stmt).partitions(_BATCH):
+        yield from partition
+
+
+def get_reviewed_pairs(db: Session) -> Set[Tuple[int, int]]:
+    """Pairs a reviewer dismissed; never suggested again."""
+    stmt = select(DuplicateSuggestion.individual_id, DuplicateSuggestion.duplicate_id).where(
+        DuplicateSuggestion.status != "open"
+    )
+    return {(a, b) for a, b in db.execute(stmt)}
+
+
+def replace_open_suggestions(db: Session, suggestions: Iterable[dict], job_id: Optional[int] = None) -> int:
+    """
+    Swap the open suggestions for `suggestions` (dicts with individual_id <
+    duplicate_id, score, reasons) in one transaction. Returns rows written.
+    """
+    reviewed = get_reviewed_pairs(db)
+    db.execute(delete(DuplicateSuggestion).where(DuplicateSuggestion.status == "open"))
+    written, batch = 0, []
+    for suggestion in suggestions:
+        if (suggestion["individual_id"], suggestion["duplicate_id"]) in reviewed:
+            continue
+        batch.append({**suggestion, "status": "open", "job_id": job_id})
+        if len(batch) >= _BATCH:
+            db.execute(insert(DuplicateSuggestion), batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(DuplicateSuggestion), batch)
+        written += len(batch)
+    db.commit()
+    return written
+
+
+def _in_session_tree(stmt):
+    # Joining the individual lets a tree-scoped session filter suggestions
+    # by tree; pairs never span trees
+    return stmt.join(Individual, Individual.id == DuplicateSuggestion.individual_id)
+
+
+def list_suggestions(
+        db: Session,
+        status: str = "open",
+        min_score: float = 0.0,
+        skip: int = 0,
+        limit: int = 50,
+) -> List[DuplicateSuggestion]:
+    stmt = (
+        _in_session_tree(select(DuplicateSuggestion))
+        .where(DuplicateSuggestion.status == status, DuplicateSuggestion.score >= min_score)
+        .order_by(DuplicateSuggestion.score.desc(), DuplicateSuggestion.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return list(db.execute(stmt).scalars().unique())
+
+
+def get_suggestion(db: Session, suggestion_id: int) -> Optional[DuplicateSuggestion]:
+    stmt = _in_session_tree(select(DuplicateSuggestion)).where(DuplicateSuggestion.id == suggestion_id)
+    return db.execute(stmt).scalars().unique().one_or_none()
+
+
+def get_relationships_of(db: Session, individual_id: int) -> List[Relationship]:
+    stmt = select(Relationship).where(or_(
+        Relationship.individual_id == individual_id,
+        Relationship.related_individual_id == individual_id,
+    ))
+    return list(db.execute(stmt).scalars())
+
+
+def relationship_exists(db: Session, individual_id: int, related_id: int, rel_type: str) -> bool:
+    stmt = select(Relationship.id).where(
+        Relationship.individual_id == individual_id,
+        Relationship.related_individual_id == related_id,
+        Relationship.relationship_type == rel_type,
+    ).limit(1)
+    return db.execute(stmt).first() is not None
+
+
+def delete_suggestions_involving(db: Session, individual_id: int) -> None:
+    """Staged; the ON DELETE CASCADE does the same where foreign keys are enforced."""
+    db.execute(delete(DuplicateSuggestion).where(or_(
+        DuplicateSuggestion.individual_id == individual_id,
+        DuplicateSuggestion.duplicate_id == individual_id,
+    )))
@@ -0,0 +1,53 @@
+from typing import List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.models.family_tree import FamilyTree
+
+# Partitions of the (Postgres-only) LIST-partitioned relationships table
+DEFAULT_PARTITION = "relationships_default"
+
+
+def create_family_tree(db: Session, name: str) -> FamilyTree:
+    tree = FamilyTree(name=name)
+    db.add(tree)
+    db.commit()
+    db.refresh(tree)
+    return tree
+
+
+def get_family_tree(db: Session, tree_id: int) -> Optional[FamilyTree]:
+    return db.get(FamilyTree, tree_id)
+
+
+def list_family_trees(db: Session, skip: int = 0, limit: int = 100) -> List[FamilyTree]:
+    return list(db.execute(select(FamilyTree).order_by(FamilyTree.id).offset(skip).limit(limit)).scalars())
+
+
+def tree_partition_name(tree_id: int) -> str:
+    return f"relationships_tree_{int(tree_id)}"
+
+
+def partition_exists(db: Session, name: str) -> bool:
+    return db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def move_tree_to_partition(db: Session, tree_id: int) -> int:
+    """
+    Move a tree's relationships out of the default partition into a new
+    partition of their own, in the caller's transaction. Returns rows moved.
+    """
+    name = tree_partition_name(tree_id)
+    tree_id = int(tree_id)
+    db.execute(text(f"CREATE TABLE {name} (LIKE relationships INCLUDING DEFAULTS)"))
+    # Lets ATTACH skip scanning the new partition
+    db.execute(text(f"ALTER TABLE {name} ADD CONSTRAINT {name}_tree CHECK (tree_id = {tree_id})"))
+    moved = db.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE tree_id = :tree_id"),
+        {"tree_id": tree_id},
+    ).rowcount
+    db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE tree_id = :tree_id"), {"tree_id": tree_id})
+    # Indexes, the primary key and foreign keys are cloned onto it here
+    db.execute(text(f"ALTER TABLE relationships ATTACH PARTITION {name} FOR VALUES IN ({tree_id})"))
+    return moved
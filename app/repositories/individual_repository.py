@@ -1,7 +1,13 @@
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.models.individual import Individual
 from app.schemas.individual_schema import IndividualCreate, IndividualUpdate
 
+# Ids per IN (...) query; stays under every backend's bound-parameter limit
+_IN_CHUNK = 1000
+
 def create_individual(db:Session, individual_data:IndividualCreate):
     new_individual = Individual(**individual_data.model_dump())
     db.add(new_individual)
@@ -10,7 +16,32 @@ def create_individual(db:Session, individual_data:IndividualCreate):
     return new_individual
 
 def get_individual(db: Session, individual_id:int):
-    return db.query(Individual).filter(Individual.id == individual_id).first()
+    # Primary-key lookup; no query at all if the session already holds the row
+    return db.get(Individual, individual_id)
+
+def get_individuals_by_ids(
+        db: Session,
+        ids: Sequence[int],
+        columns: Optional[Sequence[str]] = None,
+) -> Dict[int, Any]:
+    """
+    {id: Individual} for the ids that exist, one IN query per chunk. With
+    `columns`, only those columns are selected and the values are
+    {column: value} dicts (always including "id").
+    """
+    found: Dict[int, Any] = {}
+    if columns is not None:
+        names = ["id", *(c for c in columns if c != "id")]
+        selected = [getattr(Individual, name) for name in names]
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start:start + _IN_CHUNK]
+        if columns is None:
+            rows = db.execute(select(Individual).where(Individual.id.in_(chunk))).unique().scalars()
+            found.update((individual.id, individual) for individual in rows)
+        else:
+            rows = db.execute(select(*selected).where(Individual.id.in_(chunk)))
+            found.update((row[0], dict(zip(names, row))) for row in rows)
+    return found
 
 def get_all_individuals(db: Session, skip: int = 0, limit: int = 100):
     return db.query(Individual).offset(skip).limit(limit).all()
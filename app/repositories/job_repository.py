@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.job import ACTIVE_JOB_STATUSES, Job
+
+
+def _now() -> datetime:
+    # Naive UTC, like the TIMESTAMP columns
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def create_job(db: Session, job_type: str, params: Optional[dict] = None) -> Optional[Job]:
+    """Queued job, or None if one of this type is already queued/running."""
+    job = Job(job_type=job_type, status="queued", params=params or {}, heartbeat_at=_now())
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Optional[Job]:
+    return db.get(Job, job_id)
+
+
+def get_active_job(db: Session, job_type: str) -> Optional[Job]:
+    stmt = select(Job).where(Job.job_type == job_type, Job.status.in_(ACTIVE_JOB_STATUSES))
+    return db.execute(stmt).scalars().first()
+
+
+def list_jobs(db: Session, job_type: Optional[str] = None, limit: int = 50) -> List[Job]:
+    stmt = select(Job).order_by(Job.id.desc()).limit(limit)
+    if job_type:
+        stmt = stmt.where(Job.job_type == job_type)
+    return list(db.execute(stmt).scalars())
+
+
+def start_job(db: Session, job_id: int, worker: str) -> bool:
+    """queued -> running; False if it was cancelled (or claimed) meanwhile."""
+    now = _now()
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == "queued")
+        .values(status="running", worker=worker, started_at=now, heartbeat_at=now)
+    ).rowcount
+    db.commit()
+    return bool(claimed)
+
+
+def record_progress(db: Session, job_id: int, processed: int, total: Optional[int]) -> bool:
+    """Store progress (doubles as heartbeat); returns whether cancellation was requested."""
+    values = {"processed": processed, "heartbeat_at": _now()}
+    if total is not None:
+        values["total"] = total
+    db.execute(update(Job).where(Job.id == job_id).values(**values))
+    db.commit()
+    return bool(db.execute(select(Job.cancel_requested).where(Job.id == job_id)).scalar())
+
+
+def finish_job(
+        db: Session,
+        job_id: int,
+        status: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+) -> None:
+    now = _now()
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(status=status, result=result, error=error, finished_at=now, heartbeat_at=now)
+    )
+    db.commit()
+
+
+def request_cancel(db: Session, job_id: int) -> Optional[Job]:
+    """
+    Queued jobs are cancelled at once; running ones stop at their next
+    progress report. Finished jobs are returned unchanged.
+    """
+    job = get_job(db, job_id)
+    if job is None:
+        return None
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.cancel_requested = True
+        job.finished_at = _now()
+    elif job.status == "running":
+        job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def fail_abandoned_jobs(db: Session, stale_after_seconds: float) -> int:
+    """
+    Release the per-type lock held by jobs whose worker died (no heartbeat
+    for `stale_after_seconds`).
+    """
+    cutoff = _now() - timedelta(seconds=stale_after_seconds)
+    released = db.execute(
+        update(Job)
+        .where(Job.status.in_(ACTIVE_JOB_STATUSES), Job.heartbeat_at < cutoff)
+        .values(status="failed", error="Worker stopped reporting progress", finished_at=_now())
+    ).rowcount
+    db.commit()
+    return released
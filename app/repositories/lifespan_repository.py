@@ -0,0 +1,76 @@
+from datetime import date
+from typing import Collection, List, Optional
+
+from sqlalchemy import and_, func, literal_column, or_, select, true
+from sqlalchemy.orm import Session
+
+from app.models.individual import Individual, effective_death_date, lifespan_range
+
+# Bind parameters per IN (...) when a page is restricted to a set of ids
+_IN_CHUNK = 1000
+
+_death = effective_death_date(Individual.birth_date, Individual.death_date)
+
+# Someone with neither date would match every period
+_has_known_date = or_(Individual.birth_date.isnot(None), Individual.death_date.isnot(None))
+
+
+def _uses_range_index(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def alive_at_condition(db: Session, day: date):
+    if _uses_range_index(db):
+        contains = lifespan_range(Individual.birth_date, Individual.death_date).op("@>")(day)
+    else:
+        contains = and_(
+            or_(Individual.birth_date.is_(None), Individual.birth_date <= day),
+            or_(_death.is_(None), _death >= day),
+        )
+    return and_(contains, _has_known_date)
+
+
+def overlaps_condition(db: Session, start: Optional[date], end: Optional[date]):
+    """Lifespan shares at least one day with [start, end] (None = unbounded)."""
+    if _uses_range_index(db):
+        period = func.daterange(start, end, literal_column("'[]'"))
+        overlaps = lifespan_range(Individual.birth_date, Individual.death_date).op("&&")(period)
+    else:
+        overlaps = and_(
+            or_(Individual.birth_date.is_(None), Individual.birth_date <= end) if end else true(),
+            or_(_death.is_(None), _death >= start) if start else true(),
+        )
+    return and_(overlaps, _has_known_date)
+
+
+def born_between_condition(start: date, end: date, surname: Optional[str] = None):
+    condition = Individual.birth_date.between(start, end)
+    if surname:
+        condition = and_(Individual.last_name == surname, condition)
+    return condition
+
+
+def get_individuals_page(
+        db: Session,
+        condition,
+        after_id: int,
+        limit: int,
+        within_ids: Optional[Collection[int]] = None,
+) -> List[Individual]:
+    """
+    Keyset page in id order: rows matching `condition` with id > after_id.
+    With `within_ids`, only the ids past the cursor are bound, in ascending
+    chunks of _IN_CHUNK, and chunks stop once the page is full.
+    """
+    stmt = select(Individual).where(condition, Individual.id > after_id).order_by(Individual.id)
+    if within_ids is None:
+        return list(db.execute(stmt.limit(limit)).unique().scalars())
+
+    ids = sorted(i for i in within_ids if i > after_id)
+    rows: List[Individual] = []
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start:start + _IN_CHUNK]
+        rows.extend(db.execute(stmt.where(Individual.id.in_(chunk)).limit(limit - len(rows))).unique().scalars())
+        if len(rows) >= limit:
+            break
+    return rows
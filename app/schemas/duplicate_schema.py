@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from app.schemas.individual_schema import IndividualResponse
+
+
+class DuplicateSuggestionResponse(BaseModel):
+    id: int
+    individual_id: int
+    duplicate_id: int
+    score: float
+    # Why the pair matched, e.g. "same_birth_date", "shared_parent"
+    reasons: List[str] = []
+    status: str
+    job_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    individual: Optional[IndividualResponse] = None
+    duplicate: Optional[IndividualResponse] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class FamilyTreeCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+
+
+class FamilyTreeResponse(BaseModel):
+    id: int
+    name: str
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from pydantic import ConfigDict
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import date
 
 class IndividualBase(BaseModel):
@@ -15,6 +15,16 @@ class IndividualBase(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class IndividualAggregates(BaseModel):
+    descendant_count: int = 0
+    ancestor_count: int = 0
+    generation_depth: int = 0
+    living_descendant_count: int = 0
+    # True while the counters are known to be out of date
+    stale: bool = False
+
+    model_config = ConfigDict(from_attributes=True)
+
 class IndividualCreate(IndividualBase):
     pass
 
@@ -23,6 +33,26 @@ class IndividualUpdate(IndividualBase):
 
 class IndividualResponse(IndividualBase):
     id:int
+    aggregates: Optional[IndividualAggregates] = None
 
     class Config:
         orm_mode = True
+
+
+class IndividualPage(BaseModel):
+    items: List[IndividualResponse]
+    # Pass back as `cursor` for the next page; None on the last one
+    next_cursor: Optional[str] = None
+
+
+class IndividualBatchRequest(BaseModel):
+    ids: List[int]
+    # Subset of IndividualResponse fields to return ("id" is always included); None = all
+    fields: Optional[List[str]] = None
+
+
+class IndividualBatch(BaseModel):
+    # In request order (duplicates collapsed); projected when `fields` was given
+    items: List[Dict[str, Any]]
+    # Requested ids that do not exist
+    missing: List[int] = []
@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ConfigDict, computed_field
+
+
+class JobResponse(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    params: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    processed: int = 0
+    total: Optional[int] = None
+    cancel_requested: bool = False
+    worker: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        end = self.finished_at or datetime.now(timezone.utc).replace(tzinfo=None)
+        elapsed = (end - self.started_at).total_seconds()
+        return round(self.processed / elapsed, 1) if elapsed > 0 else None
+
+    @computed_field
+    @property
+    def percent(self) -> Optional[float]:
+        if not self.total:
+            return None
+        return round(100.0 * self.processed / self.total, 1)
+
+
+class JobSubmitted(BaseModel):
+    job_id: int
+    status: str
+    url: str
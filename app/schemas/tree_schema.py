@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 from pydantic import BaseModel
-from typing import List, Literal
-from app.schemas.individual_schema import IndividualResponse
+from typing import List, Literal, Optional
+from app.schemas.individual_schema import IndividualAggregates, IndividualResponse
 
 class ImmediateFamily(BaseModel):
     """
@@ -33,9 +33,13 @@ class GenerationBand(BaseModel):
 class MultiLevelTree(BaseModel):
     """
     Multi-level tree suitable for visualizations (FamilySearch-style).
+    When the tree is larger than the per-request node limit, `truncated` is
+    set and `next_cursor` returns the rest (bands may then be partial).
     """
     root: IndividualResponse
     generations: List[GenerationBand]
+    truncated: bool = False
+    next_cursor: Optional[str] = None
 
 
 class TreeNode(BaseModel):
@@ -45,6 +49,7 @@ class TreeNode(BaseModel):
     generation: int
     x: int
     y: int
+    aggregates: Optional[IndividualAggregates] = None
 
 
 class TreeEdge(BaseModel):
@@ -57,3 +62,30 @@ class TreeVisualization(BaseModel):
     root: int
     nodes: List[TreeNode]
     edges: List[TreeEdge]
+    # Set when only the first TREE_MAX_NODES_PER_REQUEST individuals were laid out
+    truncated: bool = False
+
+
+class TreeCluster(BaseModel):
+    """
+    Level-of-detail placeholder for several nodes of a distant generation
+    that are too small to draw individually at the current zoom.
+    """
+    generation: int
+    x: int
+    y: int
+    aggregates: Optional[IndividualAggregates] = None
+    count: int
+
+
+class TreeViewport(BaseModel):
+    """
+    Part of a laid-out tree intersecting a bounding box.
+    """
+    root: int
+    zoom: float
+    total_nodes: int
+    nodes: List[TreeNode]
+    edges: List[TreeEdge]
+    clusters: List[TreeCluster] = []
+    truncated: bool = False
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, constr
+from pydantic import BaseModel, ConfigDict, EmailStr, constr
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -30,3 +30,17 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     sub: Optional[str] = None
+
+
+class Principal(BaseModel):
+    """
+    The authenticated user as seen by request handlers.
+    A small immutable snapshot of User, safe to cache between requests.
+    """
+    id: int
+    email: str
+    name: Optional[str] = None
+    role: str = "member"
+    is_approved: bool = False
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
@@ -0,0 +1,219 @@
+import logging
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.individual import Individual
+from app.models.individual_aggregate import IndividualAggregate
+from app.models.relationship import Relationship
+from app.repositories.aggregate_repository import (
+    add_to_counters, count_living, ensure_aggregate_rows, get_generation_depths, get_stale_ids,
+    mark_stale, recompute_all_aggregates, set_generation_depths, write_exact,
+)
+from app.services.job_service import JobContext, register_job_handler
+from app.services.tree_service import TreeService
+
+logger = logging.getLogger("family_tree.aggregates")
+
+
+class AggregateService:
+    """
+    Keeps IndividualAggregate rows in step with the graph.
+
+    Adding or removing a parent link P -> C changes, for every a in
+    A = {P} + ancestors(P), the descendant set by exactly D = {C} + descendants(C)
+    (and the ancestor set of every d in D by exactly A) -- unless some d is
+    also reachable from A another way (pedigree collapse, e.g. cousin
+    marriage). Such writes mark A and D stale instead, and stale rows are
+    recomputed exactly by refresh_stale.
+
+    generation_depth is the largest shortest-path distance to a descendant,
+    matching the generation numbers used by the tree views.
+
+    Hooks stage their updates in the caller's transaction; the caller commits.
+    """
+
+    @staticmethod
+    def _reach(db: Session, start: Iterable[int], step: Callable) -> Dict[int, int]:
+        """Shortest distance (>= 1) from `start` to everything reachable with `step`."""
+        seen: Set[int] = set(start)
+        frontier = set(seen)
+        distances: Dict[int, int] = {}
+        depth = 0
+        while frontier:
+            depth += 1
+            frontier = step(db, frontier) - seen
+            seen |= frontier
+            for individual_id in frontier:
+                distances[individual_id] = depth
+        return distances
+
+    @staticmethod
+    def _ancestors(db: Session, start: Iterable[int]) -> Dict[int, int]:
+        return AggregateService._reach(db, start, TreeService._get_parents_of_children)
+
+    @staticmethod
+    def _descendants(db: Session, start: Iterable[int]) -> Dict[int, int]:
+        return AggregateService._reach(db, start, TreeService._get_children_of_parents)
+
+    @staticmethod
+    def _has_parent_link(db: Session, parent_id: int, child_id: int) -> bool:
+        stmt = select(Relationship.id).where(or_(
+            (Relationship.individual_id == parent_id)
+            & (Relationship.related_individual_id == child_id)
+            & (Relationship.relationship_type == "parent"),
+            (Relationship.individual_id == child_id)
+            & (Relationship.related_individual_id == parent_id)
+            & (Relationship.relationship_type == "child"),
+        )).limit(1)
+        return db.execute(stmt).first() is not None
+
+    @staticmethod
+    def parent_link(individual_id: int, related_id: int, rel_type: str) -> tuple[int, int] | None:
+        """(parent_id, child_id) described by a relationship row, None for spouses."""
+        if rel_type == "parent":
+            return individual_id, related_id
+        if rel_type == "child":
+            return related_id, individual_id
+        return None
+
+    # ------------------------------ HOOKS ------------------------------ #
+
+    @staticmethod
+    def on_parent_link(db: Session, parent_id: int, child_id: int, sign: int) -> None:
+        """
+        Stage the counter changes for adding (sign=+1) or removing (sign=-1)
+        the link parent_id -> child_id. Must run while the database does NOT
+        contain the link: before inserting it, after deleting it.
+        """
+        if AggregateService._has_parent_link(db, parent_id, child_id):
+            # Still linked through the other representation; nothing changes
+            return
+
+        upward = AggregateService._ancestors(db, [parent_id])
+        upward[parent_id] = 0
+        downward = AggregateService._descendants(db, [child_id])
+        downward[child_id] = 0
+        ensure_aggregate_rows(db, set(upward) | set(downward))
+
+        # Does anything in D already have an ancestor in A (or is it in A)?
+        collapsed = (
+            bool(upward.keys() & downward.keys())
+            or bool(AggregateService._ancestors(db, downward).keys() & upward.keys())
+        )
+        if collapsed:
+            mark_stale(db, set(upward) | set(downward))
+            return
+
+        add_to_counters(
+            db, upward,
+            descendant_count=sign * len(downward),
+            living_descendant_count=sign * count_living(db, downward),
+        )
+        add_to_counters(db, downward, ancestor_count=sign * len(upward))
+
+        child_row = db.get(IndividualAggregate, child_id)
+        if child_row is None or child_row.stale:
+            # Depths below are unknown, so the ones above cannot be derived
+            mark_stale(db, upward)
+            return
+        child_depth = child_row.generation_depth
+        if sign > 0:
+            # New descendants of a sit at distance(a, P) + 1 + distance(C, d)
+            current = get_generation_depths(db, upward)
+            changed = {
+                a: dist + 1 + child_depth for a, dist in upward.items()
+                if dist + 1 + child_depth > current.get(a, 0)
+            }
+            if changed:
+                set_generation_depths(db, changed)
+        else:
+            # The deepest line may have been the one removed; recount those exactly
+            current = get_generation_depths(db, upward)
+            mark_stale(db, [a for a, dist in upward.items() if dist + 1 + child_depth >= current.get(a, 0)])
+
+    @staticmethod
+    def on_individual_created(db: Session, individual_id: int) -> None:
+        db.add(IndividualAggregate(individual_id=individual_id))
+
+    @staticmethod
+    def on_alive_changed(db: Session, individual_id: int, delta: int) -> None:
+        """Every ancestor counts this person exactly once as a descendant."""
+        ancestors = AggregateService._ancestors(db, [individual_id])
+        ensure_aggregate_rows(db, ancestors)
+        add_to_counters(db, ancestors, living_descendant_count=delta)
+
+    @staticmethod
+    def on_individual_deleted(db: Session, individual_id: int) -> None:
+        """
+        Remove the person's parent links one at a time, applying each removal,
+        so the remaining relatives end up as if they had never been linked.
+        The individual's own row goes with the individual (ON DELETE CASCADE).
+        """
+        rels = db.execute(select(Relationship).where(or_(
+            Relationship.individual_id == individual_id,
+            Relationship.related_individual_id == individual_id,
+        ))).scalars().all()
+
+        # Children first, so ancestors still see the person while losing their line
+        links = []
+        for rel in rels:
+            link = AggregateService.parent_link(rel.individual_id, rel.related_individual_id, rel.relationship_type)
+            if link is not None:
+                links.append((link[0] != individual_id, link, rel))
+        for _, (parent_id, child_id), rel in sorted(links, key=lambda item: item[0]):
+            db.delete(rel)
+            db.flush()
+            AggregateService.on_parent_link(db, parent_id, child_id, -1)
+
+    # --------------------------- RECOMPUTATION --------------------------- #
+
+    @staticmethod
+    def refresh_stale(db: Session, limit: Optional[int] = None) -> int:
+        """Recompute up to `limit` stale rows exactly; commits. Returns how many."""
+        if limit is None:
+            limit = settings.AGGREGATE_INLINE_REFRESH_LIMIT
+        stale_ids = get_stale_ids(db, limit) if limit > 0 else []
+        for individual_id in stale_ids:
+            descendants = AggregateService._descendants(db, [individual_id])
+            descendants.pop(individual_id, None)
+            ancestors = AggregateService._ancestors(db, [individual_id])
+            ancestors.pop(individual_id, None)
+            write_exact(
+                db, individual_id,
+                descendant_count=len(descendants),
+                ancestor_count=len(ancestors),
+                generation_depth=max(descendants.values(), default=0),
+                living_descendant_count=count_living(db, descendants),
+            )
+        if stale_ids:
+            db.commit()
+        return len(stale_ids)
+
+    @staticmethod
+    def recompute_all(db: Session) -> int:
+        """Rebuild every row from scratch (set-based, one query per generation)."""
+        rows = recompute_all_aggregates(db)
+        db.commit()
+        logger.info("Recomputed aggregates", extra={"rows": rows})
+        return rows
+
+    @staticmethod
+    def is_exact(aggregates: IndividualAggregate | None) -> bool:
+        return aggregates is not None and not aggregates.stale
+
+    @staticmethod
+    def get(db: Session, individual_id: int) -> IndividualAggregate | None:
+        return db.get(IndividualAggregate, individual_id)
+
+    @staticmethod
+    def living_flag(individual: Individual) -> bool:
+        """Unknown (NULL) counts as living, like the recompute query."""
+        return individual.is_alive is not False
+
+
+@register_job_handler("aggregate_recompute")
+def _run_aggregate_recompute(ctx: JobContext) -> dict:
+    return {"rows": AggregateService.recompute_all(ctx.db)}
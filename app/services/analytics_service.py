@@ -0,0 +1,309 @@
+import logging
+import threading
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.repositories.analytics_repository import (
+    load_individual_columns, load_parent_pairs, load_spouse_pairs,
+)
+from app.repositories.data_version_repository import get_data_version
+from app.services.tree_service import TreeService
+
+logger = logging.getLogger("family_tree.analytics")
+
+# Results per (metric, scope, params, data version); stale versions just age out
+_results = LRUCache(maxsize=256)
+
+# Frames per data version, which names the tree in tree-scoped sessions, so
+# the busiest families each keep theirs
+_frames = LRUCache(maxsize=8)
+_frame_lock = threading.Lock()
+
+# Guards the generation fixpoint against parent cycles in bad data
+_MAX_GENERATIONS = 512
+_LIFESPAN_BIN_YEARS = 5
+_LIFESPAN_MAX_AGE = 120
+
+
+@dataclass
+class PopulationFrame:
+    """
+    Column arrays for every individual (row i = i-th smallest id) plus the
+    parent and spouse edges as row numbers, loaded once per data version.
+    """
+    version: str
+    ids: np.ndarray
+    birth_year: np.ndarray
+    death_year: np.ndarray
+    gender: np.ndarray
+    surname: np.ndarray
+    surnames: List[str]
+    parent_rows: np.ndarray
+    child_rows: np.ndarray
+    spouse_a: np.ndarray
+    spouse_b: np.ndarray
+    # Founders (no known parents) are generation 0, children one below their deepest parent
+    generation: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return int(self.ids.shape[0])
+
+    def rows_of(self, ids: np.ndarray) -> np.ndarray:
+        rows = np.searchsorted(self.ids, ids)
+        found = rows < self.size
+        found[found] = self.ids[rows[found]] == ids[found]
+        return rows[found]
+
+
+def _edge_rows(ids: np.ndarray, left: np.ndarray, right: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Map id pairs to row numbers, dropping pairs with an unknown end."""
+    n = ids.shape[0]
+    a, b = np.searchsorted(ids, left), np.searchsorted(ids, right)
+    ok = (a < n) & (b < n)
+    ok[ok] = (ids[a[ok]] == left[ok]) & (ids[b[ok]] == right[ok])
+    return a[ok], b[ok]
+
+
+def _topological_generations(n: int, parents: np.ndarray, children: np.ndarray) -> np.ndarray:
+    """generation[child] = 1 + max(generation[parent]); one vectorised pass per generation."""
+    generation = np.zeros(n, dtype=np.int32)
+    for _ in range(_MAX_GENERATIONS):
+        candidate = generation.copy()
+        np.maximum.at(candidate, children, generation[parents] + 1)
+        if np.array_equal(candidate, generation):
+            break
+        generation = candidate
+    return generation
+
+
+class AnalyticsService:
+    """
+    Population statistics over a whole family tree or one person's tree,
+    computed with grouped NumPy operations over bulk-loaded columns.
+    """
+
+    @staticmethod
+    def _load_frame(db: Session, version: str) -> PopulationFrame:
+        frame = _frames.get(version)
+        if frame is not None:
+            return frame
+        # One loader at a time; the others wait and reuse its result
+        with _frame_lock:
+            frame = _frames.get(version)
+            if frame is not None:
+                return frame
+            started = perf_counter()
+            columns, surnames = load_individual_columns(db)
+            ids = columns["id"]
+            parent_rows, child_rows = _edge_rows(ids, *load_parent_pairs(db))
+            spouse_a, spouse_b = _edge_rows(ids, *load_spouse_pairs(db))
+            frame = PopulationFrame(
+                version=version,
+                ids=ids,
+                birth_year=columns["birth_year"],
+                death_year=columns["death_year"],
+                gender=columns["gender"],
+                surname=columns["surname"],
+                surnames=surnames,
+                parent_rows=parent_rows,
+                child_rows=child_rows,
+                spouse_a=spouse_a,
+                spouse_b=spouse_b,
+                generation=_topological_generations(ids.shape[0], parent_rows, child_rows),
+            )
+            logger.info(
+                "Loaded analytics frame: %s individuals, %s parent links in %.2fs",
+                ids.shape[0], parent_rows.shape[0], perf_counter() - started,
+            )
+            _frames.set(version, frame)
+            return frame
+
+    @staticmethod
+    def tree_generations(
+            db: Session,
+            root_id: int,
+            direction: str,
+            max_depth: int,
+            node_budget: Optional[int] = None,
+    ) -> Optional[Dict[int, int]]:
+        """
+        {individual id: generation relative to root} for the multi-level
+        tree, None if no root. Raises ValueError as soon as the tree grows
+        past `node_budget` people (statistics over part of it would be wrong).
+        """
+        if TreeService._get_individual(db, root_id) is None:
+            return None
+        generations: Dict[int, int] = {}
+        for generation, ids in TreeService._iter_generation_ids(db, root_id, direction, max_depth):
+            for individual_id in ids:
+                generations.setdefault(individual_id, generation)
+            if node_budget is not None and len(generations) > node_budget:
+                raise ValueError(f"This tree has more than {node_budget} people, request fewer generations")
+        return generations
+
+    @staticmethod
+    def compute(
+            db: Session,
+            metric: Callable[..., dict],
+            tree: Optional[Dict[int, int]] = None,
+            scope_key: tuple = ("all",),
+            **params,
+    ) -> dict:
+        """
+        Run `metric(frame, rows, generations, **params)` over the whole
+        population or the rows of `tree`, cached per data version.
+        """
+        version = get_data_version(db)
+        cache_key = (metric.__name__, scope_key, tuple(sorted(params.items())), version)
+        cached = _results.get(cache_key)
+        if cached is not None:
+            return cached
+
+        frame = AnalyticsService._load_frame(db, version)
+        if tree is None:
+            rows = np.arange(frame.size)
+            generations = frame.generation
+        else:
+            ids = np.fromiter(tree.keys(), dtype=np.int64, count=len(tree))
+            relative = np.fromiter(tree.values(), dtype=np.int32, count=len(tree))
+            order = np.argsort(ids)
+            ids, relative = ids[order], relative[order]
+            rows = frame.rows_of(ids)
+            generations = relative[np.isin(ids, frame.ids[rows])]
+
+        result = {"data_version": version, **metric(frame, rows, generations, **params)}
+        _results.set(cache_key, result)
+        return result
+
+    # ------------------------------ METRICS ------------------------------ #
+
+    @staticmethod
+    def generation_sizes(frame: PopulationFrame, rows: np.ndarray, generations: np.ndarray) -> dict:
+        values, inverse = np.unique(generations, return_inverse=True)
+        by_gender = np.bincount(
+            inverse * 4 + frame.gender[rows], minlength=values.shape[0] * 4
+        ).reshape(-1, 4)
+        return {"generations": [
+            {
+                "generation": int(g),
+                "count": int(counts.sum()),
+                "male": int(counts[1]),
+                "female": int(counts[2]),
+                "other": int(counts[3]),
+                "unknown": int(counts[0]),
+            }
+            for g, counts in zip(values, by_gender)
+        ]}
+
+    @staticmethod
+    def children_per_couple(frame: PopulationFrame, rows: np.ndarray, generations: np.ndarray) -> dict:
+        """
+        Couples are two people sharing a child, or recorded spouses (possibly
+        childless). Grouped by the birth decade of the older partner.
+        """
+        n = frame.size
+        in_scope = np.zeros(n, dtype=bool)
+        in_scope[rows] = True
+
+        keep = in_scope[frame.parent_rows] & in_scope[frame.child_rows]
+        parents, children = frame.parent_rows[keep], frame.child_rows[keep]
+        order = np.lexsort((parents, children))
+        parents, children = parents[order], children[order]
+        # Children with exactly two parents define the co-parent pairs
+        child_values, starts, counts = np.unique(children, return_index=True, return_counts=True)
+        two = starts[counts == 2]
+        child_keys = parents[two].astype(np.int64) * n + parents[two + 1]
+
+        keep = in_scope[frame.spouse_a] & in_scope[frame.spouse_b]
+        a, b = frame.spouse_a[keep], frame.spouse_b[keep]
+        spouse_keys = np.minimum(a, b).astype(np.int64) * n + np.maximum(a, b)
+
+        couples = np.unique(np.concatenate([child_keys, spouse_keys]))
+        if couples.size == 0:
+            return {"couples": 0, "mean_children": None, "by_decade": []}
+        child_counts = np.bincount(np.searchsorted(couples, child_keys), minlength=couples.shape[0])
+
+        born_a = frame.birth_year[couples // n].astype(np.int32)
+        born_b = frame.birth_year[couples % n].astype(np.int32)
+        older = np.where((born_a > 0) & (born_b > 0), np.minimum(born_a, born_b), np.maximum(born_a, born_b))
+        known = older > 0
+        decades, inverse = np.unique(older[known] // 10 * 10, return_inverse=True)
+        per_decade = np.bincount(inverse, minlength=decades.shape[0])
+        children_per_decade = np.bincount(inverse, weights=child_counts[known], minlength=decades.shape[0])
+
+        return {
+            "couples": int(couples.shape[0]),
+            "mean_children": round(float(child_counts.mean()), 3),
+            "by_decade": [
+                {
+                    "decade": int(d),
+                    "couples": int(c),
+                    "children": int(k),
+                    "mean_children": round(float(k) / int(c), 3),
+                }
+                for d, c, k in zip(decades, per_decade, children_per_decade)
+            ],
+            "unknown_decade_couples": int((~known).sum()),
+        }
+
+    @staticmethod
+    def lifespan_distribution(frame: PopulationFrame, rows: np.ndarray, generations: np.ndarray) -> dict:
+        """Age at death (years) of everyone with both years known."""
+        born = frame.birth_year[rows].astype(np.int32)
+        died = frame.death_year[rows].astype(np.int32)
+        valid = (born > 0) & (died > 0) & (died >= born)
+        ages, born = died[valid] - born[valid], born[valid]
+        if ages.size == 0:
+            return {"count": 0, "histogram": [], "by_birth_decade": []}
+
+        edges = np.arange(0, _LIFESPAN_MAX_AGE + _LIFESPAN_BIN_YEARS, _LIFESPAN_BIN_YEARS)
+        histogram, _ = np.histogram(np.minimum(ages, _LIFESPAN_MAX_AGE), bins=edges)
+        p10, p25, p50, p75, p90 = np.percentile(ages, [10, 25, 50, 75, 90])
+
+        decades, inverse = np.unique(born // 10 * 10, return_inverse=True)
+        counts = np.bincount(inverse)
+        totals = np.bincount(inverse, weights=ages)
+        return {
+            "count": int(ages.size),
+            "mean": round(float(ages.mean()), 2),
+            "percentiles": {"p10": float(p10), "p25": float(p25), "p50": float(p50), "p75": float(p75), "p90": float(p90)},
+            "max": int(ages.max()),
+            "histogram": [
+                {"from": int(low), "to": int(low) + _LIFESPAN_BIN_YEARS - 1, "count": int(c)}
+                for low, c in zip(edges[:-1], histogram)
+            ],
+            "by_birth_decade": [
+                {"decade": int(d), "count": int(c), "mean": round(float(t) / int(c), 2)}
+                for d, c, t in zip(decades, counts, totals)
+            ],
+        }
+
+    @staticmethod
+    def surname_frequency(
+            frame: PopulationFrame, rows: np.ndarray, generations: np.ndarray, top: int = 10,
+    ) -> dict:
+        """The `top` most common surnames in each generation."""
+        values, generation_index = np.unique(generations, return_inverse=True)
+        width = max(len(frame.surnames), 1)
+        keys, counts = np.unique(generation_index.astype(np.int64) * width + frame.surname[rows], return_counts=True)
+        key_generation, key_surname = keys // width, keys % width
+        order = np.lexsort((key_surname, -counts, key_generation))
+
+        result = []
+        boundaries = np.searchsorted(key_generation[order], np.arange(values.shape[0] + 1))
+        for index, generation in enumerate(values):
+            chosen = order[boundaries[index]:boundaries[index + 1]][:top]
+            result.append({
+                "generation": int(generation),
+                "surnames": [
+                    {"surname": frame.surnames[key_surname[i]], "count": int(counts[i])}
+                    for i in chosen
+                ],
+            })
+        return {"generations": result}
@@ -0,0 +1,158 @@
+"""
+Pure scoring functions for duplicate detection. Kept free of app imports
+(settings, database) so process-pool workers start quickly and only
+receive plain tuples.
+"""
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+# Weights of the partial scores; they sum to 1
+_FIRST_NAME_WEIGHT = 0.35
+_LAST_NAME_WEIGHT = 0.25
+_BIRTH_WEIGHT = 0.25
+_RELATIVES_WEIGHT = 0.15
+# Birth/death years further apart than this rule a pair out
+_MAX_YEAR_GAP = 2
+_BIRTH_YEAR_SCORES = {0: 0.8, 1: 0.5, 2: 0.3}
+_UNKNOWN_BIRTH_SCORE = 0.4
+
+
+@lru_cache(maxsize=65_536)
+def soundex(name: str) -> str:
+    """American Soundex ("Robert" -> "R163"); "" for names without letters."""
+    letters = [c for c in name.lower() if c.isalpha()]
+    if not letters:
+        return ""
+    code, last = letters[0].upper(), _SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, "")
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in "hw":
+            # h/w do not separate equal codes; vowels do
+            last = digit
+    return code.ljust(4, "0")
+
+
+class Candidate(NamedTuple):
+    id: int
+    first_name: str  # lower-cased, stripped
+    last_name: str
+    gender: str  # "" when unknown
+    birth_ordinal: int  # date.toordinal(), 0 = unknown
+    birth_year: int  # 0 = unknown
+    death_year: int
+    first_code: str  # soundex
+    last_code: str
+    keys: Tuple[str, ...]  # blocking keys, sorted
+    parents: FrozenSet[int]
+    spouses: FrozenSet[int]
+
+
+@lru_cache(maxsize=262_144)
+def _name_ratio(a: str, b: str) -> float:
+    # Names repeat a lot, so most pairs are cache hits
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _name_similarity(a: str, b: str, code_a: str, code_b: str) -> float:
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    ratio = _name_ratio(a, b) if a < b else _name_ratio(b, a)
+    return max(ratio, 0.85) if code_a and code_a == code_b else ratio
+
+
+def _incompatible(a: Candidate, b: Candidate) -> bool:
+    """Cheap facts that rule out a pair before any string comparison."""
+    return bool(
+        (a.gender and b.gender and a.gender != b.gender)
+        or (a.birth_year and b.birth_year and abs(a.birth_year - b.birth_year) > _MAX_YEAR_GAP)
+        or (a.death_year and b.death_year and abs(a.death_year - b.death_year) > _MAX_YEAR_GAP)
+        or a.id in b.parents or b.id in a.parents or a.id in b.spouses
+    )
+
+
+def score_pair(a: Candidate, b: Candidate, min_score: float = 0.0) -> Optional[Tuple[float, List[str]]]:
+    """
+    (score in [0, 1], reasons), or None when the pair cannot be one person
+    or cannot reach `min_score` even with identical names.
+    """
+    if _incompatible(a, b):
+        return None
+
+    reasons = []
+    if a.birth_ordinal and a.birth_ordinal == b.birth_ordinal:
+        birth = 1.0
+        reasons.append("same_birth_date")
+    elif a.birth_year and b.birth_year:
+        gap = abs(a.birth_year - b.birth_year)
+        birth = _BIRTH_YEAR_SCORES[gap]
+        reasons.append("same_birth_year" if gap == 0 else f"birth_years_{gap}_apart")
+    else:
+        birth = _UNKNOWN_BIRTH_SCORE
+
+    relatives = 0.0
+    if a.parents & b.parents:
+        relatives = 1.0
+        reasons.append("shared_parent")
+    if a.spouses & b.spouses:
+        relatives = 1.0
+        reasons.append("shared_spouse")
+
+    score = _BIRTH_WEIGHT * birth + _RELATIVES_WEIGHT * relatives
+    if score + _FIRST_NAME_WEIGHT + _LAST_NAME_WEIGHT < min_score:
+        return None
+
+    first = _name_similarity(a.first_name, b.first_name, a.first_code, b.first_code)
+    if first == 1.0:
+        reasons.append("same_first_name")
+    elif a.first_code and a.first_code == b.first_code:
+        reasons.append("similar_first_name")
+    last = _name_similarity(a.last_name, b.last_name, a.last_code, b.last_code)
+    if last == 1.0:
+        reasons.append("same_last_name")
+    elif a.last_code and a.last_code == b.last_code:
+        reasons.append("similar_last_name")
+
+    score += _FIRST_NAME_WEIGHT * first + _LAST_NAME_WEIGHT * last
+    return round(score, 4), reasons
+
+
+def score_blocks(
+        blocks: Sequence[Tuple[str, Sequence[Candidate]]],
+        min_score: float,
+) -> List[Tuple[int, int, float, List[str]]]:
+    """
+    Compare every pair within each block. A pair sharing several blocks is
+    only scored in the smallest key they share, so each pair is scored once
+    no matter how blocks are split across workers.
+    """
+    matches = []
+    for key, members in blocks:
+        # Only keys sorting before this block's can make another block the owner
+        earlier = [{k for k in m.keys if k < key} for m in members]
+        for i, a in enumerate(members):
+            for j in range(i + 1, len(members)):
+                b = members[j]
+                if earlier[i] and not earlier[i].isdisjoint(earlier[j]):
+                    continue
+                scored = score_pair(a, b, min_score)
+                if scored is None or scored[0] < min_score:
+                    continue
+                low, high = (a.id, b.id) if a.id < b.id else (b.id, a.id)
+                matches.append((low, high, scored[0], scored[1]))
+    return matches
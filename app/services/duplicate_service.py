@@ -0,0 +1,279 @@
+import logging
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.duplicate_suggestion import DuplicateSuggestion
+from app.models.individual import Individual
+from app.models.relationship import Relationship
+from app.repositories.analytics_repository import load_parent_pairs, load_spouse_pairs
+from app.repositories.duplicate_repository import (
+    delete_suggestions_involving, get_relationships_of, get_suggestion, iter_candidate_rows,
+    list_suggestions, relationship_exists, replace_open_suggestions,
+)
+from app.repositories.individual_repository import get_individual
+from app.services.aggregate_service import AggregateService
+from app.services.duplicate_scoring import Candidate, score_blocks, soundex
+from app.services.job_service import JobContext, register_job_handler
+
+logger = logging.getLogger("family_tree.duplicates")
+
+Block = Tuple[str, List[Candidate]]
+
+# Fields copied from the removed person when the kept one has none
+_MERGE_FILL_FIELDS = ("birth_date", "death_date", "bio", "photo_url")
+
+
+def _blocking_keys(tree_id: int, first_code: str, last_code: str, birth_year: int,
+                   parents: Set[int], spouses: Set[int]) -> Set[str]:
+    """
+    Phonetic name, phonetic surname within overlapping 5-year birth windows
+    (any two years at most 2 apart share a window), and shared parents or
+    spouses from the graph. Name keys include the family tree, so people in
+    different trees never share a block (parent/spouse ids are per tree).
+    """
+    keys = {f"n:{tree_id}:{last_code}:{first_code}"}
+    if birth_year:
+        keys.add(f"b:{tree_id}:{last_code}:{birth_year // 5}")
+        keys.add(f"b+:{tree_id}:{last_code}:{(birth_year + 2) // 5}")
+    keys.update(f"p:{parent_id}" for parent_id in parents)
+    keys.update(f"s:{spouse_id}" for spouse_id in spouses)
+    return keys
+
+
+def _pairs_in(size: int) -> int:
+    return size * (size - 1) // 2
+
+
+class DuplicateService:
+    """
+    Finds likely duplicate individuals without comparing everyone with
+    everyone: people are grouped into blocks by cheap keys and only pairs
+    inside a block are scored (in a process pool). Suggestions are stored
+    ranked for review and can be merged or dismissed.
+    """
+
+    @staticmethod
+    def _load_candidates(db: Session) -> Dict[int, Candidate]:
+        parents: Dict[int, Set[int]] = defaultdict(set)
+        for parent_id, child_id in zip(*(a.tolist() for a in load_parent_pairs(db))):
+            parents[child_id].add(parent_id)
+        spouses: Dict[int, Set[int]] = defaultdict(set)
+        for a, b in zip(*(a.tolist() for a in load_spouse_pairs(db))):
+            spouses[a].add(b)
+            spouses[b].add(a)
+
+        candidates: Dict[int, Candidate] = {}
+        for individual_id, tree_id, first, last, gender, birth, death in iter_candidate_rows(db):
+            first, last = (first or "").strip().lower(), (last or "").strip().lower()
+            first_code, last_code = soundex(first), soundex(last)
+            birth_year = birth.year if birth else 0
+            own_parents, own_spouses = parents.get(individual_id, set()), spouses.get(individual_id, set())
+            keys = _blocking_keys(tree_id, first_code, last_code, birth_year, own_parents, own_spouses)
+            candidates[individual_id] = Candidate(
+                id=individual_id,
+                first_name=first,
+                last_name=last,
+                gender=(gender or "").strip().lower(),
+                birth_ordinal=birth.toordinal() if birth else 0,
+                birth_year=birth_year,
+                death_year=death.year if death else 0,
+                first_code=first_code,
+                last_code=last_code,
+                keys=tuple(sorted(keys)),
+                parents=frozenset(own_parents),
+                spouses=frozenset(own_spouses),
+            )
+        return candidates
+
+    @staticmethod
+    def build_blocks(candidates: Dict[int, Candidate], max_block_size: int) -> Tuple[List[Block], int]:
+        """
+        (blocks with at least two members, number of oversized blocks
+        skipped). Skipped keys are removed from the members' key lists, so a
+        pair is still scored in any smaller block it shares.
+        """
+        members: Dict[str, List[int]] = defaultdict(list)
+        for candidate in candidates.values():
+            for key in candidate.keys:
+                members[key].append(candidate.id)
+
+        oversized = {key for key, ids in members.items() if len(ids) > max_block_size}
+        if oversized:
+            for individual_id in {i for key in oversized for i in members[key]}:
+                candidate = candidates[individual_id]
+                candidates[individual_id] = candidate._replace(
+                    keys=tuple(k for k in candidate.keys if k not in oversized)
+                )
+
+        blocks = [
+            (key, [candidates[i] for i in ids])
+            for key, ids in members.items()
+            if len(ids) > 1 and key not in oversized
+        ]
+        return blocks, len(oversized)
+
+    @staticmethod
+    def _chunks(blocks: List[Block], comparisons: int) -> Iterator[Tuple[List[Block], int]]:
+        """Blocks grouped into work units of roughly `comparisons` pairs each."""
+        chunk, size = [], 0
+        for block in blocks:
+            chunk.append(block)
+            size += _pairs_in(len(block[1]))
+            if size >= comparisons:
+                yield chunk, size
+                chunk, size = [], 0
+        if chunk:
+            yield chunk, size
+
+    @staticmethod
+    def detect(db: Session, ctx: Optional[JobContext] = None, workers: Optional[int] = None) -> dict:
+        """Score every block, then replace the open suggestions with the result."""
+        workers = settings.DUPLICATE_WORKERS if workers is None else workers
+        min_score = settings.DUPLICATE_MIN_SCORE
+
+        candidates = DuplicateService._load_candidates(db)
+        blocks, skipped = DuplicateService.build_blocks(candidates, settings.DUPLICATE_MAX_BLOCK_SIZE)
+        total = sum(_pairs_in(len(block_members)) for _, block_members in blocks)
+        if ctx is not None:
+            ctx.progress(0, total, force=True)
+
+        matches: List[tuple] = []
+        processed = 0
+        chunks = DuplicateService._chunks(blocks, settings.DUPLICATE_CHUNK_COMPARISONS)
+        if workers < 1:
+            for chunk, size in chunks:
+                matches.extend(score_blocks(chunk, min_score))
+                processed += size
+                if ctx is not None:
+                    ctx.progress(processed)
+        else:
+            # Spawned, not forked: this runs in a job thread of a threaded server
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                pending = {}
+                try:
+                    for chunk, size in chunks:
+                        pending[pool.submit(score_blocks, chunk, min_score)] = size
+                        # Bounded in flight, so chunks are not all pickled up front
+                        while len(pending) >= workers * 2:
+                            processed += DuplicateService._collect(pending, matches)
+                            if ctx is not None:
+                                ctx.progress(processed)
+                    while pending:
+                        processed += DuplicateService._collect(pending, matches)
+                        if ctx is not None:
+                            ctx.progress(processed)
+                except BaseException:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+
+        matches.sort(key=lambda match: -match[2])
+        written = replace_open_suggestions(
+            db,
+            (
+                {"individual_id": low, "duplicate_id": high, "score": score, "reasons": reasons}
+                for low, high, score, reasons in matches
+            ),
+            job_id=ctx.job_id if ctx is not None else None,
+        )
+        if ctx is not None:
+            ctx.progress(processed, total, force=True)
+        logger.info(
+            "Duplicate detection: %s individuals, %s blocks, %s comparisons, %s suggestions",
+            len(candidates), len(blocks), total, written,
+        )
+        return {
+            "individuals": len(candidates),
+            "blocks": len(blocks),
+            "oversized_blocks_skipped": skipped,
+            "comparisons": total,
+            "suggestions": written,
+        }
+
+    @staticmethod
+    def _collect(pending: dict, matches: List[tuple]) -> int:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        processed = 0
+        for future in done:
+            processed += pending.pop(future)
+            matches.extend(future.result())
+        return processed
+
+    # ------------------------------ REVIEW ------------------------------ #
+
+    @staticmethod
+    def list(db: Session, status: str, min_score: float, skip: int, limit: int) -> List[DuplicateSuggestion]:
+        return list_suggestions(db, status, min_score, skip, limit)
+
+    @staticmethod
+    def get(db: Session, suggestion_id: int) -> Optional[DuplicateSuggestion]:
+        return get_suggestion(db, suggestion_id)
+
+    @staticmethod
+    def dismiss(db: Session, suggestion: DuplicateSuggestion) -> DuplicateSuggestion:
+        suggestion.status = "dismissed"
+        db.commit()
+        db.refresh(suggestion)
+        return suggestion
+
+    @staticmethod
+    def merge(db: Session, keep_id: int, remove_id: int) -> Optional[Individual]:
+        """
+        Fold `remove_id` into `keep_id` in one transaction: its relationships
+        are re-pointed to the kept person (dropping ones that would become
+        self-links or duplicates), empty fields are filled from it, and it is
+        deleted. None if either person does not exist.
+        """
+        if keep_id == remove_id:
+            raise ValueError("Cannot merge an individual into themselves")
+        keep, remove = get_individual(db, keep_id), get_individual(db, remove_id)
+        if keep is None or remove is None:
+            return None
+
+        moved = [
+            (rel.individual_id, rel.related_individual_id, rel.relationship_type)
+            for rel in get_relationships_of(db, remove_id)
+        ]
+        # Drops its parent links with counter updates; spouse links go too
+        AggregateService.on_individual_deleted(db, remove_id)
+        for rel in get_relationships_of(db, remove_id):
+            db.delete(rel)
+        db.flush()
+
+        for individual_id, related_id, rel_type in moved:
+            individual_id = keep_id if individual_id == remove_id else individual_id
+            related_id = keep_id if related_id == remove_id else related_id
+            if individual_id == related_id or relationship_exists(db, individual_id, related_id, rel_type):
+                continue
+            if rel_type == "spouse" and relationship_exists(db, related_id, individual_id, rel_type):
+                continue
+            link = AggregateService.parent_link(individual_id, related_id, rel_type)
+            if link is not None:
+                AggregateService.on_parent_link(db, *link, sign=1)
+            db.add(Relationship(
+                individual_id=individual_id,
+                related_individual_id=related_id,
+                relationship_type=rel_type,
+            ))
+            db.flush()
+
+        for field in _MERGE_FILL_FIELDS:
+            if getattr(keep, field) is None and getattr(remove, field) is not None:
+                setattr(keep, field, getattr(remove, field))
+
+        delete_suggestions_involving(db, remove_id)
+        db.delete(remove)
+        db.commit()
+        AggregateService.refresh_stale(db)
+        db.refresh(keep)
+        logger.info("Merged individual %s into %s", remove_id, keep_id)
+        return keep
+
+
+@register_job_handler("duplicate_detection")
+def _run_duplicate_detection(ctx: JobContext) -> dict:
+    return DuplicateService.detect(ctx.db, ctx, ctx.params.get("workers"))
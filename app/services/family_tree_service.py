@@ -0,0 +1,59 @@
+import logging
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.family_tree import FamilyTree
+from app.repositories.family_tree_repository import (
+    create_family_tree, get_family_tree, list_family_trees, move_tree_to_partition,
+    partition_exists, tree_partition_name,
+)
+from app.services.job_service import JobContext, register_job_handler
+
+logger = logging.getLogger("family_tree.trees")
+
+
+class FamilyTreeService:
+    """
+    Family trees (tenants). Reads and writes are scoped to a tree by the
+    session (app.db.tenancy); this service manages the trees themselves and
+    their storage.
+    """
+
+    @staticmethod
+    def create(db: Session, name: str) -> FamilyTree:
+        return create_family_tree(db, name)
+
+    @staticmethod
+    def get(db: Session, tree_id: int) -> Optional[FamilyTree]:
+        return get_family_tree(db, tree_id)
+
+    @staticmethod
+    def list(db: Session, skip: int = 0, limit: int = 100) -> List[FamilyTree]:
+        return list_family_trees(db, skip, limit)
+
+    @staticmethod
+    def create_partition(db: Session, tree_id: int) -> dict:
+        """
+        Give a (large) tree its own relationships partition on Postgres, so
+        its traversals scan and cache only its own rows and indexes. The
+        move takes a lock on the default partition for its duration.
+        Raises ValueError on other databases.
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            raise ValueError("Per-tree partitions need PostgreSQL")
+        name = tree_partition_name(tree_id)
+        if partition_exists(db, name):
+            return {"tree_id": tree_id, "partition": name, "created": False, "relationships_moved": 0}
+        moved = move_tree_to_partition(db, tree_id)
+        db.commit()
+        logger.info("Moved %s relationships of tree %s to partition %s", moved, tree_id, name)
+        return {"tree_id": tree_id, "partition": name, "created": True, "relationships_moved": moved}
+
+
+@register_job_handler("tree_partition")
+def _run_tree_partition(ctx: JobContext) -> dict:
+    ctx.progress(0, 1, force=True)
+    result = FamilyTreeService.create_partition(ctx.db, ctx.params["tree_id"])
+    ctx.progress(1, 1, force=True)
+    return result
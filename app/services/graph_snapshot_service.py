@@ -0,0 +1,124 @@
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.graph.csr_snapshot import CSRGraph, gender_code, get_snapshot, write_snapshot
+from app.models.individual import Individual
+from app.models.relationship import Relationship
+from app.repositories.aggregate_repository import parent_edges
+from app.repositories.data_version_repository import get_data_version
+from app.services.job_service import JobContext, register_job_handler
+
+_BATCH = 10_000
+
+
+class GraphSnapshotService:
+    """
+    Exports the family graph to a memory-mapped CSR snapshot (see
+    app.graph.csr_snapshot) and answers TreeService-style traversals from
+    it without touching the database.
+    """
+
+    @staticmethod
+    def export(db: Session, ctx: Optional[JobContext] = None) -> dict:
+        stmt = (
+            select(
+                Individual.id, Individual.tree_id, Individual.birth_date,
+                Individual.death_date, Individual.gender, Individual.is_alive,
+            )
+            .order_by(Individual.id)
+            .execution_options(yield_per=_BATCH)
+        )
+        ids, trees, births, deaths, genders, alive = [], [], [], [], [], []
+        # Stored gender values, dictionary-encoded (records return them as stored)
+        gender_values: dict = {}
+        gender_value_codes = []
+        for row in db.execute(stmt):
+            ids.append(row.id)
+            trees.append(row.tree_id)
+            births.append(row.birth_date.year if row.birth_date else 0)
+            deaths.append(row.death_date.year if row.death_date else 0)
+            genders.append(gender_code(row.gender))
+            gender_value_codes.append(gender_values.setdefault(row.gender, len(gender_values)))
+            alive.append(0 if row.is_alive is False else 1)
+            if ctx is not None and len(ids) % _BATCH == 0:
+                ctx.progress(len(ids))
+
+        edges = parent_edges()
+        pairs = db.execute(select(edges.c.parent_id, edges.c.child_id)).all()
+        spouses = db.execute(
+            select(Relationship.individual_id, Relationship.related_individual_id)
+            .where(Relationship.relationship_type == "spouse")
+        ).all()
+
+        def columns(rows) -> tuple[np.ndarray, np.ndarray]:
+            rows = [r for r in rows if r[0] is not None and r[1] is not None]
+            return (
+                np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+                np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows)),
+            )
+
+        version = write_snapshot(
+            settings.GRAPH_SNAPSHOT_DIR,
+            node_ids=np.array(ids, dtype=np.int64),
+            attributes={
+                "birth_year": np.array(births, dtype=np.int16),
+                "death_year": np.array(deaths, dtype=np.int16),
+                "gender": np.array(genders, dtype=np.int8),
+                "gender_value": np.array(gender_value_codes, dtype=np.int32),
+                "is_alive": np.array(alive, dtype=np.int8),
+                "tree_id": np.array(trees, dtype=np.int32),
+            },
+            parent_edges=columns(pairs),
+            spouse_edges=columns(spouses),
+            meta={"data_version": get_data_version(db), "gender_values": list(gender_values)},
+        )
+        if ctx is not None:
+            ctx.progress(len(ids), len(ids), force=True)
+        return {"version": version, "individuals": len(ids), "parent_edges": len(pairs), "spouse_edges": len(spouses)}
+
+    @staticmethod
+    def _locate(individual_id: int, tree_id: int) -> tuple[Optional[CSRGraph], Optional[int]]:
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return None, None
+        # Edges never cross trees, so checking the root scopes the whole traversal
+        return snapshot, snapshot.row_of(individual_id, tree_id)
+
+    @staticmethod
+    def _traverse(individual_id: int, tree_id: int, kind: str, max_depth: int) -> Optional[dict]:
+        snapshot, row = GraphSnapshotService._locate(individual_id, tree_id)
+        if row is None:
+            return None
+        people = []
+        for depth, rows in enumerate(snapshot.bfs(row, kind, max_depth), start=1):
+            people.extend(snapshot.records(rows, depth=depth))
+        return {"snapshot": snapshot.version, "people": people}
+
+    @staticmethod
+    def is_available() -> bool:
+        return get_snapshot() is not None
+
+    @staticmethod
+    def ancestors(individual_id: int, tree_id: int, max_depth: int) -> Optional[dict]:
+        """None if there is no snapshot or the person is not in it (in that tree)."""
+        return GraphSnapshotService._traverse(individual_id, tree_id, "parents", max_depth)
+
+    @staticmethod
+    def descendants(individual_id: int, tree_id: int, max_depth: int) -> Optional[dict]:
+        return GraphSnapshotService._traverse(individual_id, tree_id, "children", max_depth)
+
+    @staticmethod
+    def siblings(individual_id: int, tree_id: int) -> Optional[dict]:
+        snapshot, row = GraphSnapshotService._locate(individual_id, tree_id)
+        if row is None:
+            return None
+        return {"snapshot": snapshot.version, "people": snapshot.records(snapshot.siblings(row))}
+
+
+@register_job_handler("graph_snapshot")
+def _run_graph_snapshot(ctx: JobContext) -> dict:
+    return GraphSnapshotService.export(ctx.db, ctx)
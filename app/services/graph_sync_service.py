@@ -1,37 +1,104 @@
+import logging
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from neo4j import Session as Neo4jSession
 
+from app.core.config import settings
+from app.core.metrics import GRAPH_SYNC_SECONDS, GRAPH_SYNC_ROWS
+from app.db.database import open_admin_session
+from app.db.tenancy import scope_session, session_tree_id
+from app.graph.neo4j_client import neo4j_session
 from app.models.individual import Individual
 from app.models.relationship import Relationship
+from app.services.job_service import JobContext, register_job_handler
+
+if TYPE_CHECKING:
+    from neo4j import Session as Neo4jSession
+
+logger = logging.getLogger("family_tree.graph_sync")
+
+# The parallel sync builds under SHADOW_LABEL while readers keep using
+# :Person, then swaps labels in one transaction
+SHADOW_LABEL = "PersonNext"
+RETIRED_LABEL = "PersonOld"
+
+_PERSON_PROPERTIES = "id: row.id, tree_id: row.tree_id, first_name: row.first_name, last_name: row.last_name, " \
+                     "gender: row.gender, birth_date: row.birth_date, death_date: row.death_date"
+
+
+class _SharedProgress:
+    """Thread-safe row counter in front of a job's progress callback."""
+
+    def __init__(self, progress: Optional[Callable[[int, Optional[int]], None]], total: int):
+        self._progress = progress
+        self._lock = threading.Lock()
+        self.total = total
+        self.done = 0
+        # Set when any worker fails or the job is cancelled; the others stop at their next batch
+        self.stop = threading.Event()
+
+    def add(self, rows: int) -> None:
+        with self._lock:
+            self.done += rows
+            if self._progress is not None:
+                try:
+                    self._progress(self.done, self.total)
+                except Exception:
+                    self.stop.set()
+                    raise
 
 class GraphSyncService:
     @staticmethod
-    def sync_all(db:Session, neo4j: Neo4jSession) -> dict:
+    def sync_all(
+            db:Session,
+            neo4j: "Neo4jSession",
+            progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> dict:
         """
         Simple full-sync: wipes existing Person graph and rebuilds from Postgres.
-        Call this from an admin endpoint.
+        With a tree-scoped `db` (see app.db.tenancy) only that family tree's
+        nodes are replaced.
+        Runs as the "graph_sync" background job; `progress(rows_done, rows_total)`
+        is called after every row.
         """
+        started = perf_counter()
+        tree_id = session_tree_id(db)
+
         # 1) Clear existing graph data (only Person / relationships)
-        neo4j.run(
-            """        
-            MATCH (p:Person)-[r]->()
-            DELETE r
-            """
-        )
-        neo4j.run(
-            """
-            MATCH (p:Person)
-            DELETE p
-            """
-        )
+        if tree_id is None:
+            neo4j.run(
+                """
+                MATCH (p:Person)-[r]->()
+                DELETE r
+                """
+            )
+            neo4j.run(
+                """
+                MATCH (p:Person)
+                DELETE p
+                """
+            )
+        else:
+            neo4j.run("MATCH (p:Person {tree_id: $tree_id}) DETACH DELETE p", {"tree_id": tree_id})
 
         # 2) Sync Persons
         individuals = db.query(Individual).all()
+        rels = db.query(Relationship).all()
+        total = len(individuals) + len(rels)
+        done = 0
+        if progress is not None:
+            progress(done, total)
+
         for ind in individuals:
             neo4j.run(
                 """
                 CREATE (p:Person {
                     id: $id,
+                    tree_id: $tree_id,
                     first_name: $first_name,
                     last_name: $last_name,
                     gender: $gender,
@@ -41,6 +108,7 @@ class GraphSyncService:
                 """,
                 {
                     "id": ind.id,
+                    "tree_id": ind.tree_id,
                     "first_name": ind.first_name,
                     "last_name": ind.last_name,
                     "gender": ind.gender,
@@ -48,9 +116,11 @@ class GraphSyncService:
                     "death_date": ind.death_date.isoformat() if ind.death_date else None,
                 },
             )
+            done += 1
+            if progress is not None:
+                progress(done, total)
 
         # 3) Sync relationships
-        rels = db.query(Relationship).all()
         for rel in rels:
             if rel.relationship_type == "spouse":
                 # create an undirected-like pair of links so traversal is easier
@@ -78,4 +148,230 @@ class GraphSyncService:
                     """,
                     {"parent_id": parent_id, "child_id": child_id},
                 )
-        return {"individuals_synced": len(individuals), "relationships_synced": len(rels)}
+            done += 1
+            if progress is not None:
+                progress(done, total)
+        GRAPH_SYNC_SECONDS.labels("sync_all").observe(perf_counter() - started)
+        GRAPH_SYNC_ROWS.labels("individuals").inc(len(individuals))
+        GRAPH_SYNC_ROWS.labels("relationships").inc(len(rels))
+        return {"tree_id": tree_id, "individuals_synced": len(individuals), "relationships_synced": len(rels)}
+
+    # --------------------------- PARALLEL SYNC --------------------------- #
+
+    @staticmethod
+    def _id_ranges(db: Session, column, partitions: int) -> List[Tuple[int, int]]:
+        """Split [min(id), max(id)] into up to `partitions` inclusive ranges."""
+        low, high = db.execute(select(func.min(column), func.max(column))).one()
+        if low is None:
+            return []
+        span = high - low + 1
+        step = max(1, -(-span // partitions))
+        return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+    @staticmethod
+    def _iter_batches(db: Session, stmt, batch_size: int) -> Iterator[list]:
+        """Rows of `stmt` in batches, read through a server-side cursor."""
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.partitions(batch_size):
+            yield list(partition)
+
+    @staticmethod
+    def _delete_label(neo4j: "Neo4jSession", label: str, batch_size: int) -> int:
+        """DETACH DELETE every node with `label`, in batches (bounded transactions)."""
+        deleted = 0
+        query = f"MATCH (n:{label}) WITH n LIMIT $limit DETACH DELETE n RETURN count(*) AS deleted"
+        while True:
+            count = neo4j.execute_write(lambda tx: tx.run(query, limit=batch_size).single()["deleted"])
+            deleted += count
+            if count < batch_size:
+                return deleted
+
+    @staticmethod
+    def _load_nodes(id_range: Tuple[int, int], tree_id: Optional[int], batch_size: int, shared: _SharedProgress) -> int:
+        query = f"UNWIND $rows AS row CREATE (p:{SHADOW_LABEL} {{{_PERSON_PROPERTIES}}})"
+        stmt = (
+            select(
+                Individual.id, Individual.tree_id, Individual.first_name, Individual.last_name,
+                Individual.gender, Individual.birth_date, Individual.death_date,
+            )
+            .where(Individual.id.between(*id_range))
+            .order_by(Individual.id)
+        )
+        written = 0
+        db = open_admin_session(tree_id)
+        try:
+            with neo4j_session() as neo4j:
+                for batch in GraphSyncService._iter_batches(db, stmt, batch_size):
+                    if shared.stop.is_set():
+                        break
+                    rows = [
+                        {
+                            "id": r.id,
+                            "tree_id": r.tree_id,
+                            "first_name": r.first_name,
+                            "last_name": r.last_name,
+                            "gender": r.gender,
+                            "birth_date": r.birth_date.isoformat() if r.birth_date else None,
+                            "death_date": r.death_date.isoformat() if r.death_date else None,
+                        }
+                        for r in batch
+                    ]
+                    neo4j.execute_write(lambda tx: tx.run(query, rows=rows).consume())
+                    written += len(rows)
+                    shared.add(len(rows))
+        finally:
+            db.close()
+        return written
+
+    @staticmethod
+    def _load_edges(id_range: Tuple[int, int], tree_id: Optional[int], batch_size: int, shared: _SharedProgress) -> int:
+        parent_query = (
+            f"UNWIND $rows AS row "
+            f"MATCH (p:{SHADOW_LABEL} {{id: row.p}}) MATCH (c:{SHADOW_LABEL} {{id: row.c}}) "
+            f"MERGE (p)-[:PARENT_OF]->(c)"
+        )
+        spouse_query = (
+            f"UNWIND $rows AS row "
+            f"MATCH (a:{SHADOW_LABEL} {{id: row.a}}) MATCH (b:{SHADOW_LABEL} {{id: row.b}}) "
+            f"MERGE (a)-[:SPOUSE_OF]->(b) MERGE (b)-[:SPOUSE_OF]->(a)"
+        )
+        stmt = (
+            select(Relationship.individual_id, Relationship.related_individual_id, Relationship.relationship_type)
+            .where(Relationship.id.between(*id_range))
+            .order_by(Relationship.id)
+        )
+        written = 0
+        db = open_admin_session(tree_id)
+        try:
+            with neo4j_session() as neo4j:
+                for batch in GraphSyncService._iter_batches(db, stmt, batch_size):
+                    if shared.stop.is_set():
+                        break
+                    parents, spouses = set(), set()
+                    for individual_id, related_id, rel_type in batch:
+                        if rel_type == "parent":
+                            parents.add((individual_id, related_id))
+                        elif rel_type == "child":
+                            parents.add((related_id, individual_id))
+                        elif rel_type == "spouse":
+                            spouses.add(tuple(sorted((individual_id, related_id))))
+                    # execute_write retries deadlocks between workers touching the same nodes
+                    if parents:
+                        rows = [{"p": p, "c": c} for p, c in sorted(parents)]
+                        neo4j.execute_write(lambda tx: tx.run(parent_query, rows=rows).consume())
+                    if spouses:
+                        rows = [{"a": a, "b": b} for a, b in sorted(spouses)]
+                        neo4j.execute_write(lambda tx: tx.run(spouse_query, rows=rows).consume())
+                    written += len(batch)
+                    shared.add(len(batch))
+        finally:
+            db.close()
+        return written
+
+    @staticmethod
+    def _run_partitions(
+            pool: ThreadPoolExecutor,
+            func,
+            ranges,
+            tree_id: Optional[int],
+            batch_size: int,
+            shared: _SharedProgress,
+    ) -> int:
+        """Run one phase over all partitions; the first failure stops the rest and is raised."""
+        futures = [pool.submit(func, id_range, tree_id, batch_size, shared) for id_range in ranges]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        if any(f.exception() for f in done):
+            shared.stop.set()
+            wait(futures)
+        return sum(f.result() for f in futures)
+
+    @staticmethod
+    def sync_parallel(
+            db: Session,
+            neo4j: "Neo4jSession",
+            progress: Optional[Callable[[int, Optional[int]], None]] = None,
+            workers: Optional[int] = None,
+            batch_size: Optional[int] = None,
+    ) -> dict:
+        """
+        Full rebuild without downtime: individuals and then relationships are
+        partitioned by id range and loaded by `workers` threads, each with its
+        own database cursor and Neo4j session, as :PersonNext nodes. All nodes
+        go in before any edge. The new graph then replaces :Person in a single
+        transaction (so /api/graph-tree/* sees either the old or the new
+        graph), and the old nodes are deleted in batches.
+        With a tree-scoped `db` (see app.db.tenancy) only that family tree is
+        rebuilt and swapped; the other trees' nodes are left alone.
+        """
+        started = perf_counter()
+        tree_id = session_tree_id(db)
+        workers = workers or settings.GRAPH_SYNC_WORKERS
+        batch_size = batch_size or settings.GRAPH_SYNC_BATCH_SIZE
+        # A few partitions per worker so one dense id range does not leave the others idle
+        partitions = workers * 4
+
+        individual_ranges = GraphSyncService._id_ranges(db, Individual.id, partitions)
+        relationship_ranges = GraphSyncService._id_ranges(db, Relationship.id, partitions)
+        individuals_total = db.execute(select(func.count(Individual.id))).scalar()
+        relationships_total = db.execute(select(func.count(Relationship.id))).scalar()
+        shared = _SharedProgress(progress, individuals_total + relationships_total)
+        shared.add(0)
+
+        for label in ("Person", SHADOW_LABEL):
+            neo4j.run(f"CREATE INDEX {label.lower()}_id IF NOT EXISTS FOR (n:{label}) ON (n.id)").consume()
+            neo4j.run(f"CREATE INDEX {label.lower()}_tree_id IF NOT EXISTS FOR (n:{label}) ON (n.tree_id)").consume()
+        # Leftovers of an aborted run
+        GraphSyncService._delete_label(neo4j, SHADOW_LABEL, batch_size)
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="graph-sync") as pool:
+                nodes = GraphSyncService._run_partitions(
+                    pool, GraphSyncService._load_nodes, individual_ranges, tree_id, batch_size, shared
+                )
+                edges = GraphSyncService._run_partitions(
+                    pool, GraphSyncService._load_edges, relationship_ranges, tree_id, batch_size, shared
+                )
+            if shared.stop.is_set():
+                raise RuntimeError("Graph sync stopped before completion")
+
+            retire = "MATCH (p:Person) " if tree_id is None else "MATCH (p:Person {tree_id: $tree_id}) "
+
+            def swap(tx):
+                tx.run(retire + f"SET p:{RETIRED_LABEL} REMOVE p:Person", tree_id=tree_id).consume()
+                tx.run(f"MATCH (p:{SHADOW_LABEL}) SET p:Person REMOVE p:{SHADOW_LABEL}").consume()
+            neo4j.execute_write(swap)
+        except BaseException:
+            GraphSyncService._delete_label(neo4j, SHADOW_LABEL, batch_size)
+            raise
+
+        retired = GraphSyncService._delete_label(neo4j, RETIRED_LABEL, batch_size)
+        duration = perf_counter() - started
+        GRAPH_SYNC_SECONDS.labels("sync_parallel").observe(duration)
+        GRAPH_SYNC_ROWS.labels("individuals").inc(nodes)
+        GRAPH_SYNC_ROWS.labels("relationships").inc(edges)
+        logger.info(
+            "Parallel graph sync (tree %s): %s individuals, %s relationships in %.1fs (%s workers)",
+            "all" if tree_id is None else tree_id, nodes, edges, duration, workers,
+        )
+        return {
+            "tree_id": tree_id,
+            "individuals_synced": nodes,
+            "relationships_synced": edges,
+            "retired_nodes": retired,
+            "workers": workers,
+        }
+
+
+@register_job_handler("graph_sync")
+def _run_graph_sync(ctx: JobContext) -> dict:
+    # Without a tree_id every tree is rebuilt
+    scope_session(ctx.db, ctx.params.get("tree_id"))
+    with neo4j_session() as neo4j:
+        if ctx.params.get("mode") == "serial":
+            return GraphSyncService.sync_all(ctx.db, neo4j, progress=ctx.progress)
+        return GraphSyncService.sync_parallel(
+            ctx.db, neo4j,
+            progress=ctx.progress,
+            workers=ctx.params.get("workers"),
+            batch_size=ctx.params.get("batch_size"),
+        )
@@ -1,74 +1,182 @@
-from typing import Any, Dict, List
-from neo4j import Session as Neo4jSession
+import secrets
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from neo4j import Session as Neo4jSession
+
+# (tree, person, "ancestors" | "descendants", max_depth, listing key) ->
+# [(id, depth), ...] in page order, so later pages only fetch their own people
+_listings = LRUCache(maxsize=256, ttl=settings.TREE_CURSOR_TTL)
+
+_EXPANSIONS = {
+    "ancestors": "(root)<-[:PARENT_OF*1..{max_depth}]-(person:Person)",
+    "descendants": "(root)-[:PARENT_OF*1..{max_depth}]->(person:Person)",
+}
 
 
 class GraphTreeService:
     @staticmethod
-    def get_ancestors(neo4j: Neo4jSession, person_id: int, max_depth: int = 4) -> List[Dict[str, Any]]:
+    def _listing(
+            neo4j: "Neo4jSession",
+            kind: str,
+            person_id: int,
+            tree_id: int,
+            max_depth: int,
+            listing: Optional[str],
+    ) -> Tuple[str, List[Tuple[int, int]]]:
         """
-        Returns ancestors up to `max_depth` generations above.
-        Each result includes the person's properties and the distance (generation).
-        Uses the shortest path (minimum depth) in case of multiple paths.
+        (key, [(id, depth), ...]) of everyone within `max_depth` generations,
+        ordered by (depth, id). Only the first page runs the variable-length
+        expansion; the ordered ids are then kept under `key` for
+        TREE_CURSOR_TTL, and re-listed if they expired or live in another worker.
         """
-        if max_depth < 1:
+        cache_key = (tree_id, person_id, kind, max_depth)
+        if listing is not None:
+            rows = _listings.get((*cache_key, listing))
+            if rows is not None:
+                return listing, rows
+
+        # Variable-length bounds cannot be query parameters
+        assert isinstance(max_depth, int) and 0 < max_depth <= 100, "Invalid max_depth"
+        query = f"""
+            MATCH (root:Person {{id: $id, tree_id: $tree_id}})
+            MATCH path = {_EXPANSIONS[kind].format(max_depth=max_depth)}
+            WITH person.id AS id, min(length(path)) AS depth
+            RETURN id, depth
+            ORDER BY depth ASC, id ASC
+        """
+        result = neo4j.run(query, {"id": person_id, "tree_id": tree_id})
+        rows = [(record["id"], record["depth"]) for record in result]
+
+        listing = secrets.token_urlsafe(12)
+        _listings.set((*cache_key, listing), rows)
+        return listing, rows
+
+    @staticmethod
+    def _fetch_page(
+            neo4j: "Neo4jSession",
+            tree_id: int,
+            rows: List[Tuple[int, int]],
+    ) -> List[Dict[str, Any]]:
+        """Properties of the listed people plus their depth, in listing order."""
+        if not rows:
             return []
+        query = """
+            UNWIND $rows AS row
+            MATCH (p:Person {id: row[0], tree_id: $tree_id})
+            RETURN p{.*, depth: row[1]} AS node
+        """
+        result = neo4j.run(query, {"rows": [list(row) for row in rows], "tree_id": tree_id})
+        nodes = [record["node"] for record in result]
+        nodes.sort(key=lambda node: (node["depth"], node["id"]))
+        return nodes
 
-        # Avoid injection: max_depth is used in a string, but it's an int from a trusted source
-        # Still, ensure it's safe
-        assert isinstance(max_depth, int) and max_depth > 0 and max_depth <= 100, "Invalid max_depth"
+    @staticmethod
+    def _page(
+            neo4j: "Neo4jSession",
+            kind: str,
+            person_id: int,
+            tree_id: int,
+            max_depth: int,
+            skip: int,
+            limit: Optional[int],
+            listing: Optional[str],
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        listing, rows = GraphTreeService._listing(neo4j, kind, person_id, tree_id, max_depth, listing)
+        end = None if limit is None else skip + limit
+        return GraphTreeService._fetch_page(neo4j, tree_id, rows[skip:end]), listing
 
-        query = f"""
-            MATCH (root:Person {{id: $id}})
-            MATCH path = (root)<-[:PARENT_OF*1..{max_depth}]-(ancestor:Person)
-            WITH ancestor, min(length(path)) AS depth
-            RETURN ancestor, depth
-            ORDER BY depth ASC
+    @staticmethod
+    def get_ancestors(
+            neo4j: "Neo4jSession",
+            person_id: int,
+            tree_id: int,
+            max_depth: int = 4,
+            skip: int = 0,
+            limit: Optional[int] = None,
+            listing: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], str]:
         """
+        Returns ancestors up to `max_depth` generations above, and the key of
+        their listing (pass it back with the next `skip` to page on).
+        Each result includes the person's properties and the distance (generation).
+        The root must belong to family tree `tree_id`; PARENT_OF edges never
+        leave a tree, so neither does the traversal.
+        Uses the shortest path (minimum depth) in case of multiple paths.
+        `skip`/`limit` page through the result in (depth, id) order.
+        """
+        if max_depth < 1:
+            return [], ""
 
-        result = neo4j.run(query, {"id": person_id})
+        ancestors, listing = GraphTreeService._page(
+            neo4j, "ancestors", person_id, tree_id, max_depth, skip, limit, listing
+        )
         return [
             {
-                "id": record["ancestor"]["id"],
-                "name": record["ancestor"]["name"],
-                "gender": record["ancestor"].get("gender"),
-                "depth": record["depth"],
+                "id": node["id"],
+                "name": node.get("name"),
+                "gender": node.get("gender"),
+                "depth": node["depth"],
             }
-            for record in result
-        ]
+            for node in ancestors
+        ], listing
 
     @staticmethod
-    def get_descendants(neo4j: Neo4jSession, person_id: int, max_depth: int = 4) -> List[Dict[str, Any]]:
-        """
-        Returns descendants up to `max_depth` generations below.
+    def get_descendants(
+            neo4j: "Neo4jSession",
+            person_id: int,
+            tree_id: int,
+            max_depth: int = 4,
+            skip: int = 0,
+            limit: Optional[int] = None,
+            listing: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], str]:
         """
-        query = """
-        MATCH (root:Person {id: $id})
-        MATCH path = (root)-[:PARENT_OF*1..$max_depth]->(desc:Person)
-        WITH desc, length(path) as depth
-        RETURN DISTINCT desc{.*, depth} AS node
-        ORDER BY depth ASC
+        Returns descendants up to `max_depth` generations below
+        (shortest depth per person), paged like get_ancestors.
         """
-        result = neo4j.run(query, {"id": person_id, "max_depth": max_depth})
-        return [record["node"] for record in result]
+        return GraphTreeService._page(
+            neo4j, "descendants", person_id, tree_id, max_depth, skip, limit, listing
+        )
 
     @staticmethod
-    def get_full_tree(neo4j: Neo4jSession, person_id: int, max_depth: int = 4) -> Dict[str, Any]:
+    def get_full_tree(
+            neo4j: "Neo4jSession",
+            person_id: int,
+            tree_id: int,
+            max_depth: int = 4,
+            ancestors_skip: int = 0,
+            descendants_skip: int = 0,
+            limit: Optional[int] = None,
+            listings: Tuple[Optional[str], Optional[str]] = (None, None),
+    ) -> Dict[str, Any]:
         """
         Simple combined view: root, ancestors, descendants.
         This is a JSON structure suitable for visualization in the next phase.
+        `limit` applies to ancestors and descendants separately; `listings`
+        are the (ancestors, descendants) listing keys, returned under the
+        same name.
         """
-        root_query = "MATCH (p:Person {id: $id}) RETURN p{.*} as node"
-        root_res = neo4j.run(root_query, {"id": person_id}).single()
+        root_query = "MATCH (p:Person {id: $id, tree_id: $tree_id}) RETURN p{.*} as node"
+        root_res = neo4j.run(root_query, {"id": person_id, "tree_id": tree_id}).single()
         if not root_res:
             return {}
 
         root = root_res["node"]
 
-        ancestors = GraphTreeService.get_ancestors(neo4j, person_id, max_depth)
-        descendants = GraphTreeService.get_descendants(neo4j, person_id, max_depth)
+        ancestors, ancestors_listing = GraphTreeService.get_ancestors(
+            neo4j, person_id, tree_id, max_depth, ancestors_skip, limit, listings[0]
+        )
+        descendants, descendants_listing = GraphTreeService.get_descendants(
+            neo4j, person_id, tree_id, max_depth, descendants_skip, limit, listings[1]
+        )
 
         return {
             "root": root,
             "ancestors": ancestors,
             "descendants": descendants,
+            "listings": (ancestors_listing, descendants_listing),
         }
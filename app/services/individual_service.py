@@ -1,28 +1,77 @@
+from typing import List, Optional, Sequence
+
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.repositories.individual_repository import (
-create_individual, get_individual, get_all_individuals, update_individual, delete_individual
+create_individual, get_individual, get_all_individuals, update_individual, delete_individual,
+get_individuals_by_ids,
 )
 
-from app.schemas.individual_schema import IndividualCreate, IndividualUpdate
+from app.schemas.individual_schema import IndividualBatch, IndividualCreate, IndividualResponse, IndividualUpdate
+from app.services.aggregate_service import AggregateService
+
+# Fields a batch request may project to
+BATCH_FIELDS = frozenset(IndividualResponse.model_fields)
 
 class IndividualService:
 
     @staticmethod
     def create(db:Session, data: IndividualCreate):
-        return create_individual(db, data)
+        individual = create_individual(db, data)
+        AggregateService.on_individual_created(db, individual.id)
+        db.commit()
+        return individual
 
     @staticmethod
     def get(db:Session, individual_id:int):
         return get_individual(db, individual_id)
 
+    @staticmethod
+    def get_many(db: Session, ids: Sequence[int], fields: Optional[List[str]] = None) -> IndividualBatch:
+        """
+        Individuals in the order requested, plus the ids that do not exist.
+        Raises ValueError for too many ids or unknown fields.
+        """
+        if len(ids) > settings.INDIVIDUAL_BATCH_MAX_IDS:
+            raise ValueError(f"At most {settings.INDIVIDUAL_BATCH_MAX_IDS} ids per request")
+        unknown = set(fields or ()) - BATCH_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        ordered = list(dict.fromkeys(ids))
+        if fields is None or "aggregates" in fields:
+            # Aggregates come with the entity (joined); project after loading
+            include = None if fields is None else {"id", *fields}
+            found = get_individuals_by_ids(db, ordered)
+            items = [
+                IndividualResponse.model_validate(found[i]).model_dump(mode="json", include=include)
+                for i in ordered if i in found
+            ]
+        else:
+            found = get_individuals_by_ids(db, ordered, fields)
+            items = [found[i] for i in ordered if i in found]
+        return IndividualBatch(items=items, missing=[i for i in ordered if i not in found])
+
     @staticmethod
     def list(db:Session, skip:int, limit:int):
         return get_all_individuals(db,skip,limit)
 
     @staticmethod
     def update(db:Session, individual_id:int, data:IndividualUpdate):
+        # Living-descendant counters of the ancestors move with is_alive;
+        # staged here so update_individual commits them together
+        individual = get_individual(db, individual_id)
+        if individual is not None and "is_alive" in data.model_fields_set:
+            was_alive = AggregateService.living_flag(individual)
+            if was_alive != (data.is_alive is not False):
+                AggregateService.on_alive_changed(db, individual_id, -1 if was_alive else 1)
         return update_individual(db, individual_id,data)
 
     @staticmethod
     def delete(db:Session, individual_id:int):
-        return delete_individual(db, individual_id)
\ No newline at end of file
+        if get_individual(db, individual_id) is not None:
+            AggregateService.on_individual_deleted(db, individual_id)
+        deleted = delete_individual(db, individual_id)
+        if deleted:
+            AggregateService.refresh_stale(db)
+        return deleted
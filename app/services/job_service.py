@@ -0,0 +1,162 @@
+import logging
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, perf_counter
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import JOB_DURATION_SECONDS, JOBS_FINISHED
+from app.db.database import SessionLocal, open_admin_session
+from app.models.job import Job
+from app.repositories.job_repository import (
+    create_job, fail_abandoned_jobs, finish_job, get_active_job, get_job, list_jobs,
+    record_progress, request_cancel, start_job,
+)
+
+logger = logging.getLogger("family_tree.jobs")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_handlers: Dict[str, Callable[["JobContext"], Optional[dict]]] = {}
+_worker_name = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobCancelled(Exception):
+    """Raised from JobContext.progress once cancellation was requested."""
+
+
+class JobAlreadyRunning(Exception):
+    def __init__(self, job: Job):
+        super().__init__(f"A {job.job_type} job is already {job.status}")
+        self.job = job
+
+
+class JobContext:
+    """
+    What a handler gets: its parameters, an admin-timeout session for the
+    work itself, and progress(), which persists progress (rate-limited, on
+    its own session so the work's transaction is untouched) and raises
+    JobCancelled when the job should stop.
+    """
+
+    def __init__(self, job_id: int, params: dict, db: Session):
+        self.job_id = job_id
+        self.params = params
+        self.db = db
+        self.processed = 0
+        self.total: Optional[int] = None
+        self._last_write = 0.0
+
+    def progress(self, processed: int, total: Optional[int] = None, force: bool = False) -> None:
+        self.processed = processed
+        if total is not None:
+            self.total = total
+        now = monotonic()
+        if not force and now - self._last_write < settings.JOB_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_write = now
+        with SessionLocal() as db:
+            cancelled = record_progress(db, self.job_id, self.processed, self.total)
+        if cancelled:
+            raise JobCancelled()
+
+    def advance(self, rows: int) -> None:
+        self.progress(self.processed + rows)
+
+
+def register_job_handler(job_type: str):
+    """
+    Decorator for `handler(ctx) -> dict | None`; the return value becomes
+    the job's result.
+    """
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Job threads, separate from the request threadpool."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.JOB_WORKERS, thread_name_prefix="job")
+    return _executor
+
+
+def shutdown_job_runner() -> None:
+    """
+    Stop accepting work. Running jobs are not waited for; if the process
+    exits first their lock is released by the heartbeat check.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class JobService:
+
+    @staticmethod
+    def submit(db: Session, job_type: str, params: Optional[dict] = None) -> Job:
+        """Persist and schedule a job; raises JobAlreadyRunning if this type is busy."""
+        if job_type not in _handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        fail_abandoned_jobs(db, settings.JOB_STALE_AFTER_SECONDS)
+        job = create_job(db, job_type, params)
+        if job is None:
+            active = get_active_job(db, job_type)
+            if active is None:
+                # Finished between the insert and the lookup; try once more
+                job = create_job(db, job_type, params)
+            if job is None:
+                raise JobAlreadyRunning(active or get_active_job(db, job_type))
+
+        get_executor().submit(JobService._run, job.id)
+        logger.info("Queued %s job %s", job_type, job.id)
+        return job
+
+    @staticmethod
+    def get(db: Session, job_id: int) -> Optional[Job]:
+        return get_job(db, job_id)
+
+    @staticmethod
+    def list(db: Session, job_type: Optional[str] = None, limit: int = 50) -> List[Job]:
+        return list_jobs(db, job_type, limit)
+
+    @staticmethod
+    def cancel(db: Session, job_id: int) -> Optional[Job]:
+        return request_cancel(db, job_id)
+
+    @staticmethod
+    def _run(job_id: int) -> None:
+        with SessionLocal() as db:
+            if not start_job(db, job_id, _worker_name):
+                return  # cancelled while queued
+            job = get_job(db, job_id)
+            job_type, params = job.job_type, dict(job.params or {})
+
+        started = perf_counter()
+        work_db = open_admin_session()
+        ctx = JobContext(job_id, params, work_db)
+        status, result, error = "succeeded", None, None
+        try:
+            result = _handlers[job_type](ctx)
+        except JobCancelled:
+            work_db.rollback()
+            status = "cancelled"
+        except Exception as e:
+            work_db.rollback()
+            logger.exception("%s job %s failed", job_type, job_id)
+            status, error = "failed", str(e)
+        finally:
+            work_db.close()
+
+        with SessionLocal() as db:
+            record_progress(db, job_id, ctx.processed, ctx.total)
+            finish_job(db, job_id, status, result=result, error=error)
+        JOBS_FINISHED.labels(job_type, status).inc()
+        JOB_DURATION_SECONDS.labels(job_type).observe(perf_counter() - started)
+        logger.info("%s job %s %s", job_type, job_id, status)
@@ -0,0 +1,110 @@
+from datetime import date
+from typing import Iterator, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.individual import Individual
+from app.repositories.individual_repository import get_individual
+from app.repositories.lifespan_repository import (
+    alive_at_condition, born_between_condition, get_individuals_page, overlaps_condition,
+)
+from app.schemas.individual_schema import IndividualPage, IndividualResponse
+from app.services.tree_service import TreeService
+
+
+class LifespanService:
+    """
+    Temporal queries over birth/death dates ("alive in 1918", "born
+    1850-1870 named X"), paged by id so every page is one index-backed query.
+    """
+
+    @staticmethod
+    def alive_at(db: Session, day: date):
+        return alive_at_condition(db, day)
+
+    @staticmethod
+    def born_between(start: date, end: date, surname: Optional[str] = None):
+        if start > end:
+            raise ValueError("start must not be after end")
+        return born_between_condition(start, end, surname)
+
+    @staticmethod
+    def overlapping(db: Session, individual_id: int):
+        """
+        People whose lifespan overlaps the given person's (excluding them);
+        None if the person does not exist.
+        """
+        person = get_individual(db, individual_id)
+        if person is None:
+            return None
+        if person.birth_date is None and person.death_date is None:
+            raise ValueError("Individual has no known birth or death date")
+
+        death = person.death_date
+        if death is not None and person.birth_date is not None and death < person.birth_date:
+            death = None
+        return overlaps_condition(db, person.birth_date, death) & (Individual.id != individual_id)
+
+    @staticmethod
+    def tree_ids(
+            db: Session,
+            root_id: int,
+            direction: str,
+            max_depth: int,
+            node_budget: Optional[int] = None,
+    ) -> Optional[Set[int]]:
+        """
+        Everyone build_multi_level_tree would return for this root, or None
+        if it does not exist. Raises ValueError as soon as the tree grows
+        past `node_budget` people (a partial tree would be a wrong filter).
+        """
+        if get_individual(db, root_id) is None:
+            return None
+        ids: Set[int] = set()
+        for _, generation_ids in TreeService._iter_generation_ids(db, root_id, direction, max_depth):
+            ids |= generation_ids
+            if node_budget is not None and len(ids) > node_budget:
+                raise ValueError(f"This tree has more than {node_budget} people, request fewer generations")
+        return ids
+
+    @staticmethod
+    def decode_page_cursor(cursor: Optional[str]) -> int:
+        """Last id of the previous page (0 without a cursor); ValueError if malformed."""
+        if cursor is None:
+            return 0
+        after = decode_cursor(cursor).get("after")
+        if not isinstance(after, int) or after < 0:
+            raise ValueError("Invalid cursor")
+        return after
+
+    @staticmethod
+    def page(
+            db: Session,
+            condition,
+            limit: int,
+            after_id: int = 0,
+            within_ids: Optional[Set[int]] = None,
+    ) -> IndividualPage:
+        # One extra row tells whether another page exists
+        rows = get_individuals_page(db, condition, after_id, limit + 1, within_ids)
+        items = [TreeService.to_schema(ind) for ind in rows[:limit]]
+        next_cursor = encode_cursor({"after": items[-1].id}) if len(rows) > limit else None
+        return IndividualPage(items=items, next_cursor=next_cursor)
+
+    @staticmethod
+    def iter_matches(
+            db: Session,
+            condition,
+            batch_size: int,
+            after_id: int = 0,
+            within_ids: Optional[Set[int]] = None,
+    ) -> Iterator[IndividualResponse]:
+        """Every match from `after_id` on, fetched one keyset page at a time."""
+        while True:
+            rows = get_individuals_page(db, condition, after_id, batch_size, within_ids)
+            for ind in rows:
+                yield TreeService.to_schema(ind)
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1].id
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app.repositories.relationship_repository import (create_relationship, individual_relationship)
+from app.services.aggregate_service import AggregateService
 from app.services.individual_service import IndividualService
 
 VALID_TYPES = {"parent", "child", "spouse"}
@@ -27,7 +28,15 @@ class RelationshipService:
             "relationship_type": rel_type,
         }
 
-        return  create_relationship(db, data)
+        # Counter deltas are staged first so they commit with the new row
+        link = AggregateService.parent_link(individual_id, related_id, rel_type)
+        if link is not None:
+            AggregateService.on_parent_link(db, *link, sign=1)
+
+        rel = create_relationship(db, data)
+        if link is not None:
+            AggregateService.refresh_stale(db)
+        return rel
 
     @staticmethod
     def get_relationships(db: Session, individual_id: int):
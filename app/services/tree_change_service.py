@@ -0,0 +1,89 @@
+import asyncio
+from typing import AsyncIterator, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.change_broker import STRUCTURAL_EVENTS, Subscription, change_broker
+from app.core.config import settings
+from app.db.database import open_read_session
+from app.db.tenancy import tree_exists
+from app.services.tree_service import TreeService
+
+
+class ChangeStreamsUnavailable(Exception):
+    """This worker cannot take another live change stream right now."""
+
+
+class TreeChangeService:
+    """
+    Live change streams for immediate-family views (see
+    app.core.change_broker). A stream follows the people in one person's
+    view and re-reads that neighbourhood after structural changes, so new
+    relatives are followed as they appear.
+    """
+
+    @staticmethod
+    def neighbourhood(tree_id: int, individual_id: int) -> Optional[Set[int]]:
+        """Ids in the person's immediate-family view; None if the tree or person does not exist."""
+        db = open_read_session(tree_id)
+        try:
+            if not tree_exists(db, tree_id):
+                return None
+            return TreeService.immediate_family_ids(db, individual_id)
+        finally:
+            db.close()
+
+    @staticmethod
+    async def open(tree_id: int, individual_id: int) -> Optional[Subscription]:
+        """
+        Subscribe to the person's neighbourhood; None if they do not exist.
+        Subscribes before reading the neighbourhood, so nothing committed
+        after this returns is missed.
+        """
+        if not change_broker.running:
+            raise ChangeStreamsUnavailable("Live updates are not available")
+        if change_broker.subscriber_count() >= settings.CHANGE_STREAM_MAX_SUBSCRIBERS:
+            raise ChangeStreamsUnavailable("Too many live update streams, please retry")
+
+        subscription = change_broker.subscribe(tree_id, individual_id, ())
+        try:
+            watched = await run_in_threadpool(TreeChangeService.neighbourhood, tree_id, individual_id)
+        except BaseException:
+            change_broker.unsubscribe(subscription)
+            raise
+        if watched is None:
+            change_broker.unsubscribe(subscription)
+            return None
+        change_broker.watch(subscription, watched)
+        return subscription
+
+    @staticmethod
+    def close(subscription: Subscription) -> None:
+        change_broker.unsubscribe(subscription)
+
+    @staticmethod
+    async def events(subscription: Subscription) -> AsyncIterator[Optional[dict]]:
+        """
+        Matching events as they arrive, and None after each quiet
+        CHANGE_STREAM_HEARTBEAT_SECONDS (time for a keep-alive). Ends after
+        a resync that closed the subscription, or once the person is deleted.
+        """
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), settings.CHANGE_STREAM_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield None
+                continue
+
+            yield event
+            if subscription.closed:
+                return
+            if event["type"] in STRUCTURAL_EVENTS or event["type"] == "resync":
+                watched = await run_in_threadpool(
+                    TreeChangeService.neighbourhood, subscription.tree_id, subscription.individual_id
+                )
+                if watched is None:
+                    return
+                change_broker.watch(subscription, watched)
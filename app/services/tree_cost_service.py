@@ -0,0 +1,90 @@
+import math
+from typing import Set
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.tenancy import session_tree_id
+from app.services.aggregate_service import AggregateService
+from app.services.tree_service import TreeService
+
+# (tree, individual_id, "ancestors" | "descendants") -> (first level size, second level size)
+_probe_cache = LRUCache(maxsize=50_000, ttl=settings.TREE_COST_PROBE_TTL)
+
+# Stop extrapolating past this; the request is truncated long before anyway
+_MAX_ESTIMATE = 10 ** 9
+
+
+class TreeCostService:
+    """
+    Predicts how many individuals a multi-level traversal will return,
+    before running it, from a two-level fan-out probe (two set-based queries
+    per direction, cached for TREE_COST_PROBE_TTL). Exact aggregate counters,
+    when up to date, bound or replace the extrapolation.
+    """
+
+    @staticmethod
+    def _probe(db: Session, individual_id: int, kind: str) -> tuple[int, int]:
+        key = (session_tree_id(db), individual_id, kind)
+        cached = _probe_cache.get(key)
+        if cached is not None:
+            return cached
+
+        step = (
+            TreeService._get_children_of_parents if kind == "descendants"
+            else TreeService._get_parents_of_children
+        )
+        first: Set[int] = step(db, [individual_id]) - {individual_id}
+        second: Set[int] = step(db, first) - first - {individual_id} if first else set()
+
+        result = (len(first), len(second))
+        _probe_cache.set(key, result)
+        return result
+
+    @staticmethod
+    def _extrapolate(first: int, second: int, max_depth: int, binary: bool) -> int:
+        """
+        Levels 1 and 2 are known exactly; deeper levels grow by the observed
+        level-2/level-1 ratio. Ancestor levels (`binary`) are capped at 2^depth.
+        """
+        if first == 0:
+            return 0
+
+        fanout = second / first
+        total = 0.0
+        level = float(first)
+        for depth in range(1, max_depth + 1):
+            if depth == 2:
+                level = float(second)
+            elif depth > 2:
+                level *= fanout
+            if binary:
+                level = min(level, 2.0 ** depth)
+            if level < 0.5:
+                break
+            total += level
+            if total >= _MAX_ESTIMATE:
+                return _MAX_ESTIMATE
+        return int(math.ceil(total))
+
+    @staticmethod
+    def estimate(db: Session, individual_id: int, direction: str, max_depth: int) -> int:
+        """Predicted node count (including the root) of build_multi_level_tree."""
+        aggregates = AggregateService.get(db, individual_id)
+        exact = AggregateService.is_exact(aggregates)
+
+        total = 1
+        if direction in ("ancestors", "both"):
+            first, second = TreeCostService._probe(db, individual_id, "ancestors")
+            guess = TreeCostService._extrapolate(first, second, max_depth, binary=True)
+            total += min(guess, aggregates.ancestor_count) if exact else guess
+        if direction in ("descendants", "both"):
+            if exact and aggregates.generation_depth <= max_depth:
+                # Every descendant is within reach
+                total += aggregates.descendant_count
+            else:
+                first, second = TreeCostService._probe(db, individual_id, "descendants")
+                guess = TreeCostService._extrapolate(first, second, max_depth, binary=False)
+                total += min(guess, aggregates.descendant_count) if exact else guess
+        return min(total, _MAX_ESTIMATE)
@@ -0,0 +1,172 @@
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.models.relationship import Relationship
+
+
+class TreeLayoutService:
+    """
+    Layered (Sugiyama-style) layout for multi-generation trees.
+
+    Each generation is a horizontal layer. Layers are placed outward from the
+    root (generation 0): descendants are ordered by the barycenter of their
+    parents, ancestors by the barycenter of their children. Spouses in the same
+    layer are kept next to each other. Every node is visited a constant number
+    of times, so apart from the per-layer sort the work is linear in the size
+    of the tree.
+    """
+
+    H_SPACING = 150
+    V_SPACING = 120
+
+    # ----------------------- EDGE NORMALISATION ------------------------------ #
+
+    @staticmethod
+    def normalise_edges(
+            rels: Sequence[Relationship],
+    ) -> tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+        """
+        Turn Relationship rows into:
+          - parent_edges: {(parent_id, child_id)}
+          - spouse_edges: {(a_id, b_id)} with a_id < b_id
+        """
+        parent_edges: Set[Tuple[int, int]] = set()
+        spouse_edges: Set[Tuple[int, int]] = set()
+
+        for rel in rels:
+            a, b = rel.individual_id, rel.related_individual_id
+            if rel.relationship_type == "parent":
+                parent_edges.add((a, b))
+            elif rel.relationship_type == "child":
+                parent_edges.add((b, a))
+            elif rel.relationship_type == "spouse":
+                spouse_edges.add((min(a, b), max(a, b)))
+
+        return parent_edges, spouse_edges
+
+    # ----------------------- LAYOUT ------------------------------------------ #
+
+    @staticmethod
+    def layout(
+            layers: Dict[int, List[int]],
+            parent_edges: Set[Tuple[int, int]],
+            spouse_edges: Set[Tuple[int, int]],
+    ) -> Dict[int, Tuple[int, int]]:
+        """
+        Compute (x, y) for every id in `layers` (generation -> ids).
+        The root generation is centred on x=0, y grows with generation.
+        """
+        parents_of: Dict[int, List[int]] = {}
+        children_of: Dict[int, List[int]] = {}
+        for parent_id, child_id in parent_edges:
+            parents_of.setdefault(child_id, []).append(parent_id)
+            children_of.setdefault(parent_id, []).append(child_id)
+
+        spouses_of: Dict[int, List[int]] = {}
+        for a, b in spouse_edges:
+            spouses_of.setdefault(a, []).append(b)
+            spouses_of.setdefault(b, []).append(a)
+
+        positions: Dict[int, float] = {}
+
+        # Root generation first, then walk outward in both directions so each
+        # layer is placed relative to the layer nearer to the root.
+        if 0 in layers:
+            TreeLayoutService._place_layer(layers[0], {}, spouses_of, positions)
+
+        for gen in sorted(g for g in layers if g > 0):
+            TreeLayoutService._place_layer(layers[gen], parents_of, spouses_of, positions)
+
+        for gen in sorted((g for g in layers if g < 0), reverse=True):
+            TreeLayoutService._place_layer(layers[gen], children_of, spouses_of, positions)
+
+        coords: Dict[int, Tuple[int, int]] = {}
+        for gen, ids in layers.items():
+            y = gen * TreeLayoutService.V_SPACING
+            for nid in ids:
+                coords[nid] = (int(round(positions[nid])), y)
+
+        return coords
+
+    @staticmethod
+    def _place_layer(
+            ids: List[int],
+            neighbours_of: Dict[int, List[int]],
+            spouses_of: Dict[int, List[int]],
+            positions: Dict[int, float],
+    ) -> None:
+        """
+        Order one layer by neighbour barycenter and assign x coordinates,
+        keeping at least H_SPACING between consecutive nodes.
+        """
+        spacing = TreeLayoutService.H_SPACING
+        ordered_ids = sorted(ids)
+        index = {nid: i for i, nid in enumerate(ordered_ids)}
+
+        # Desired x = mean x of already-placed neighbours (None if unknown)
+        desired: Dict[int, Optional[float]] = {}
+        for nid in ordered_ids:
+            xs = [positions[n] for n in neighbours_of.get(nid, ()) if n in positions]
+            desired[nid] = sum(xs) / len(xs) if xs else None
+
+        # Group spouses within this layer into family units (union-find)
+        unit_of: Dict[int, int] = {nid: nid for nid in ordered_ids}
+
+        def find(nid: int) -> int:
+            while unit_of[nid] != nid:
+                unit_of[nid] = unit_of[unit_of[nid]]
+                nid = unit_of[nid]
+            return nid
+
+        for nid in ordered_ids:
+            for sid in spouses_of.get(nid, ()):
+                if sid in unit_of:
+                    ra, rb = find(nid), find(sid)
+                    if ra != rb:
+                        unit_of[max(ra, rb)] = min(ra, rb)
+
+        units: Dict[int, List[int]] = {}
+        for nid in ordered_ids:
+            units.setdefault(find(nid), []).append(nid)
+
+        def unit_target(members: List[int]) -> Optional[float]:
+            known = [desired[m] for m in members if desired[m] is not None]
+            return sum(known) / len(known) if known else None
+
+        unit_targets = {root: unit_target(members) for root, members in units.items()}
+
+        # Units with a known target are ordered by it; the rest go to the right
+        def unit_key(root: int):
+            target = unit_targets[root]
+            if target is None:
+                return 1, 0.0, index[root]
+            return 0, target, index[root]
+
+        order: List[int] = []
+        for root in sorted(units, key=unit_key):
+            members = units[root]
+            members.sort(key=lambda m: (desired[m] is None, desired[m] or 0.0, index[m]))
+            order.extend(members)
+
+        # Left-to-right sweep enforcing minimum spacing
+        xs: List[float] = []
+        targets: List[Optional[float]] = []
+        prev: Optional[float] = None
+        for nid in order:
+            target = desired[nid]
+            if target is None:
+                target = unit_targets[find(nid)]
+            want = target if target is not None else (prev + spacing if prev is not None else 0.0)
+            x = want if prev is None else max(want, prev + spacing)
+            xs.append(x)
+            targets.append(target)
+            prev = x
+
+        # Shift the whole layer so it sits centred over its targets
+        offsets = [t - x for t, x in zip(targets, xs) if t is not None]
+        if offsets:
+            shift = sum(offsets) / len(offsets)
+        else:
+            shift = -(xs[0] + xs[-1]) / 2 if xs else 0.0
+
+        for nid, x in zip(order, xs):
+            positions[nid] = x + shift
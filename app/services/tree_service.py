@@ -1,13 +1,23 @@
-from typing import List, Set, Sequence, Dict, Optional, Callable
+import secrets
+from itertools import chain
+from typing import List, Set, Sequence, Optional, Callable, Iterator, Iterable
 
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, select
+from sqlalchemy import or_, and_, select, union
 
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor
+from app.db.tenancy import session_tree_id
 from app.models.individual import Individual
 from app.models.relationship import Relationship
 from app.schemas.tree_schema import ImmediateFamily, MultiLevelTree, GenerationBand
 from app.schemas.individual_schema import IndividualResponse
 
+# (tree, root, cursor key) -> BFS state where a truncated multi-level tree
+# stopped, so the next page continues the traversal instead of re-running it
+_cursor_states = LRUCache(maxsize=256, ttl=settings.TREE_CURSOR_TTL)
+
 
 class TreeService:
 
@@ -15,6 +25,8 @@ class TreeService:
 
     @staticmethod
     def _get_individual(db:Session, individual_id:int)-> Optional[Individual]:
+        # Like every query here, limited to the session's family tree (see
+        # app.db.tenancy); relationships never cross trees, so neither do traversals
         stmt = select(Individual).where(Individual.id == individual_id)
         result = db.execute(stmt)
         return result.scalar_one_or_none()
@@ -34,6 +46,25 @@ class TreeService:
         result = db.execute(stmt)
         return result.scalars().all()
 
+    @staticmethod
+    def _get_relationships_within(db: Session, ids: Set[int]) -> Sequence[Relationship]:
+        """
+        Fetch all relationships where BOTH sides are in `ids`.
+        Used to draw edges between people already present in a tree.
+        """
+        if not ids:
+            return []
+
+        stmt = select(Relationship).where(
+            and_(
+                Relationship.individual_id.in_(ids),
+                Relationship.related_individual_id.in_(ids),
+            )
+        )
+
+        result = db.execute(stmt)
+        return result.scalars().all()
+
 
     @staticmethod
     def _classify_direct_relations(
@@ -143,6 +174,49 @@ class TreeService:
 
         return set(ids1) | set(ids2)
 
+    @staticmethod
+    def _get_children_of_parents(db: Session, parent_ids: Iterable[int]) -> Set[int]:
+        """
+        Set-based _get_children_of_parent: all children of any of `parent_ids`
+        in one round trip.
+        """
+        parent_ids = list(parent_ids)
+        if not parent_ids:
+            return set()
+
+        stmt = union(
+            select(Relationship.related_individual_id).where(
+                Relationship.individual_id.in_(parent_ids),
+                Relationship.relationship_type == "parent",
+            ),
+            select(Relationship.individual_id).where(
+                Relationship.related_individual_id.in_(parent_ids),
+                Relationship.relationship_type == "child",
+            ),
+        )
+        return set(db.execute(stmt).scalars().all())
+
+    @staticmethod
+    def _get_parents_of_children(db: Session, child_ids: Iterable[int]) -> Set[int]:
+        """
+        Set-based _get_parents_of_child.
+        """
+        child_ids = list(child_ids)
+        if not child_ids:
+            return set()
+
+        stmt = union(
+            select(Relationship.individual_id).where(
+                Relationship.related_individual_id.in_(child_ids),
+                Relationship.relationship_type == "parent",
+            ),
+            select(Relationship.related_individual_id).where(
+                Relationship.individual_id.in_(child_ids),
+                Relationship.relationship_type == "child",
+            ),
+        )
+        return set(db.execute(stmt).scalars().all())
+
 
     # ----------------------- SCHEMA MAPPING ------------------------------ #
 
@@ -157,19 +231,8 @@ class TreeService:
     # ----------------------- IMMEDIATE /  SMART TREE ------------------------------------- #
 
     @staticmethod
-    def build_immediate_family(db: Session, individual_id: int) -> ImmediateFamily | None:
-        """
-        Smart/immediate tree:
-        - root
-        - parents
-        - siblings  (based on shared parents)
-        - spouses
-        - children
-        """
-        root = TreeService._get_individual(db, individual_id)
-        if not root:
-            return None
-
+    def _immediate_family_groups(db: Session, individual_id: int) -> tuple[Set[int], Set[int], Set[int], Set[int]]:
+        """(parent_ids, child_ids, spouse_ids, sibling_ids) of an individual."""
         # Get all relationship edges (two-sided)
         rels = TreeService._get_all_relationships_for(db, individual_id)
         parent_ids, child_ids, spouse_ids = TreeService._classify_direct_relations(
@@ -184,6 +247,33 @@ class TreeService:
             for cid in all_children:
                 if cid != individual_id:
                     sibling_ids.add(cid)
+        return parent_ids, child_ids, spouse_ids, sibling_ids
+
+    @staticmethod
+    def immediate_family_ids(db: Session, individual_id: int) -> Optional[Set[int]]:
+        """
+        Ids shown by build_immediate_family (root included), without loading
+        the people; None if the individual does not exist.
+        """
+        if TreeService._get_individual(db, individual_id) is None:
+            return None
+        return {individual_id}.union(*TreeService._immediate_family_groups(db, individual_id))
+
+    @staticmethod
+    def build_immediate_family(db: Session, individual_id: int) -> ImmediateFamily | None:
+        """
+        Smart/immediate tree:
+        - root
+        - parents
+        - siblings  (based on shared parents)
+        - spouses
+        - children
+        """
+        root = TreeService._get_individual(db, individual_id)
+        if not root:
+            return None
+
+        parent_ids, child_ids, spouse_ids, sibling_ids = TreeService._immediate_family_groups(db, individual_id)
 
         # ------------------- QUERY ACTUAL INDIVIDUALS ------------------------ #
 
@@ -213,23 +303,25 @@ class TreeService:
     # ---------- multi-level ancestors / descendants ----------
 
     @staticmethod
-    def _bfs_generations(
+    def _iter_bfs_generations(
             db: Session,
             start_ids: Set[int],
-            step_func: Callable[[Session, int], Set[int]],
+            expand_func: Callable[[Session, Iterable[int]], Set[int]],
             initial_generation: int,
             step: int,
             max_depth: int,
             seen: Set[int],
-    ) -> Dict[int, Set[int]]:
+    ) -> Iterator[tuple[int, Set[int]]]:
         """
         Generic BFS used for both ancestors and descendants.
+        Lazily yields (generation, ids) one BFS step at a time, so callers
+        that stop iterating also stop issuing queries.
 
-        step_func: given person_id -> set[related_id]
+        expand_func: given a band of ids -> set of related ids (one query
+            per band, e.g. _get_parents_of_children)
         initial_generation: usually 0 (root)
         step: +1 for descendants, -1 for ancestors
         """
-        generations: Dict[int, Set[int]] = {}
         current_ids = set(start_ids)
         current_generation = initial_generation
 
@@ -237,22 +329,121 @@ class TreeService:
             if not current_ids:
                 break
 
-            next_ids: Set[int] = set()
-            for pid in current_ids:
-                related_ids = step_func(db, pid)
-                for rid in related_ids:
-                    if rid not in seen:
-                        seen.add(rid)
-                        next_ids.add(rid)
-
+            next_ids = expand_func(db, current_ids) - seen
             if not next_ids:
                 break
 
+            seen |= next_ids
             current_generation += step
-            generations[current_generation] = next_ids
+            yield current_generation, next_ids
             current_ids = next_ids
 
-        return generations
+    @staticmethod
+    def _materialize_band(db: Session, generation: int, ids: Set[int]) -> GenerationBand:
+        if ids:
+            stmt = select(Individual).where(Individual.id.in_(ids))
+            result = db.execute(stmt)
+            individuals = result.scalars().all()
+        else:
+            individuals = []
+
+        return GenerationBand(
+            generation=generation,
+            individuals=[TreeService.to_schema(ind) for ind in individuals],
+        )
+
+    @staticmethod
+    def _initial_walks(root_id: int, direction: str, max_depth: int) -> List[list]:
+        """
+        BFS walks for a direction, in the order they run: ancestors
+        (negative generations) before descendants (positive ones). Each walk
+        is [frontier, generation, step, depth left].
+        """
+        walks = []
+        if direction in ("ancestors", "both"):
+            walks.append([{root_id}, 0, -1, max_depth])
+        if direction in ("descendants", "both"):
+            walks.append([{root_id}, 0, +1, max_depth])
+        return walks
+
+    @staticmethod
+    def _walk_generations(db: Session, walks: List[list], seen: Set[int]) -> Iterator[tuple[int, Set[int]]]:
+        """
+        Runs `walks` in order, yielding (generation, ids). The first walk is
+        advanced before each band is yielded, so (walks, seen) is always
+        exactly what is needed to continue after the last band.
+        """
+        while walks:
+            frontier, generation, step, depth_left = walks[0]
+            expand_func = (
+                TreeService._get_parents_of_children if step < 0
+                else TreeService._get_children_of_parents
+            )
+            for generation, ids in TreeService._iter_bfs_generations(
+                    db=db,
+                    start_ids=frontier,
+                    expand_func=expand_func,
+                    initial_generation=generation,
+                    step=step,
+                    max_depth=depth_left,
+                    seen=seen,
+            ):
+                depth_left -= 1
+                walks[0] = [ids, generation, step, depth_left]
+                yield generation, ids
+            walks.pop(0)
+
+    @staticmethod
+    def _iter_generation_ids(
+            db: Session,
+            root_id: int,
+            direction: str,
+            max_depth: int,
+    ) -> Iterator[tuple[int, Set[int]]]:
+        """
+        Yields (generation, ids): the root (0), then ancestors (-1, -2, ...),
+        then descendants (+1, +2, ...), each as soon as its BFS step is done.
+        This order is stable, which is what continuation cursors rely on.
+        """
+        yield 0, {root_id}
+        yield from TreeService._walk_generations(
+            db, TreeService._initial_walks(root_id, direction, max_depth), {root_id}
+        )
+
+    @staticmethod
+    def _iter_generation_bands(
+            db: Session,
+            root: Individual,
+            direction: str,
+            max_depth: int,
+    ) -> Iterator[GenerationBand]:
+        """
+        Materialised _iter_generation_ids: one GenerationBand per BFS step.
+        """
+        for generation, ids in TreeService._iter_generation_ids(db, root.id, direction, max_depth):
+            if generation == 0:
+                yield GenerationBand(generation=0, individuals=[TreeService.to_schema(root)])
+            else:
+                yield TreeService._materialize_band(db, generation, ids)
+
+    @staticmethod
+    def decode_tree_cursor(cursor: str, direction: str, max_depth: int) -> tuple[int, int, Optional[str]]:
+        """
+        (band index, offset within the band, state key) from a next_cursor of
+        build_multi_level_tree. Raises ValueError if it is malformed or was
+        issued for a different direction/depth.
+        """
+        data = decode_cursor(cursor)
+        band, offset, key = data.get("b"), data.get("o"), data.get("k")
+        if (
+            data.get("d") != direction
+            or data.get("m") != max_depth
+            or not isinstance(band, int) or band < 0
+            or not isinstance(offset, int) or offset < 0
+            or not (key is None or isinstance(key, str))
+        ):
+            raise ValueError("Cursor does not match this request")
+        return band, offset, key
 
     @staticmethod
     def build_multi_level_tree(
@@ -260,65 +451,95 @@ class TreeService:
         individual_id: int,
         direction: str = "both",
         max_depth: int = 3,
+        node_budget: Optional[int] = None,
+        start: tuple[int, int, Optional[str]] = (0, 0, None),
     ) -> MultiLevelTree | None:
         """
         Build a multi-level tree in ancestor/descendant or both directions.
 
         direction: "ancestors", "descendants", or "both"
         max_depth: how many generations up/down to explore.
+        node_budget: stop after this many individuals; the result is then
+            marked truncated and next_cursor continues where it stopped.
+        start: (band index, offset, state key) to resume from, see
+            decode_tree_cursor. The BFS state is kept in this worker for
+            TREE_CURSOR_TTL seconds; without it the traversal is re-run up
+            to the band.
         """
         root = TreeService._get_individual(db, individual_id)
         if not root:
             return None
 
-        seen: Set[int] = {individual_id}
-        generations: Dict[int, Set[int]] = {0: {individual_id}}
+        start_band, start_offset, state_key = start
+        state = _cursor_states.get((session_tree_id(db), root.id, state_key)) if state_key else None
+        if state is not None:
+            # Copies: the same cursor may be resumed more than once
+            generation, ids, walks, seen = state
+            walks, seen = list(walks), set(seen)
+            generations = chain([(generation, ids)], TreeService._walk_generations(db, walks, seen))
+            first_index = start_band
+        else:
+            walks, seen = TreeService._initial_walks(root.id, direction, max_depth), {root.id}
+            generations = chain([(0, {root.id})], TreeService._walk_generations(db, walks, seen))
+            first_index = 0
 
-        # Ancestors: negative generations
-        if direction in ("ancestors", "both"):
-            ancestor_gens = TreeService._bfs_generations(
-                db=db,
-                start_ids={individual_id},
-                step_func=TreeService._get_parents_of_child,
-                initial_generation=0,
-                step=-1,
-                max_depth=max_depth,
-                seen=seen,
-            )
-            generations.update(ancestor_gens)
-
-        # Descendants: positive generations
-        if direction in ("descendants", "both"):
-            descendant_gens = TreeService._bfs_generations(
-                db=db,
-                start_ids={individual_id},
-                step_func=TreeService._get_children_of_parent,
-                initial_generation=0,
-                step=+1,
-                max_depth=max_depth,
-                seen=seen,
-            )
-            generations.update(descendant_gens)
-
-        # Materialize ORM -> schemas
         bands: List[GenerationBand] = []
-        for gen_index in sorted(generations.keys()):
-            ids = generations[gen_index]
-            if ids:
-                stmt = select(Individual).where(Individual.id.in_(ids))
-                result = db.execute(stmt)
-                individuals = result.scalars().all()
-            else:
-                individuals = []
+        returned = 0
+        next_cursor = None
+
+        for index, (generation, ids) in enumerate(generations, start=first_index):
+            # Without saved state, bands before the cursor still have to be
+            # walked (the BFS needs their ids), but they are not loaded again
+            if index < start_band:
+                continue
+
+            offset = start_offset if index == start_band else 0
+            pending = sorted(ids)[offset:]
+            if not pending:
+                continue
+
+            take = len(pending)
+            if node_budget is not None and returned + take > node_budget:
+                take = node_budget - returned
+                key = secrets.token_urlsafe(12)
+                _cursor_states.set((session_tree_id(db), root.id, key), (generation, ids, walks, seen))
+                next_cursor = encode_cursor({
+                    "b": index, "o": offset + take, "d": direction, "m": max_depth, "k": key,
+                })
+
+            if take > 0:
+                if generation == 0:
+                    bands.append(GenerationBand(generation=0, individuals=[TreeService.to_schema(root)]))
+                else:
+                    bands.append(TreeService._materialize_band(db, generation, set(pending[:take])))
+                returned += take
 
-            bands.append(
-                GenerationBand(
-                    generation=gen_index,
-                    individuals=[TreeService.to_schema(ind) for ind in individuals],
-                )
-            )
+            if next_cursor is not None:
+                break
+
+        bands.sort(key=lambda band: band.generation)
 
         return MultiLevelTree(
             root=TreeService.to_schema(root),
             generations=bands,
-        )
\ No newline at end of file
+            truncated=next_cursor is not None,
+            next_cursor=next_cursor,
+        )
+
+    @staticmethod
+    def stream_multi_level_tree(
+        db: Session,
+        individual_id: int,
+        direction: str = "both",
+        max_depth: int = 3,
+    ) -> Iterator[GenerationBand] | None:
+        """
+        Streaming variant of build_multi_level_tree.
+        Returns None if the root does not exist, otherwise a lazy iterator of
+        GenerationBand in BFS order (root first, not sorted by generation).
+        """
+        root = TreeService._get_individual(db, individual_id)
+        if not root:
+            return None
+
+        return TreeService._iter_generation_bands(db, root, direction, max_depth)
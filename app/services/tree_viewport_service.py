@@ -0,0 +1,171 @@
+from math import floor
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.spatial_index import SpatialGridIndex
+from app.repositories.data_version_repository import get_data_version
+from app.services.tree_layout_service import TreeLayoutService
+from app.services.tree_visual_service import TreeVisualService
+from app.schemas.tree_schema import TreeVisualization, TreeViewport, TreeCluster
+
+
+class _IndexedLayout:
+    """
+    A laid-out tree plus grid indexes over its nodes and edges.
+    Built once per cached layout, then shared by every viewport query.
+    """
+
+    def __init__(self, visual: TreeVisualization, cell_size: float):
+        self.visual = visual
+        self.node_index = SpatialGridIndex(cell_size)
+        self.edge_index = SpatialGridIndex(cell_size)
+        self.positions: Dict[int, Tuple[int, int]] = {}
+        self.generations: Dict[int, int] = {}
+
+        for i, node in enumerate(visual.nodes):
+            self.positions[node.id] = (node.x, node.y)
+            self.generations[node.id] = node.generation
+            self.node_index.insert(i, node.x, node.y, node.x, node.y)
+
+        for i, edge in enumerate(visual.edges):
+            src = self.positions.get(edge.source)
+            dst = self.positions.get(edge.target)
+            if src is None or dst is None:
+                continue
+            self.edge_index.insert(
+                i,
+                min(src[0], dst[0]), min(src[1], dst[1]),
+                max(src[0], dst[0]), max(src[1], dst[1]),
+            )
+
+
+# (root, direction, max_depth, node budget, data version) -> _IndexedLayout
+_index_cache = LRUCache(maxsize=64)
+
+
+class TreeViewportService:
+    """
+    Viewport queries over a precomputed layout (see TreeVisualService).
+    Only nodes/edges intersecting the requested box are returned; generations
+    further from the root than the zoom level allows are collapsed into
+    clusters.
+    """
+
+    CELL_SIZE = 4 * TreeLayoutService.H_SPACING
+
+    # Generations drawn in full per unit of zoom (zoom=1 -> 3 generations)
+    DETAIL_GENERATIONS_PER_ZOOM = 3
+
+    @staticmethod
+    def _get_indexed_layout(
+            db: Session,
+            individual_id: int,
+            direction: str,
+            max_depth: int,
+            node_budget: int | None,
+    ) -> _IndexedLayout | None:
+        version = get_data_version(db)
+        cache_key = (individual_id, direction, max_depth, node_budget, version)
+        indexed = _index_cache.get(cache_key)
+        if indexed is not None:
+            return indexed
+
+        visual = TreeVisualService.build_multi_level_visual(
+            db=db,
+            individual_id=individual_id,
+            direction=direction,
+            max_depth=max_depth,
+            version=version,
+            node_budget=node_budget,
+        )
+        if visual is None:
+            return None
+
+        indexed = _IndexedLayout(visual, TreeViewportService.CELL_SIZE)
+        _index_cache.set(cache_key, indexed)
+        return indexed
+
+    @staticmethod
+    def get_viewport(
+            db: Session,
+            individual_id: int,
+            min_x: float,
+            min_y: float,
+            max_x: float,
+            max_y: float,
+            zoom: float = 1.0,
+            direction: str = "both",
+            max_depth: int = 3,
+            node_budget: int | None = None,
+    ) -> TreeViewport | None:
+        indexed = TreeViewportService._get_indexed_layout(db, individual_id, direction, max_depth, node_budget)
+        if indexed is None:
+            return None
+
+        visual = indexed.visual
+        detail_depth = max(1, floor(zoom * TreeViewportService.DETAIL_GENERATIONS_PER_ZOOM))
+
+        # ------------------- NODES ------------------------------------------- #
+
+        nodes = []
+        collapsed = []
+        for i in indexed.node_index.query(min_x, min_y, max_x, max_y):
+            node = visual.nodes[i]
+            if not (min_x <= node.x <= max_x and min_y <= node.y <= max_y):
+                continue
+            if abs(node.generation) > detail_depth:
+                collapsed.append(node)
+            else:
+                nodes.append(node)
+
+        nodes.sort(key=lambda n: (n.generation, n.x))
+
+        # ------------------- CLUSTERS (level of detail) ---------------------- #
+
+        # Collapsed nodes are grouped per generation into buckets whose width
+        # grows as the user zooms out
+        bucket_width = TreeLayoutService.H_SPACING * 4 / zoom
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        for node in collapsed:
+            key = (node.generation, floor(node.x / bucket_width))
+            buckets.setdefault(key, []).append(node.x)
+
+        clusters: List[TreeCluster] = []
+        for (gen, _), xs in sorted(buckets.items()):
+            clusters.append(TreeCluster(
+                generation=gen,
+                x=int(round(sum(xs) / len(xs))),
+                y=gen * TreeLayoutService.V_SPACING,
+                count=len(xs),
+            ))
+
+        # ------------------- EDGES ------------------------------------------- #
+
+        edges = []
+        for i in sorted(indexed.edge_index.query(min_x, min_y, max_x, max_y)):
+            edge = visual.edges[i]
+            sx, sy = indexed.positions[edge.source]
+            tx, ty = indexed.positions[edge.target]
+            if min(sx, tx) > max_x or max(sx, tx) < min_x or min(sy, ty) > max_y or max(sy, ty) < min_y:
+                continue
+
+            # An edge may cross the viewport with both endpoints just outside,
+            # so only require that neither end is collapsed
+            src_gen = indexed.generations.get(edge.source)
+            dst_gen = indexed.generations.get(edge.target)
+            if src_gen is None or dst_gen is None:
+                continue
+            if abs(src_gen) <= detail_depth and abs(dst_gen) <= detail_depth:
+                edges.append(edge)
+
+        return TreeViewport(
+            root=visual.root,
+            zoom=zoom,
+            total_nodes=len(visual.nodes),
+            nodes=nodes,
+            edges=edges,
+            clusters=clusters,
+            truncated=visual.truncated,
+        )
@@ -1,7 +1,13 @@
 from sqlalchemy.orm import Session
+from app.core.cache import LRUCache
+from app.repositories.data_version_repository import get_data_version
 from app.services.tree_service import TreeService
+from app.services.tree_layout_service import TreeLayoutService
 from app.schemas.tree_schema import TreeVisualization, TreeNode, TreeEdge
 
+# (root, direction, max_depth, node budget, data version) -> TreeVisualization
+_layout_cache = LRUCache(maxsize=256)
+
 
 class TreeVisualService:
 
@@ -26,6 +32,7 @@ class TreeVisualService:
                 generation=gen,
                 x=x,
                 y=y,
+                aggregates=ind.aggregates,
             ))
 
         # Root at center
@@ -33,7 +40,7 @@ class TreeVisualService:
 
         # Spouse on right
         for i, sp in enumerate(fam.spouses):
-            add_node(sp, "spouse", 0, x=150, y=0)
+            add_node(sp, "spouse", 0, x=150 + (i * 150), y=0)
             edges.append(TreeEdge(
                 source=root.id, target=sp.id, relationship="spouse"
             ))
@@ -72,3 +79,83 @@ class TreeVisualService:
             nodes=nodes,
             edges=edges
         )
+
+    @staticmethod
+    def build_multi_level_visual(
+            db: Session,
+            individual_id: int,
+            direction: str = "both",
+            max_depth: int = 3,
+            version: str | None = None,
+            node_budget: int | None = None,
+    ) -> TreeVisualization | None:
+        """
+        Laid-out multi-generation tree (see TreeLayoutService).
+        Results are cached per (root, direction, depth, budget, data version),
+        so a layout is only recomputed after the underlying data changes.
+        Pass `version` if the caller already computed it. With `node_budget`
+        only the first that many individuals (in /multi order) are laid out
+        and the result is marked truncated.
+        """
+        if version is None:
+            version = get_data_version(db)
+        cache_key = (individual_id, direction, max_depth, node_budget, version)
+        cached = _layout_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        tree = TreeService.build_multi_level_tree(
+            db=db,
+            individual_id=individual_id,
+            direction=direction,
+            max_depth=max_depth,
+            node_budget=node_budget,
+        )
+        if tree is None:
+            return None
+
+        layers = {}
+        people = {}
+        for band in tree.generations:
+            layers[band.generation] = [ind.id for ind in band.individuals]
+            for ind in band.individuals:
+                people[ind.id] = (ind, band.generation)
+
+        rels = TreeService._get_relationships_within(db, set(people))
+        parent_edges, spouse_edges = TreeLayoutService.normalise_edges(rels)
+        coords = TreeLayoutService.layout(layers, parent_edges, spouse_edges)
+
+        nodes = []
+        for pid, (ind, gen) in people.items():
+            if pid == individual_id:
+                node_type = "root"
+            elif gen < 0:
+                node_type = "parent"
+            elif gen > 0:
+                node_type = "child"
+            else:
+                node_type = "sibling"
+
+            x, y = coords[pid]
+            nodes.append(TreeNode(
+                id=pid,
+                label=f"{ind.first_name} {ind.last_name}".strip(),
+                type=node_type,
+                generation=gen,
+                x=x,
+                y=y,
+                aggregates=ind.aggregates,
+            ))
+
+        edges = [
+            TreeEdge(source=parent_id, target=child_id, relationship="parent")
+            for parent_id, child_id in sorted(parent_edges)
+        ]
+        edges.extend(
+            TreeEdge(source=a, target=b, relationship="spouse")
+            for a, b in sorted(spouse_edges)
+        )
+
+        result = TreeVisualization(root=individual_id, nodes=nodes, edges=edges, truncated=tree.truncated)
+        _layout_cache.set(cache_key, result)
+        return result
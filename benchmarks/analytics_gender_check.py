@@ -0,0 +1,67 @@
+"""
+Consistency check for gender counts in the analytics frame.
+
+Individual.gender is free text. This loads a handful of people with the
+spellings found in real data ("M", "F", "male", "Female", other values,
+empty) into a throwaway SQLite database and checks that
+/api/analytics/generations counts them as male / female / other / unknown.
+Exits non-zero on a mismatch, so it can gate CI next to import_time.py.
+
+Usage:
+    python benchmarks/analytics_gender_check.py
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# stored value -> expected bucket
+SAMPLES = [
+    ("M", "male"), ("m", "male"), ("male", "male"), ("Male", "male"),
+    ("F", "female"), ("f", "female"), ("female", "female"), (" FEMALE ", "female"),
+    ("nonbinary", "other"), ("", "unknown"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    # Settings are read at import time, so the database has to be chosen first
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir.name}/check.db"
+    os.environ.setdefault("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["LOG_FILE"] = ""
+    logging.getLogger("family_tree").setLevel(logging.ERROR)
+
+    from app.db.database import SessionLocal, engine
+    from app.models.base import Base
+    from app.models.individual import Individual
+    from app.services.analytics_service import AnalyticsService
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add_all(
+            Individual(first_name=f"p{i}", last_name="Check", gender=gender)
+            for i, (gender, _) in enumerate(SAMPLES)
+        )
+        db.commit()
+        result = AnalyticsService.compute(db, AnalyticsService.generation_sizes)
+
+    expected = {bucket: 0 for bucket in ("male", "female", "other", "unknown")}
+    for _, bucket in SAMPLES:
+        expected[bucket] += 1
+    (generation,) = result["generations"]
+    counted = {bucket: generation[bucket] for bucket in expected}
+    print(f"expected {expected}\ncounted  {counted}")
+    if counted != expected:
+        sys.exit("Gender counts do not match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Per-request auth overhead of get_current_user, in-process.
+
+Compares the three ways a bearer token can be resolved:
+  - db:     principal cache disabled (one SELECT per request, the old behaviour)
+  - cached: warm principal cache
+  - claims: AUTH_TRUST_TOKEN_CLAIMS enabled (no cache, no DB)
+
+Uses the database from DATABASE_URL and the first user in it.
+
+Usage:
+    python benchmarks/auth_overhead.py --iterations 2000
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import select
+
+from app.core import security
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.user import User
+
+
+def _time_per_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+    db = SessionLocal()
+    try:
+        user = db.execute(select(User).limit(1)).scalar_one_or_none()
+        if user is None:
+            sys.exit("No users in the database; register one first.")
+        token = security.create_access_token(security.principal_claims(user))
+
+        def resolve():
+            return security.get_current_user(token=token, db=db)
+
+        def resolve_uncached():
+            security.invalidate_principal()
+            return resolve()
+
+        trust = settings.AUTH_TRUST_TOKEN_CLAIMS
+        settings.AUTH_TRUST_TOKEN_CLAIMS = False
+        db_us = _time_per_call(resolve_uncached, args.iterations)
+        resolve()
+        cached_us = _time_per_call(resolve, args.iterations)
+
+        settings.AUTH_TRUST_TOKEN_CLAIMS = True
+        security.invalidate_principal()
+        claims_us = _time_per_call(resolve, args.iterations)
+        settings.AUTH_TRUST_TOKEN_CLAIMS = trust
+    finally:
+        db.close()
+
+    print(json.dumps({
+        "iterations": args.iterations,
+        "db_us_per_request": round(db_us, 1),
+        "cached_us_per_request": round(cached_us, 1),
+        "claims_us_per_request": round(claims_us, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
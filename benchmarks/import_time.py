@@ -0,0 +1,96 @@
+"""
+Import-time budget for the application, measured with `python -X importtime`.
+
+Two stages are measured in fresh interpreters:
+  - import:  `import app.main` (what every CLI, job script and test pays)
+  - app:     `import app.main; app.main.create_app()` (what a worker pays before serving)
+
+Each stage runs --repeat times and the fastest run counts. The script exits
+non-zero when a stage exceeds its budget, or when a module that should
+load lazily (Neo4j driver, passlib/bcrypt, NumPy) is imported by the
+import stage, so it can gate CI. Timings depend on the machine; set the
+budgets for the one that runs this (the lazy-module check does not).
+
+Usage:
+    python benchmarks/import_time.py --import-budget-ms 2000 --app-budget-ms 2500 --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+STAGES = {
+    "import": "import app.main",
+    "app": "import app.main; app.main.create_app()",
+}
+# Loaded on first use (or at startup warm-up), never by importing the app
+LAZY_MODULES = ("neo4j", "passlib", "bcrypt", "numpy")
+
+
+def _measure(code: str) -> Tuple[float, Dict[str, Tuple[float, float]]]:
+    """(total ms, {module: (self ms, cumulative ms)}) for one fresh interpreter."""
+    env = {**os.environ, "PYTHONPATH": ROOT, "PYTHONWARNINGS": "ignore"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"`{code}` failed:\n{proc.stderr[-2000:]}")
+
+    total, modules = 0.0, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        own_ms, cumulative_ms = int(own) / 1000, int(cumulative) / 1000
+        # One leading space for top-level imports, two more per nesting level
+        if len(name) - len(name.lstrip(" ")) == 1:
+            total += cumulative_ms
+        modules[name.strip()] = (own_ms, cumulative_ms)
+    return total, modules
+
+
+def _top(modules: Dict[str, Tuple[float, float]], count: int, prefix: str = "") -> List[dict]:
+    chosen = [(name, times) for name, times in modules.items() if name.startswith(prefix)]
+    chosen.sort(key=lambda item: -item[1][1])
+    return [{"module": name, "self_ms": round(own, 1), "cumulative_ms": round(cum, 1)} for name, (own, cum) in chosen[:count]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import-budget-ms", type=float, default=2000.0)
+    parser.add_argument("--app-budget-ms", type=float, default=2500.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to report per stage")
+    args = parser.parse_args()
+
+    budgets = {"import": args.import_budget_ms, "app": args.app_budget_ms}
+    report, failures = {}, []
+    for stage, code in STAGES.items():
+        runs = [_measure(code) for _ in range(args.repeat)]
+        total, modules = min(runs, key=lambda run: run[0])
+        report[stage] = {
+            "total_ms": round(total, 1),
+            "budget_ms": budgets[stage],
+            "slowest": _top(modules, args.top),
+            "slowest_app_modules": _top(modules, args.top, prefix="app."),
+        }
+        if total > budgets[stage]:
+            failures.append(f"{stage}: {total:.0f} ms > budget {budgets[stage]:.0f} ms")
+        if stage == "import":
+            eager = [name for name in LAZY_MODULES if name in modules]
+            report[stage]["eagerly_imported"] = eager
+            if eager:
+                failures.append(f"import: loads {', '.join(eager)} (should be lazy)")
+
+    print(json.dumps(report, indent=2))
+    if failures:
+        sys.exit("Import-time budget exceeded:\n  " + "\n  ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Per-request logging overhead: old synchronous pipeline vs queued pipeline.
+
+  - sync:   two f-string INFO lines per request, written directly to a
+            RotatingFileHandler and a console handler (the old log_requests)
+  - queued: one structured record per request handed to a QueueHandler;
+            formatting and I/O happen on the QueueListener thread
+
+Each request-thread measures only the time spent inside its logging calls,
+which is what the request path pays. Output goes to a temp dir and /dev/null.
+
+Usage:
+    python benchmarks/logging_overhead.py --threads 8 --requests 5000
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+from statistics import quantiles
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logging_config import JsonFormatter, _LazyQueueHandler
+
+URL = "http://127.0.0.1:8000/api/tree/4/multi?direction=both&max_depth=3"
+
+
+def _handlers(log_file: str, formatter: logging.Formatter) -> list[logging.Handler]:
+    file_handler = RotatingFileHandler(log_file, maxBytes=2_000_000, backupCount=5)
+    console_handler = logging.StreamHandler(open(os.devnull, "w"))
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+    return [file_handler, console_handler]
+
+
+def _sync_request(logger: logging.Logger) -> None:
+    logger.info(f"Incoming request: GET {URL}")
+    duration = 0.012
+    logger.info(
+        f"Completed: GET {URL} "
+        f"Status: 200 "
+        f"Time: {duration:.3f}s"
+    )
+
+
+def _queued_request(logger: logging.Logger) -> None:
+    logger.info(
+        "%s %s %s %.3fs", "GET", "/api/tree/4/multi", 200, 0.012,
+        extra={"method": "GET", "path": "/api/tree/4/multi", "status": 200, "duration_ms": 12.0},
+    )
+
+
+def _run(logger: logging.Logger, func, threads: int, requests: int) -> dict:
+    samples: list[float] = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            func(logger)
+            local.append(time.perf_counter() - start)
+        with lock:
+            samples.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    cuts = quantiles(samples, n=100)
+    return {
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 2),
+        "p50_us": round(cuts[49] * 1e6, 2),
+        "p99_us": round(cuts[98] * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=5000, help="requests per thread")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_logger = logging.getLogger("bench.sync")
+        sync_logger.propagate = False
+        sync_logger.setLevel(logging.DEBUG)
+        for handler in _handlers(os.path.join(tmp, "sync.log"),
+                                 logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")):
+            sync_logger.addHandler(handler)
+        sync = _run(sync_logger, _sync_request, args.threads, args.requests)
+
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *_handlers(os.path.join(tmp, "queued.log"), JsonFormatter()))
+        listener.start()
+        queued_logger = logging.getLogger("bench.queued")
+        queued_logger.propagate = False
+        queued_logger.setLevel(logging.DEBUG)
+        queued_logger.addHandler(_LazyQueueHandler(log_queue))
+        queued = _run(queued_logger, _queued_request, args.threads, args.requests)
+        listener.stop()
+
+    print(json.dumps({"threads": args.threads, "requests_per_thread": args.requests,
+                      "sync": sync, "queued": queued}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
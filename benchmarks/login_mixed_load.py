@@ -0,0 +1,112 @@
+"""
+Login throughput vs tree-endpoint latency under mixed load.
+
+Runs against a live instance in two phases:
+  1. baseline: tree requests only
+  2. mixed:    tree requests + concurrent login loops
+and prints tree latency percentiles for both, plus logins/sec in phase 2.
+
+Usage:
+    python benchmarks/login_mixed_load.py --base-url http://127.0.0.1:8000 \\
+        --tree-path /api/tree/4/multi?max_depth=3 --login-workers 16
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from statistics import quantiles
+
+
+def _request(method: str, url: str, body: dict | None = None) -> tuple[int, float]:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def _loop(stop: threading.Event, func, results: list) -> None:
+    while not stop.is_set():
+        results.append(func())
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if len(samples) < 2:
+        return {"count": len(samples)}
+    cuts = quantiles(samples, n=100)
+    return {
+        "count": len(samples),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+    }
+
+
+def run_phase(args, login_workers: int) -> dict:
+    stop = threading.Event()
+    tree_results: list = []
+    login_results: list = []
+    tree_url = args.base_url + args.tree_path
+    login_url = args.base_url + "/api/auth/login"
+    creds = {"email": args.email, "password": args.password}
+
+    threads = [
+        threading.Thread(target=_loop, args=(stop, lambda: _request("GET", tree_url), tree_results))
+        for _ in range(args.tree_workers)
+    ]
+    threads += [
+        threading.Thread(target=_loop, args=(stop, lambda: _request("POST", login_url, creds), login_results))
+        for _ in range(login_workers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    tree_ok = [d for s, d in tree_results if s == 200]
+    login_ok = [d for s, d in login_results if s == 200]
+    return {
+        "tree": {**_percentiles(tree_ok), "errors": len(tree_results) - len(tree_ok)},
+        "login": {
+            "per_sec": round(len(login_ok) / args.duration, 2),
+            "rejected_503": sum(1 for s, _ in login_results if s == 503),
+            "errors": len(login_results) - len(login_ok),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--tree-path", default="/api/tree/1/multi?max_depth=3")
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--tree-workers", type=int, default=4)
+    parser.add_argument("--login-workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # Make sure the benchmark user exists (400 = already registered)
+    _request("POST", args.base_url + "/api/auth/register",
+             {"email": args.email, "name": "Bench", "password": args.password})
+
+    report = {
+        "baseline": run_phase(args, login_workers=0),
+        "mixed": run_phase(args, login_workers=args.login_workers),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Open-loop load generator that replays recorded traffic.
+
+Request sources:
+  --log FILE        recorded request logs; both formats are understood:
+                      - JSON records from log_requests (method/path/query/route)
+                      - the old text lines "Incoming request: GET http://host/path?q"
+  --synthetic       a weighted mix of tree endpoints over --ids (or --mix FILE,
+                    a JSON object {"GET /api/tree/{id}/multi?max_depth=3": weight})
+
+Requests are dispatched on a fixed schedule (--rps, uniform or poisson
+arrivals) regardless of how fast the server answers, so a slow server shows
+up as growing latency instead of a lower request rate (no coordinated
+omission). Latency is measured from the scheduled send time; "service"
+is measured from the moment a worker actually sent the request.
+
+Only GET requests are replayed from logs: bodies are not recorded, so
+writes cannot be reproduced. Docs/openapi/favicon/metrics are skipped.
+
+Reports count, errors, error rate, throughput and latency percentiles per
+route template, plus the totals, as a table and optionally as JSON.
+
+Usage:
+    python benchmarks/replay_load.py --base-url http://127.0.0.1:8000 --log logs/app.log --rps 50 --duration 60
+    python benchmarks/replay_load.py --synthetic --ids 1-5000 --rps 200 --duration 30 --output replay.json
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from statistics import quantiles
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_MIX = {
+    "GET /api/tree/{id}/immediate": 30,
+    "GET /api/tree/{id}/multi?direction=both&max_depth=3": 20,
+    "GET /api/tree/{id}/visual": 20,
+    "GET /api/tree/{id}/visual?direction=both&max_depth=3": 10,
+    "GET /api/tree/{id}/viewport?min_x=-1500&min_y=-800&max_x=1500&max_y=800&zoom=1&max_depth=5": 10,
+    "GET /api/tree/{id}/multi/stream?direction=both&max_depth=5": 5,
+    "GET /api/individuals/{id}": 5,
+}
+
+SKIPPED_PREFIXES = ("/docs", "/redoc", "/openapi.json", "/favicon.ico", "/metrics")
+
+_LEGACY_LINE = re.compile(r"Incoming request: (?P<method>[A-Z]+) (?P<url>\S+)")
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+@dataclass
+class Target:
+    method: str
+    path_and_query: str
+    route: str
+
+
+@dataclass
+class Outcome:
+    route: str
+    status: int
+    latency: float  # from scheduled send time
+    service: float  # from actual send time
+
+
+def route_template(path: str) -> str:
+    """Fallback grouping for logs without a route: numeric segments become {id}."""
+    return _NUMERIC_SEGMENT.sub("/{id}", path)
+
+
+# --------------------------- sources --------------------------------------- #
+
+def targets_from_log(path: str) -> List[Target]:
+    targets: List[Target] = []
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            line = line.strip()
+            method = req_path = query = route = None
+
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                method, req_path = record.get("method"), record.get("path")
+                query, route = record.get("query"), record.get("route")
+            else:
+                match = _LEGACY_LINE.search(line)
+                if match:
+                    parts = urlsplit(match.group("url"))
+                    method, req_path, query = match.group("method"), parts.path, parts.query
+
+            if method != "GET" or not req_path or req_path.startswith(SKIPPED_PREFIXES):
+                continue
+            if not route or route == "unmatched":
+                route = route_template(req_path)
+            targets.append(Target(method, req_path + (f"?{query}" if query else ""), route))
+    return targets
+
+
+def synthetic_stream(mix: Dict[str, float], ids: Tuple[int, int], rng: random.Random) -> Iterator[Target]:
+    entries = [(spec.split(" ", 1), weight) for spec, weight in mix.items()]
+    templates = [spec for spec, _ in entries]
+    weights = [weight for _, weight in entries]
+    while True:
+        method, template = rng.choices(templates, weights)[0]
+        url = template.format(id=rng.randint(*ids))
+        yield Target(method, url, template.split("?", 1)[0])
+
+
+def recorded_stream(targets: List[Target], shuffle: bool, rng: random.Random) -> Iterator[Target]:
+    """Cycles through the recorded requests (in order, or shuffled per pass)."""
+    while True:
+        batch = list(targets)
+        if shuffle:
+            rng.shuffle(batch)
+        yield from batch
+
+
+# --------------------------- driver ---------------------------------------- #
+
+def _send(base_url: str, target: Target, headers: Dict[str, str], timeout: float) -> int:
+    req = urllib.request.Request(base_url + target.path_and_query, method=target.method, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def run(args, stream: Iterator[Target]) -> Tuple[List[Outcome], float, int]:
+    """
+    Dispatches requests at the target rate for `duration` seconds.
+    Returns (outcomes, elapsed seconds, requests dropped because every worker was busy).
+    """
+    rng = random.Random(args.seed)
+    headers = {"Accept": "application/json"}
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+
+    outcomes: List[Outcome] = []
+    lock = threading.Lock()
+    in_flight = threading.BoundedSemaphore(args.max_in_flight)
+    dropped = 0
+
+    def task(target: Target, scheduled: float):
+        try:
+            sent = time.perf_counter()
+            status = _send(args.base_url, target, headers, args.timeout)
+            done = time.perf_counter()
+            with lock:
+                outcomes.append(Outcome(target.route, status, done - scheduled, done - sent))
+        finally:
+            in_flight.release()
+
+    interval = 1.0 / args.rps
+    start = time.perf_counter()
+    next_at = start
+    deadline = start + args.duration
+
+    with ThreadPoolExecutor(max_workers=args.max_in_flight, thread_name_prefix="replay") as pool:
+        while next_at < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            target = next(stream)
+            if in_flight.acquire(blocking=False):
+                pool.submit(task, target, next_at)
+            else:
+                # Every worker is busy: record it instead of silently slowing down
+                dropped += 1
+                with lock:
+                    outcomes.append(Outcome(target.route, 0, time.perf_counter() - next_at, 0.0))
+
+            next_at += rng.expovariate(args.rps) if args.arrival == "poisson" else interval
+
+    return outcomes, time.perf_counter() - start, dropped
+
+
+# --------------------------- reporting ------------------------------------- #
+
+def _stats(outcomes: List[Outcome], elapsed: float) -> dict:
+    ok = [o for o in outcomes if 0 < o.status < 400]
+    errors = len(outcomes) - len(ok)
+    result = {
+        "count": len(outcomes),
+        "errors": errors,
+        "error_rate": round(errors / len(outcomes), 4) if outcomes else 0.0,
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "statuses": {},
+    }
+    for o in outcomes:
+        result["statuses"][str(o.status)] = result["statuses"].get(str(o.status), 0) + 1
+
+    latencies = sorted(o.latency * 1000 for o in ok)
+    if len(latencies) >= 2:
+        cuts = quantiles(latencies, n=100, method="inclusive")
+        service = quantiles([o.service * 1000 for o in ok], n=100, method="inclusive")
+        result.update({
+            "p50_ms": round(cuts[49], 2),
+            "p90_ms": round(cuts[89], 2),
+            "p99_ms": round(cuts[98], 2),
+            "max_ms": round(latencies[-1], 2),
+            "service_p50_ms": round(service[49], 2),
+            "service_p99_ms": round(service[98], 2),
+        })
+    return result
+
+
+def report(outcomes: List[Outcome], elapsed: float, dropped: int, args) -> dict:
+    by_route: Dict[str, List[Outcome]] = {}
+    for o in outcomes:
+        by_route.setdefault(o.route, []).append(o)
+
+    return {
+        "target_rps": args.rps,
+        "arrival": args.arrival,
+        "duration_s": round(elapsed, 2),
+        "sent_rps": round(len(outcomes) / elapsed, 2) if elapsed else 0.0,
+        "dropped": dropped,
+        "total": _stats(outcomes, elapsed),
+        "routes": {route: _stats(items, elapsed) for route, items in sorted(by_route.items())},
+    }
+
+
+def print_table(result: dict) -> None:
+    rows = list(result["routes"].items()) + [("TOTAL", result["total"])]
+    width = max(len(name) for name, _ in rows)
+    print(f"{'route':<{width}} {'count':>7} {'err%':>6} {'rps':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+    for name, s in rows:
+        print(
+            f"{name:<{width}} {s['count']:>7} {s['error_rate'] * 100:>5.1f}% {s['throughput_rps']:>8.1f}"
+            + "".join(f" {s.get(k, float('nan')):>9.1f}" for k in ("p50_ms", "p90_ms", "p99_ms", "max_ms"))
+        )
+    print(f"\ntarget {result['target_rps']} rps, sent {result['sent_rps']} rps, "
+          f"dropped {result['dropped']} (all workers busy)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--log", help="recorded request log to replay")
+    source.add_argument("--synthetic", action="store_true", help="generate a weighted tree-endpoint mix")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=20.0, help="target request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--arrival", choices=("uniform", "poisson"), default="poisson")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="worker threads / open requests")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--shuffle", action="store_true", help="shuffle recorded requests on every pass")
+    parser.add_argument("--mix", help="JSON file with {\"METHOD /path/{id}?query\": weight}")
+    parser.add_argument("--ids", default="1-1000", help="individual id range for --synthetic, e.g. 1-5000")
+    parser.add_argument("--token", help="bearer token sent with every request")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.log:
+        targets = targets_from_log(args.log)
+        if not targets:
+            sys.exit(f"No replayable GET requests found in {args.log}")
+        stream = recorded_stream(targets, args.shuffle, rng)
+        print(f"Replaying {len(targets)} recorded requests at {args.rps} rps")
+    else:
+        mix = DEFAULT_MIX
+        if args.mix:
+            with open(args.mix) as fh:
+                mix = json.load(fh)
+        low, high = (int(part) for part in args.ids.split("-", 1))
+        stream = synthetic_stream(mix, (low, high), rng)
+
+    outcomes, elapsed, dropped = run(args, stream)
+    result = report(outcomes, elapsed, dropped, args)
+    print_table(result)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
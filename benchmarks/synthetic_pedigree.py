@@ -0,0 +1,343 @@
+"""
+Deterministic synthetic pedigree generator.
+
+Builds a multi-generation family graph from a seed, so benchmark runs on
+different commits see exactly the same data:
+
+  - founder couples in generation 0, sized so the whole graph lands close
+    to --population people
+  - every couple has about --branching children (normal jitter, sd 1)
+  - children marry someone from outside the tree, or with
+    --cousin-marriage-rate a cousin (shared grandparent), or stay single
+  - with --remarriage-rate a married person also has a second spouse and
+    children with them (half-siblings)
+  - parent links are stored both ways the app supports: mostly as
+    "parent" rows, --child-edge-rate of them as inverse "child" rows
+
+The result can be loaded into the database from DATABASE_URL (SQLite or
+Postgres) and, optionally, synced to Neo4j with GraphSyncService.
+
+Usage:
+    python benchmarks/synthetic_pedigree.py --population 5000 --generations 8 --reset
+    python benchmarks/synthetic_pedigree.py --population 5000 --reset --neo4j
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+FIRST_NAMES = {
+    "male": ["James", "John", "Robert", "Michael", "William", "David", "Joseph", "Thomas",
+             "Charles", "Daniel", "Matthew", "Anthony", "Mark", "Paul", "Steven", "Andrew"],
+    "female": ["Mary", "Patricia", "Jennifer", "Linda", "Elizabeth", "Barbara", "Susan", "Jessica",
+               "Sarah", "Karen", "Nancy", "Lisa", "Margaret", "Sandra", "Ashley", "Emily"],
+}
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas",
+              "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson", "White", "Harris"]
+
+GENERATION_YEARS = 28
+FIRST_BIRTH_YEAR = 1750
+
+
+@dataclass
+class PedigreeConfig:
+    population: int = 1000
+    generations: int = 6
+    branching: float = 2.5
+    marriage_rate: float = 0.85
+    remarriage_rate: float = 0.1
+    cousin_marriage_rate: float = 0.02
+    child_edge_rate: float = 0.2
+    seed: int = 42
+
+
+@dataclass
+class Pedigree:
+    config: PedigreeConfig
+    individuals: List[dict] = field(default_factory=list)
+    relationships: List[dict] = field(default_factory=list)
+    # id -> generation (0 = founders); not stored in the database
+    generation_of: Dict[int, int] = field(default_factory=dict)
+
+    def sample_roots(self, count: int, generation: Optional[int] = None) -> List[int]:
+        """
+        Deterministic sample of people from one generation (default: the
+        middle one, so they have both ancestors and descendants).
+        """
+        if generation is None:
+            generation = max(self.generation_of.values(), default=0) // 2
+        candidates = sorted(pid for pid, gen in self.generation_of.items() if gen == generation)
+        rng = random.Random(self.config.seed)
+        return rng.sample(candidates, min(count, len(candidates)))
+
+    def summary(self) -> dict:
+        by_type: Dict[str, int] = {}
+        for rel in self.relationships:
+            by_type[rel["relationship_type"]] = by_type.get(rel["relationship_type"], 0) + 1
+        return {
+            "individuals": len(self.individuals),
+            "relationships": len(self.relationships),
+            "relationships_by_type": by_type,
+            "generations": max(self.generation_of.values(), default=-1) + 1,
+        }
+
+
+class _PopulationFull(Exception):
+    pass
+
+
+class _Builder:
+    def __init__(self, config: PedigreeConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.pedigree = Pedigree(config=config)
+        self.gender: Dict[int, str] = {}
+        self.parents: Dict[int, Tuple[int, ...]] = {}
+
+    # ------------------------------------------------------------------ #
+
+    def person(self, generation: int, gender: str, last_name: Optional[str] = None) -> int:
+        if len(self.pedigree.individuals) >= self.config.population:
+            raise _PopulationFull()
+
+        pid = len(self.pedigree.individuals) + 1
+        birth = date(FIRST_BIRTH_YEAR + generation * GENERATION_YEARS, 1, 1) + timedelta(
+            days=self.rng.randint(-6 * 365, 6 * 365)
+        )
+        death = None
+        if birth.year < 1940 or self.rng.random() < 0.05:
+            death = birth + timedelta(days=self.rng.randint(20 * 365, 95 * 365))
+
+        self.pedigree.individuals.append({
+            "id": pid,
+            "first_name": self.rng.choice(FIRST_NAMES[gender]),
+            "last_name": last_name or self.rng.choice(LAST_NAMES),
+            "gender": gender,
+            "birth_date": birth,
+            "death_date": death,
+            "is_alive": death is None,
+        })
+        self.pedigree.generation_of[pid] = generation
+        self.gender[pid] = gender
+        return pid
+
+    def marry(self, a: int, b: int) -> None:
+        self.pedigree.relationships.append(
+            {"individual_id": a, "related_individual_id": b, "relationship_type": "spouse"}
+        )
+
+    def link_parent(self, parent_id: int, child_id: int) -> None:
+        if self.rng.random() < self.config.child_edge_rate:
+            row = {"individual_id": child_id, "related_individual_id": parent_id, "relationship_type": "child"}
+        else:
+            row = {"individual_id": parent_id, "related_individual_id": child_id, "relationship_type": "parent"}
+        self.pedigree.relationships.append(row)
+
+    def random_gender(self) -> str:
+        return "male" if self.rng.random() < 0.5 else "female"
+
+    def other_gender(self, pid: int) -> str:
+        return "female" if self.gender[pid] == "male" else "male"
+
+    def grandparents(self, pid: int) -> Set[int]:
+        result: Set[int] = set()
+        for parent in self.parents.get(pid, ()):
+            result.update(self.parents.get(parent, ()))
+        return result
+
+    # ------------------------------------------------------------------ #
+
+    def founder_couples(self) -> int:
+        """Enough founder couples that the full graph reaches `population`."""
+        growth = max(self.config.branching * self.config.marriage_rate, 1.0)
+        people_per_founder_couple = 2 * sum(growth ** g for g in range(self.config.generations))
+        return max(1, math.ceil(self.config.population / people_per_founder_couple))
+
+    def pair_generation(self, generation: int, singles: List[int]) -> List[Tuple[int, int]]:
+        """Marry off the children of one generation; returns the new couples."""
+        config = self.config
+        couples: List[Tuple[int, int]] = []
+        married: Set[int] = set()
+
+        # grandparent -> children of this generation, for cousin marriages
+        by_grandparent: Dict[int, List[int]] = {}
+        for pid in singles:
+            for gp in self.grandparents(pid):
+                by_grandparent.setdefault(gp, []).append(pid)
+
+        for pid in singles:
+            if pid in married or self.rng.random() >= config.marriage_rate:
+                continue
+
+            spouse = None
+            if self.rng.random() < config.cousin_marriage_rate:
+                parents = set(self.parents.get(pid, ()))
+                for gp in sorted(self.grandparents(pid)):
+                    for cand in by_grandparent.get(gp, []):
+                        if (cand not in married and cand != pid
+                                and self.gender[cand] != self.gender[pid]
+                                and not parents & set(self.parents.get(cand, ()))):
+                            spouse = cand
+                            break
+                    if spouse is not None:
+                        break
+
+            if spouse is None:
+                spouse = self.person(generation, self.other_gender(pid))
+
+            married.update((pid, spouse))
+            self.marry(pid, spouse)
+            couples.append((pid, spouse))
+
+            if self.rng.random() < config.remarriage_rate:
+                second = self.person(generation, self.other_gender(pid))
+                self.marry(pid, second)
+                couples.append((pid, second))
+
+        return couples
+
+    def build(self) -> Pedigree:
+        config = self.config
+        couples: List[Tuple[int, int]] = []
+        try:
+            for _ in range(self.founder_couples()):
+                a = self.person(0, "male")
+                b = self.person(0, "female")
+                self.marry(a, b)
+                couples.append((a, b))
+
+            for generation in range(1, config.generations):
+                children: List[int] = []
+                for a, b in couples:
+                    father = a if self.gender[a] == "male" else b
+                    last_name = self.pedigree.individuals[father - 1]["last_name"]
+                    count = max(0, round(self.rng.gauss(config.branching, 1.0)))
+                    for _ in range(count):
+                        child = self.person(generation, self.random_gender(), last_name)
+                        self.parents[child] = (a, b)
+                        self.link_parent(a, child)
+                        self.link_parent(b, child)
+                        children.append(child)
+
+                if not children:
+                    break
+                if generation < config.generations - 1:
+                    couples = self.pair_generation(generation, children)
+        except _PopulationFull:
+            pass
+
+        return self.pedigree
+
+
+def generate(config: PedigreeConfig) -> Pedigree:
+    return _Builder(config).build()
+
+
+# --------------------------- loaders --------------------------------------- #
+
+def load_sql(engine, pedigree: Pedigree, reset: bool = False, batch_size: int = 5000) -> None:
+    """
+    Bulk-insert the pedigree with its own ids. Requires empty individuals and
+    relationships tables unless `reset` is set (which deletes their rows).
+    Aggregate counters are rebuilt afterwards.
+    """
+    from sqlalchemy import func, insert, select, text
+    from sqlalchemy.orm import Session
+
+    from app.models.base import Base
+    from app.models.family_tree import DEFAULT_TREE_ID, FamilyTree
+    from app.models.individual import Individual
+    from app.models.individual_aggregate import IndividualAggregate
+    from app.models.relationship import Relationship
+    from app.repositories.aggregate_repository import recompute_all_aggregates
+    from app.repositories.data_version_repository import bump_data_versions
+
+    tables = [Individual.__table__, Relationship.__table__]
+    # Rows go to the default tree (the column's server default)
+    Base.metadata.create_all(engine, tables=[FamilyTree.__table__, *tables, IndividualAggregate.__table__])
+
+    with engine.begin() as conn:
+        if reset:
+            conn.execute(IndividualAggregate.__table__.delete())
+            conn.execute(Relationship.__table__.delete())
+            conn.execute(Individual.__table__.delete())
+        elif conn.execute(select(func.count()).select_from(Individual)).scalar():
+            raise RuntimeError("individuals table is not empty; use --reset on a benchmark database")
+
+        for table, rows in ((Individual.__table__, pedigree.individuals),
+                            (Relationship.__table__, pedigree.relationships)):
+            for start in range(0, len(rows), batch_size):
+                conn.execute(insert(table), rows[start:start + batch_size])
+        # Core inserts skip the ORM flush hook; running servers must drop their caches
+        bump_data_versions(conn, [DEFAULT_TREE_ID])
+
+        if conn.dialect.name == "postgresql":
+            # ids were inserted explicitly; move the sequences past them
+            for table in tables:
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+                ))
+
+    with Session(engine) as db:
+        recompute_all_aggregates(db)
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = PedigreeConfig()
+    parser.add_argument("--population", type=int, default=defaults.population)
+    parser.add_argument("--generations", type=int, default=defaults.generations)
+    parser.add_argument("--branching", type=float, default=defaults.branching)
+    parser.add_argument("--marriage-rate", type=float, default=defaults.marriage_rate)
+    parser.add_argument("--remarriage-rate", type=float, default=defaults.remarriage_rate)
+    parser.add_argument("--cousin-marriage-rate", type=float, default=defaults.cousin_marriage_rate)
+    parser.add_argument("--child-edge-rate", type=float, default=defaults.child_edge_rate)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--reset", action="store_true", help="delete existing individuals/relationships first")
+    parser.add_argument("--neo4j", action="store_true", help="also sync to Neo4j (NEO4J_* settings)")
+    parser.add_argument("--dry-run", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+
+    config = PedigreeConfig(
+        population=args.population,
+        generations=args.generations,
+        branching=args.branching,
+        marriage_rate=args.marriage_rate,
+        remarriage_rate=args.remarriage_rate,
+        cousin_marriage_rate=args.cousin_marriage_rate,
+        child_edge_rate=args.child_edge_rate,
+        seed=args.seed,
+    )
+    pedigree = generate(config)
+    print(json.dumps({"config": asdict(config), **pedigree.summary()}, indent=2))
+    if args.dry_run:
+        return
+
+    from app.db.database import SessionLocal, engine
+
+    load_sql(engine, pedigree, reset=args.reset)
+
+    if args.neo4j:
+        from app.graph.neo4j_client import neo4j_session
+        from app.services.graph_sync_service import GraphSyncService
+
+        db = SessionLocal()
+        try:
+            with neo4j_session() as neo4j:
+                print(json.dumps(GraphSyncService.sync_all(db, neo4j)))
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+TreeService / graph benchmark suite on a synthetic pedigree.
+
+Generates a deterministic pedigree (see synthetic_pedigree.py), loads it
+into a throwaway SQLite database (or --database-url, which is wiped) and
+times:
+
+  - TreeService.build_immediate_family
+  - TreeService.build_multi_level_tree, direction=both, depths 1..10
+  - GraphSyncService.sync_all
+  - GraphTreeService ancestors / descendants / full tree (real Neo4j only)
+  - the tree HTTP endpoints, called in-process through the ASGI app
+
+Without --neo4j, sync_all runs against an in-memory stand-in session that
+only counts statements: the numbers cover the SQL reads and the per-row
+round trips the service issues, not Neo4j's own write cost. GraphTreeService
+needs a real server (--neo4j uses the NEO4J_* settings).
+
+Results are written as JSON (default benchmarks/results/<commit>.json).
+Pass --compare with an earlier result file to print p50 ratios.
+
+Usage:
+    python benchmarks/tree_service_suite.py --population 5000 --generations 8
+    python benchmarks/tree_service_suite.py --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from statistics import median, quantiles
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from synthetic_pedigree import PedigreeConfig, generate, load_sql
+
+
+# --------------------------- measurement ----------------------------------- #
+
+def _summarise(samples: List[float], queries: Optional[int] = None, **extra) -> dict:
+    samples_ms = [s * 1000 for s in samples]
+    p95 = quantiles(samples_ms, n=20)[18] if len(samples_ms) > 1 else samples_ms[0]
+    result = {
+        "runs": len(samples_ms),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 3),
+        "p50_ms": round(median(samples_ms), 3),
+        "p95_ms": round(p95, 3),
+        "min_ms": round(min(samples_ms), 3),
+        "max_ms": round(max(samples_ms), 3),
+    }
+    if queries is not None:
+        result["queries"] = queries
+    result.update(extra)
+    return result
+
+
+def _measure(func: Callable[[], object], repeat: int, warmup: int = 1) -> tuple[List[float], int, object]:
+    """Times `func`; returns (samples, SQL statements of the last run, last result)."""
+    from app.db.query_stats import start_request_stats
+
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    stats = None
+    result = None
+    for _ in range(repeat):
+        stats = start_request_stats()
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return samples, stats.count if stats else 0, result
+
+
+class StandInNeo4jSession:
+    """Accepts every statement and returns no rows; counts round trips."""
+
+    class _Result:
+        def __iter__(self):
+            return iter(())
+
+        def single(self):
+            return None
+
+    def __init__(self):
+        self.statements = 0
+
+    def run(self, query, parameters=None, **kwargs):
+        self.statements += 1
+        return self._Result()
+
+
+def _asgi_get(app, url: str) -> tuple[int, int, Optional[int]]:
+    """
+    Minimal in-process GET through the ASGI app.
+    Returns (status, body bytes, SQL statements from the Server-Timing header).
+    """
+    parts = urlsplit(url)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    status = 0
+    size = 0
+    queries = None
+    request_sent = False
+
+    async def run():
+        done = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Streaming responses listen for a disconnect until they finish
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status, size, queries
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing = dict(message.get("headers", [])).get(b"server-timing", b"")
+                match = re.search(rb'"(\d+) queries"', timing)
+                queries = int(match.group(1)) if match else None
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        await app(scope, receive, send)
+
+    asyncio.run(run())
+    return status, size, queries
+
+
+# --------------------------- suites ---------------------------------------- #
+
+def bench_tree_service(roots: List[int], repeat: int, max_depth: int) -> Dict[str, dict]:
+    from app.db.database import SessionLocal
+    from app.services.tree_service import TreeService
+
+    results = {}
+    db = SessionLocal()
+    try:
+        samples, queries = [], []
+        for root in roots:
+            s, q, _ = _measure(lambda: TreeService.build_immediate_family(db, root), repeat)
+            samples += s
+            queries.append(q)
+        results["tree_service.immediate_family"] = _summarise(samples, max(queries))
+
+        for depth in range(1, max_depth + 1):
+            samples, queries, nodes = [], [], []
+            for root in roots:
+                s, q, tree = _measure(
+                    lambda: TreeService.build_multi_level_tree(db, root, "both", depth), repeat
+                )
+                samples += s
+                queries.append(q)
+                nodes.append(sum(len(band.individuals) for band in tree.generations))
+            results[f"tree_service.multi_level.depth_{depth}"] = _summarise(
+                samples, max(queries), max_nodes=max(nodes)
+            )
+    finally:
+        db.close()
+    return results
+
+
+def bench_graph(roots: List[int], repeat: int, use_neo4j: bool) -> Dict[str, dict]:
+    from app.db.database import SessionLocal
+    from app.services.graph_sync_service import GraphSyncService
+    from app.services.graph_tree_service import GraphTreeService
+
+    results = {}
+    db = SessionLocal()
+    try:
+        if not use_neo4j:
+            neo4j = StandInNeo4jSession()
+            samples, queries, _ = _measure(lambda: GraphSyncService.sync_all(db, neo4j), repeat=1, warmup=0)
+            results["graph_sync.sync_all.stand_in"] = _summarise(
+                samples, queries, neo4j_statements=neo4j.statements
+            )
+            return results
+
+        from app.graph.neo4j_client import neo4j_session
+
+        with neo4j_session() as neo4j:
+            samples, queries, _ = _measure(lambda: GraphSyncService.sync_all(db, neo4j), repeat=1, warmup=0)
+            results["graph_sync.sync_all"] = _summarise(samples, queries)
+
+            for name, func in (
+                ("ancestors", GraphTreeService.get_ancestors),
+                ("descendants", GraphTreeService.get_descendants),
+                ("full_tree", GraphTreeService.get_full_tree),
+            ):
+                samples = []
+                for root in roots:
+                    s, _, _ = _measure(lambda: func(neo4j, root, 4), repeat)
+                    samples += s
+                results[f"graph_tree.{name}.depth_4"] = _summarise(samples)
+    finally:
+        db.close()
+    return results
+
+
+def bench_http(roots: List[int], repeat: int) -> Dict[str, dict]:
+    from app.main import app
+
+    endpoints = {
+        "immediate": "/api/tree/{id}/immediate",
+        "multi.depth_3": "/api/tree/{id}/multi?direction=both&max_depth=3",
+        "multi_stream.depth_3": "/api/tree/{id}/multi/stream?direction=both&max_depth=3",
+        "visual": "/api/tree/{id}/visual",
+        "visual.depth_3": "/api/tree/{id}/visual?direction=both&max_depth=3",
+        "viewport.depth_5": "/api/tree/{id}/viewport?min_x=-1500&min_y=-800&max_x=1500&max_y=800"
+                            "&zoom=1&direction=both&max_depth=5",
+    }
+
+    results = {}
+    for name, template in endpoints.items():
+        samples, queries, statuses = [], [], set()
+        for root in roots:
+            url = template.format(id=root)
+            s, _, (status, _, q) = _measure(lambda: _asgi_get(app, url), repeat)
+            samples += s
+            queries.append(q or 0)
+            statuses.add(status)
+        results[f"http.{name}"] = _summarise(samples, max(queries), statuses=sorted(statuses))
+    return results
+
+
+# --------------------------- output ---------------------------------------- #
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", *args], cwd=ROOT, stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline_path: str, threshold: float) -> bool:
+    """Prints p50 ratios against a baseline; returns True if anything regressed."""
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+
+    regressed = False
+    print(f"\n{'benchmark':<45} {'base p50':>10} {'p50':>10} {'ratio':>7}")
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old or not old.get("p50_ms"):
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{name:<45} {old['p50_ms']:>10.3f} {result['p50_ms']:>10.3f} {ratio:>7.2f}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = PedigreeConfig()
+    parser.add_argument("--population", type=int, default=defaults.population)
+    parser.add_argument("--generations", type=int, default=defaults.generations)
+    parser.add_argument("--branching", type=float, default=defaults.branching)
+    parser.add_argument("--remarriage-rate", type=float, default=defaults.remarriage_rate)
+    parser.add_argument("--cousin-marriage-rate", type=float, default=defaults.cousin_marriage_rate)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--roots", type=int, default=5, help="root individuals per benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per root")
+    parser.add_argument("--max-depth", type=int, default=10)
+    parser.add_argument("--database-url", help="benchmark database (its individuals/relationships are wiped)")
+    parser.add_argument("--neo4j", action="store_true", help="use the Neo4j server from NEO4J_* settings")
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--output", help="result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative p50 change reported by --compare")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    # Settings are read at import time, so the database has to be chosen first
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmpdir.name}/bench.db"
+    os.environ.setdefault("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["LOG_FILE"] = ""
+    logging.getLogger("family_tree").setLevel(logging.ERROR)
+
+    from app.db.database import engine
+
+    config = PedigreeConfig(
+        population=args.population,
+        generations=args.generations,
+        branching=args.branching,
+        remarriage_rate=args.remarriage_rate,
+        cousin_marriage_rate=args.cousin_marriage_rate,
+        seed=args.seed,
+    )
+    pedigree = generate(config)
+    start = time.perf_counter()
+    load_sql(engine, pedigree, reset=True)
+    load_seconds = time.perf_counter() - start
+
+    roots = pedigree.sample_roots(args.roots)
+    results: Dict[str, dict] = {}
+    results.update(bench_tree_service(roots, args.repeat, args.max_depth))
+    results.update(bench_graph(roots, args.repeat, args.neo4j))
+    if not args.skip_http:
+        results.update(bench_http(roots, args.repeat))
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "neo4j": "server" if args.neo4j else "stand-in",
+            "pedigree": {"config": asdict(config), **pedigree.summary()},
+            "load_seconds": round(load_seconds, 3),
+            "roots": roots,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(report, fh, indent=2)
+
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        print(f"{name:<{width}}  p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms"
+              f"  queries {result.get('queries', '-')}")
+    print(f"\nResults written to {output}")
+
+    tmpdir.cleanup()
+    if args.compare and compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()